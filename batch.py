@@ -0,0 +1,144 @@
+from catalog import CompiledCatalog, distinct_multipliers
+from mix import (
+    MAX_INGREDIENTS,
+    DuplicateIngredientException,
+    InvalidEffectException,
+    InvalidIngredientException,
+    MaximumIngredientsAddedException
+)
+from numpy import append, asarray, bool_, broadcast_to, float32, int64, take_along_axis, uint16, where, zeros
+from numpy.typing import ArrayLike, NDArray
+from typing import Tuple, Union
+
+# Marks an unused ingredient slot in a sequence and an unused effect slot in a result
+EMPTY_SLOT : uint16 = uint16(0xFFFF)
+
+def score_batch(
+    compiled: CompiledCatalog,
+    sequences: ArrayLike,
+    initial_effects: Union[ArrayLike, None] = None
+) -> Tuple[NDArray[float32], NDArray[uint16]]:
+    """
+    Scores many ingredient sequences at once. Each step applies the next
+    ingredient of every row with one gather over a padded effect matrix, so
+    the result for every row is exactly what building a Mix, adding the row's
+    ingredients and calling get_multiplier would give: the effects with
+    duplicates kept, and the multiplier counting each distinct effect once.
+    Rows can start from the effects of a base product like
+    Mix(..., initial_effects=...), so one call can score every product.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to score with, see catalog.get_compiled_catalog.
+    sequences : ArrayLike
+        Ingredient IDs of shape (N, L) with L at most MAX_INGREDIENTS. Rows
+        shorter than L are padded at the end with EMPTY_SLOT.
+    initial_effects : ArrayLike | None
+        Effect IDs every row starts with, of shape (K,) shared by every row or
+        of shape (N, K) with rows padded at the end with EMPTY_SLOT. Defaults
+        to none.
+
+    Raises
+    ------
+    ValueError
+        If sequences is not two dimensional, a row has an ingredient after
+        its padding or initial_effects does not match the rows.
+    MaximumIngredientsAddedException
+        If L is larger than MAX_INGREDIENTS.
+    InvalidIngredientException
+        If a row contains an ingredient missing from the catalog.
+    DuplicateIngredientException
+        If a row adds the same ingredient twice in a row.
+    InvalidEffectException
+        If a row starts or ends with an effect missing from the effects file.
+
+    Returns
+    -------
+    Tuple[NDArray[float32], NDArray[uint16]]
+        Multiplier of every row, and the effects of every row of shape
+        (N, K + L) in the order Mix.mix_effects holds them, padded at the end
+        with EMPTY_SLOT.
+    """
+    sequences = asarray(sequences, dtype=uint16)
+    if sequences.ndim != 2:
+        raise ValueError("sequences must be a two dimensional array.")
+    n_rows, length = sequences.shape
+    if length > MAX_INGREDIENTS:
+        raise MaximumIngredientsAddedException()
+
+    # Validate every row the same way Mix.add_ingredient does
+    empty = sequences == EMPTY_SLOT
+    if (~empty[:, 1:] & empty[:, :-1]).any():
+        raise ValueError("Padding must only appear at the end of a sequence.")
+    known = zeros(sequences.shape, dtype=bool_)
+    in_range = sequences < compiled.n_ingredients
+    known[in_range] = compiled.ingredient_valid[sequences[in_range]]
+    invalid = ~empty & ~known
+    if invalid.any():
+        raise InvalidIngredientException(sequences[invalid][0])
+    repeated = ~empty[:, 1:] & (sequences[:, 1:] == sequences[:, :-1])
+    if repeated.any():
+        raise DuplicateIngredientException(sequences[:, 1:][repeated][0])
+
+    # Extend the tables with a padding row and column that map to themselves
+    n_ingredients, n_effects = compiled.n_ingredients, compiled.n_effects
+    transitions = zeros((n_ingredients + 1, n_effects + 1), dtype=int64)
+    transitions[:n_ingredients, :n_effects] = compiled.transitions
+    transitions[:, n_effects] = n_effects
+    transitions[n_ingredients, :n_effects] = range(n_effects)
+    effect_given = append(compiled.effect_given.astype(int64), n_effects)
+    ingredients = where(empty, n_ingredients, sequences).astype(int64)
+
+    # Start every row from its initial effects, padding mapped to the extra column
+    initial = _initial_effects(compiled, initial_effects, n_rows)
+    n_initial = initial.shape[1]
+    effects = zeros((n_rows, n_initial + length), dtype=int64) + n_effects
+    effects[:, :n_initial] = initial
+
+    # Apply one ingredient column at a time across every row
+    for step in range(length):
+        current = ingredients[:, step]
+        held = n_initial + step
+        effects[:, :held] = transitions[current[:, None], effects[:, :held]]
+        effects[:, held] = effect_given[current]
+
+    # Every remaining effect must exist in the effects file
+    valid = append(compiled.effect_valid, True)
+    if not valid[effects].all():
+        raise InvalidEffectException(uint16(effects[~valid[effects]][0]))
+
+    # Count every distinct effect once, the padding column being worth nothing
+    multipliers = distinct_multipliers(append(compiled.effect_values, float32(0.0)), effects)
+
+    # Move the padding of shorter initial effects behind the mix's effects
+    if n_initial > 0:
+        effects = take_along_axis(effects, (effects == n_effects).argsort(axis=1, kind='stable'), axis=1)
+    effects = where(effects == n_effects, EMPTY_SLOT, effects).astype(uint16)
+    return multipliers, effects
+
+def _initial_effects(
+    compiled: CompiledCatalog,
+    initial_effects: Union[ArrayLike, None],
+    n_rows: int
+) -> NDArray[int64]:
+    """
+    Returns the initial effects of every row of score_batch as an (N, K)
+    matrix with padding replaced by n_effects, validated like Mix.__init__.
+    """
+    if initial_effects is None:
+        return zeros((n_rows, 0), dtype=int64)
+    initial = asarray(initial_effects, dtype=uint16)
+    if initial.ndim == 1:
+        initial = broadcast_to(initial, (n_rows, len(initial)))
+    if initial.ndim != 2 or initial.shape[0] != n_rows:
+        raise ValueError("initial_effects must hold one row of effects per sequence.")
+
+    empty = initial == EMPTY_SLOT
+    known = zeros(initial.shape, dtype=bool_)
+    in_range = initial < compiled.n_effects
+    known[in_range] = compiled.effect_valid[initial[in_range]]
+    invalid = ~empty & ~known
+    if invalid.any():
+        raise InvalidEffectException(initial[invalid][0])
+    return where(empty, compiled.n_effects, initial).astype(int64)
@@ -0,0 +1,128 @@
+from bitset import BitsetTables, mask_to_effects, unique_pairs
+from catalog import CompiledCatalog
+from mix import MAX_INGREDIENTS
+from numpy import arange, argsort, array, concatenate, float32, int64, tile, uint64
+from numpy.typing import NDArray
+from search import SearchResult, _check_search_arguments
+from typing import Dict, List, Tuple
+
+DEFAULT_BEAM_WIDTH : int = 64
+
+def beam_search(
+    compiled: CompiledCatalog,
+    width: int = DEFAULT_BEAM_WIDTH,
+    depth: int = MAX_INGREDIENTS,
+    top_k: int = 10,
+    heuristic: bool = False
+) -> List[SearchResult]:
+    """
+    Approximate best-recipe search. Every depth expands each partial mix of
+    the beam by every ingredient in one vectorized step, merges children with
+    the same effects and last ingredient, and keeps the width best children for
+    the next depth. Larger widths explore more of the space at the cost of
+    latency; a width large enough to hold every state makes the result exact.
+
+    Children are ranked by their current multiplier, or with heuristic set by
+    the admissible upper bound on what they can still reach within the
+    remaining depth (see bitset.BitsetTables.upper_bound), which favours
+    partial mixes whose effects can still be upgraded. Effects are tracked as
+    sets like in search.find_best_mixes.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to search, see catalog.get_compiled_catalog.
+    width : int
+        Number of partial mixes kept at each depth.
+    depth : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+    top_k : int
+        Number of results to return.
+    heuristic : bool
+        Rank partial mixes by their upper bound instead of their multiplier.
+
+    Raises
+    ------
+    ValueError
+        If width, depth or top_k is out of range.
+    InvalidEffectException
+        If an ingredient can produce an effect missing from the effects file.
+
+    Returns
+    -------
+    List[SearchResult]
+        Best distinct effect sets found, highest multiplier first. Ties are
+        broken by shorter and then lexicographically smaller order.
+    """
+    _check_search_arguments(compiled, depth, top_k)
+    if width < 1:
+        raise ValueError("width must be at least 1.")
+
+    tables = BitsetTables(compiled)
+    ingredients = compiled.ingredients.astype(int64)
+
+    # The beam of every depth, kept to rebuild orders through the parents
+    layers: List[Tuple[NDArray[uint64], NDArray[int64], NDArray[int64]]] = []
+    states = array([0], dtype=uint64)
+    lasts = array([-1], dtype=int64)
+
+    for step in range(1, depth + 1):
+        # Expand every partial mix by every ingredient except its last one
+        child_states = concatenate([tables.apply_many(states, int(i)) for i in ingredients])
+        child_lasts = ingredients.repeat(len(states))
+        parents = tile(arange(len(states), dtype=int64), len(ingredients))
+        allowed = child_lasts != lasts[parents]
+        child_states, child_lasts, parents = child_states[allowed], child_lasts[allowed], parents[allowed]
+
+        # Merge children with the same effects and last ingredient
+        first = unique_pairs(child_states, child_lasts)
+        child_states, child_lasts, parents = child_states[first], child_lasts[first], parents[first]
+
+        # Keep the best width children
+        if heuristic:
+            scores = tables.upper_bounds(child_states, depth - step)
+        else:
+            scores = tables.multipliers(child_states)
+        keep = argsort(-scores, kind='stable')[:width]
+        states, lasts, parents = child_states[keep], child_lasts[keep], parents[keep]
+        layers.append((states, lasts, parents))
+
+    return _collect_results(tables, layers, top_k)
+
+def _collect_results(
+    tables: BitsetTables,
+    layers: List[Tuple[NDArray[uint64], NDArray[int64], NDArray[int64]]],
+    top_k: int
+) -> List[SearchResult]:
+    """Rebuilds the orders of every kept partial mix and returns the best distinct ones."""
+    best: Dict[int, Tuple[float32, Tuple[int, ...]]] = {}
+    for step, (states, lasts, parents) in enumerate(layers):
+        multipliers = tables.multipliers(states)
+        for index in range(len(states)):
+            order = _rebuild_order(layers, step, index)
+            state = int(states[index])
+            known = best.get(state)
+            if known is None or (len(order), order) < (len(known[1]), known[1]):
+                best[state] = (multipliers[index], order)
+
+    ranked = sorted(
+        best.items(), key=lambda item: (-item[1][0], len(item[1][1]), item[1][1])
+    )[:top_k]
+    return [
+        SearchResult(order, mask_to_effects(state), multiplier)
+        for state, (multiplier, order) in ranked
+    ]
+
+def _rebuild_order(
+    layers: List[Tuple[NDArray[uint64], NDArray[int64], NDArray[int64]]],
+    step: int,
+    index: int
+) -> Tuple[int, ...]:
+    """Follows the parents of a partial mix back to the empty mix."""
+    order = []
+    while step >= 0:
+        _, lasts, parents = layers[step]
+        order.append(int(lasts[index]))
+        index = int(parents[index])
+        step -= 1
+    return tuple(reversed(order))
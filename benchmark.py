@@ -0,0 +1,219 @@
+import mix
+import util
+
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from json import dump, load
+from numpy import __version__ as numpy_version, percentile, uint16
+from os import makedirs, path
+from platform import platform, python_version
+from time import perf_counter
+from typing import Callable, Dict, List, Union
+
+# Paths to the shipped catalogs and the baseline recorded on this machine,
+# which is kept out of version control
+INGREDIENTS_JSON : str = path.join(path.dirname(__file__), "assets/ingredients.json")
+EFFECTS_JSON : str = path.join(path.dirname(__file__), "assets/effects.json")
+BASELINE_JSON : str = path.join(path.dirname(__file__), "benchmarks/baseline.json")
+
+# A slowdown of the median latency beyond this fraction counts as a regression
+DEFAULT_TOLERANCE : float = 0.25
+
+# Ingredient order used for the Mix chains, every prefix of it is valid
+CHAIN_ORDER : List[int] = [0, 9, 2, 9, 11, 4, 10, 15]
+
+def measure(
+    function: Callable[[], object],
+    number: int,
+    repeat: int
+) -> Dict[str, float]:
+    """
+    Times a function and summarises the latency of a single call.
+
+    Parameters
+    ----------
+    function : Callable[[], object]
+        Function to time, called without arguments.
+    number : int
+        Calls per sample. Each sample's latency is its time divided by number.
+    repeat : int
+        Number of samples.
+
+    Returns
+    -------
+    Dict[str, float]
+        ops_per_sec from the median latency, and the min, mean, p50, p90 and
+        p99 latencies in microseconds.
+    """
+    function()
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((perf_counter() - start) / number * 1e6)
+
+    p50 = float(percentile(samples, 50))
+    return {
+        'ops_per_sec': 1e6 / p50 if p50 > 0 else float('inf'),
+        'min_us': min(samples),
+        'mean_us': sum(samples) / len(samples),
+        'p50_us': p50,
+        'p90_us': float(percentile(samples, 90)),
+        'p99_us': float(percentile(samples, 99)),
+        'number': number,
+        'repeat': repeat
+    }
+
+def run_benchmarks(
+    ingredients_file_path: str = INGREDIENTS_JSON,
+    effects_file_path: str = EFFECTS_JSON,
+    repeat: int = 50,
+    number: int = 20
+) -> Dict[str, Dict[str, float]]:
+    """
+    Runs every benchmark on a pair of catalogs.
+
+    Parameters
+    ----------
+    ingredients_file_path : str
+        Path to the ingredients JSON file.
+    effects_file_path : str
+        Path to the effects JSON file.
+    repeat : int
+        Samples per benchmark.
+    number : int
+        Calls per sample.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        Results keyed by benchmark name, see measure.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+
+    # Parsing the catalogs without the cache
+    results['util.get_ingredient_adjacency_lists'] = measure(
+        lambda: util.get_ingredient_adjacency_lists(ingredients_file_path), number, repeat
+    )
+    results['util.get_effect_details'] = measure(
+        lambda: util.get_effect_details(effects_file_path), number, repeat
+    )
+
+    # Building a mix of every length from a fresh Mix
+    def chain(length: int) -> Callable[[], object]:
+        def build() -> mix.Mix:
+            mix_instance = mix.Mix(ingredients_file_path, effects_file_path)
+            for ingredient in CHAIN_ORDER[:length]:
+                mix_instance.add_ingredient(uint16(ingredient))
+            return mix_instance
+        return build
+
+    for length in range(1, len(CHAIN_ORDER) + 1):
+        results[f'mix.Mix.add_ingredient[chain={length}]'] = measure(chain(length), number, repeat)
+
+    # Scoring a full mix
+    full_mix = chain(len(CHAIN_ORDER))()
+    results['mix.Mix.get_multiplier'] = measure(full_mix.get_multiplier, number, repeat)
+
+    return results
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = DEFAULT_TOLERANCE
+) -> Dict[str, Dict[str, Union[float, bool]]]:
+    """
+    Compares results against a baseline by median latency.
+
+    Parameters
+    ----------
+    results : Dict[str, Dict[str, float]]
+        Current results, see run_benchmarks.
+    baseline : Dict[str, Dict[str, float]]
+        Stored results to compare against.
+    tolerance : float
+        Allowed relative slowdown of the median latency.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float | bool]]
+        For every benchmark present in both, the baseline and current median
+        latency, their ratio and whether it is a regression.
+    """
+    comparison: Dict[str, Dict[str, Union[float, bool]]] = {}
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        ratio = current['p50_us'] / baseline[name]['p50_us']
+        comparison[name] = {
+            'baseline_p50_us': baseline[name]['p50_us'],
+            'p50_us': current['p50_us'],
+            'ratio': ratio,
+            'regression': ratio > 1.0 + tolerance
+        }
+    return comparison
+
+def _metadata() -> Dict[str, str]:
+    """Returns a description of the machine the benchmarks ran on."""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': python_version(),
+        'numpy': numpy_version,
+        'platform': platform()
+    }
+
+def main(arguments: Union[List[str], None] = None) -> int:
+    """
+    Command line entry point. Runs the benchmarks, writes them as JSON and,
+    with --compare, compares them with a baseline recorded on this machine.
+
+    Returns
+    -------
+    int
+        1 if --compare is given and a benchmark regressed beyond the
+        tolerance, otherwise 0.
+    """
+    parser = ArgumentParser(description="Benchmark the util and mix hot paths.")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    parser.add_argument('--baseline', default=BASELINE_JSON, help="Baseline JSON to compare against or save to.")
+    parser.add_argument('--compare', action='store_true', help="Compare the results with the baseline.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baseline.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown.")
+    parser.add_argument('--repeat', type=int, default=50, help="Samples per benchmark.")
+    parser.add_argument('--number', type=int, default=20, help="Calls per sample.")
+    options = parser.parse_args(arguments)
+
+    report = {
+        'metadata': _metadata(),
+        'results': run_benchmarks(repeat=options.repeat, number=options.number)
+    }
+
+    regressed = False
+    if options.compare:
+        if not path.exists(options.baseline):
+            parser.error(f"No baseline at {options.baseline}, record one with --save-baseline first.")
+        with open(options.baseline, 'r') as file:
+            baseline = load(file)
+        report['comparison'] = compare(report['results'], baseline['results'], options.tolerance)
+        regressed = any(entry['regression'] for entry in report['comparison'].values())
+
+    for name, result in report['results'].items():
+        line = f"{name:45} {result['ops_per_sec']:>12.1f} ops/s  p50 {result['p50_us']:>10.2f} us  p99 {result['p99_us']:>10.2f} us"
+        if name in report.get('comparison', {}):
+            entry = report['comparison'][name]
+            line += f"  x{entry['ratio']:.2f}" + ("  REGRESSION" if entry['regression'] else "")
+        print(line)
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            dump(report, file, indent=4)
+    if options.save_baseline:
+        makedirs(path.dirname(path.abspath(options.baseline)), exist_ok=True)
+        with open(options.baseline, 'w') as file:
+            dump({'metadata': report['metadata'], 'results': report['results']}, file, indent=4)
+
+    return 1 if regressed else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,372 @@
+import util
+
+from catalog import CompiledCatalog, get_compiled_catalog, round_multiplier
+from numpy import arange, bitwise_or, concatenate, float32, float64, int64, lexsort, maximum, round, uint64, unique, where, zeros
+from numpy.typing import NDArray
+from typing import Dict, Iterable, List, Tuple
+
+MAX_BITSET_EFFECTS : int = 64
+
+# Rounding to two decimals adds at most 0.005 to a multiplier, so an unrounded
+# bound this far below a threshold cannot round up to it
+BOUND_ROUNDING_SLACK : float = 0.01
+
+class BitsetTables:
+    """
+    Precomputed tables for effect sets stored as a single 64 bit mask, where
+    bit e is set when effect e is in the mix.
+
+    The mask is split into bytes and every ingredient gets one 256 entry table
+    per byte position mapping the byte to the mask of the effects those bits turn
+    into. Mixing an ingredient in is then one lookup per byte ORed together with
+    the bit of the effect the ingredient gives, and the multiplier is one lookup
+    per byte in a table of summed effect values. Both work on a single Python int
+    or elementwise on a uint64 array of states.
+
+    A mask is a set: an effect produced twice is only counted once, the
+    scoring rule Mix.get_multiplier uses as well, see
+    catalog.distinct_multiplier.
+
+    Attributes
+    ----------
+    n_ingredients : int
+        Number of ingredient IDs in the catalog.
+    n_effects : int
+        Number of effect IDs in the catalog.
+    n_bytes : int
+        Number of bytes of the mask that can hold an effect.
+    masks : NDArray[uint64]
+        Transition tables of shape (n_ingredients, n_bytes, 256).
+    given_masks : NDArray[uint64]
+        Bit of the effect each ingredient gives.
+    values : NDArray[float64]
+        Summed effect values of shape (n_bytes, 256).
+    """
+    def __init__(self, compiled: CompiledCatalog) -> None:
+        """
+        __init__ (dunder method)
+
+        Builds the tables from a compiled catalog.
+
+        Parameters
+        ----------
+        compiled : CompiledCatalog
+            Catalog to build the tables from.
+
+        Raises
+        ------
+        ValueError
+            If the catalog has more than MAX_BITSET_EFFECTS effect IDs.
+        """
+        if compiled.n_effects > MAX_BITSET_EFFECTS:
+            raise ValueError(
+                f"Bitset states support at most {MAX_BITSET_EFFECTS} effects, "
+                f"the catalog has {compiled.n_effects}."
+            )
+        self.n_ingredients : int = compiled.n_ingredients
+        self.n_effects : int = compiled.n_effects
+        self.n_bytes : int = max((compiled.n_effects + 7) // 8, 1)
+        width = self.n_bytes * 8
+
+        # Bits set in each of the 256 values of a byte
+        byte_bits = (arange(256)[:, None] >> arange(8)[None, :]) & 1 == 1
+
+        # Bit each effect turns into per ingredient, padded to whole bytes
+        target_bits = zeros((self.n_ingredients, width), dtype=uint64)
+        target_bits[:, :self.n_effects] = uint64(1) << compiled.transitions.astype(uint64)
+
+        self.masks : NDArray[uint64] = zeros((self.n_ingredients, self.n_bytes, 256), dtype=uint64)
+        for byte in range(self.n_bytes):
+            block = target_bits[:, None, byte * 8:(byte + 1) * 8]
+            self.masks[:, byte, :] = bitwise_or.reduce(
+                where(byte_bits[None, :, :], block, uint64(0)), axis=2
+            )
+        self.given_masks : NDArray[uint64] = uint64(1) << compiled.effect_given.astype(uint64)
+
+        # Effect values summed per byte in ascending effect order
+        self.values : NDArray[float64] = _byte_sums(compiled.effect_values, self.n_bytes)
+
+        # Python copies for the scalar methods, numpy scalars are slow one at a time
+        self._mask_rows : List[List[List[int]]] = self.masks.tolist()
+        self._given_rows : List[int] = self.given_masks.tolist()
+        self._value_rows : List[List[float]] = self.values.tolist()
+        self._shifts : List[Tuple[int, int]] = [(byte, byte * 8) for byte in range(self.n_bytes)]
+
+        # Upper bound tables, built per remaining depth on first use
+        self._transitions : NDArray = compiled.transitions[compiled.ingredients]
+        self._effect_given : NDArray = compiled.effect_given[compiled.ingredients]
+        self._reach_values : List[NDArray[float64]] = [maximum(compiled.effect_values.astype(float64), 0.0)]
+        self._bound_tables : Dict[int, Tuple[NDArray[float64], List[List[float]], float]] = {}
+
+    def apply(self, state: int, ingredient: int) -> int:
+        """
+        Returns the state after mixing an ingredient into a state.
+
+        Parameters
+        ----------
+        state : int
+            Effect set as a bitmask.
+        ingredient : int
+            A valid ingredient ID.
+
+        Returns
+        -------
+        int
+            New effect set as a bitmask.
+        """
+        rows = self._mask_rows[ingredient]
+        child = self._given_rows[ingredient]
+        for byte, shift in self._shifts:
+            child |= rows[byte][(state >> shift) & 255]
+        return child
+
+    def apply_many(self, states: NDArray[uint64], ingredient: int) -> NDArray[uint64]:
+        """
+        Returns the states after mixing the same ingredient into every state of
+        an array.
+
+        Parameters
+        ----------
+        states : NDArray[uint64]
+            Effect sets as bitmasks.
+        ingredient : int
+            A valid ingredient ID.
+
+        Returns
+        -------
+        NDArray[uint64]
+            New effect sets as bitmasks.
+        """
+        children = zeros(states.shape, dtype=uint64)
+        children |= self.given_masks[ingredient]
+        for byte in range(self.n_bytes):
+            children |= self.masks[ingredient, byte][(states >> uint64(byte * 8)) & uint64(255)]
+        return children
+
+    def value(self, state: int) -> float:
+        """Returns the summed effect values of a state before rounding."""
+        total = 0.0
+        for byte, shift in self._shifts:
+            total += self._value_rows[byte][(state >> shift) & 255]
+        return total
+
+    def multiplier(self, state: int) -> float32:
+        """Returns the multiplier of a state, rounded like Mix.get_multiplier."""
+        return round_multiplier(self.value(state))
+
+    def multipliers(self, states: NDArray[uint64]) -> NDArray[float32]:
+        """Returns the multiplier of every state of an array."""
+        totals = zeros(states.shape, dtype=float64)
+        for byte in range(self.n_bytes):
+            totals += self.values[byte][(states >> uint64(byte * 8)) & uint64(255)]
+        return round(totals, 2).astype(float32)
+
+    def upper_bound(self, state: int, remaining: int) -> float:
+        """
+        Returns an upper bound on the unrounded multiplier of any mix reachable
+        from a state by adding at most remaining ingredients.
+
+        Every effect in the state is counted at the highest value it can be
+        turned into within remaining transitions, and every ingredient still to
+        be added contributes the highest value its effect can reach in the steps
+        left after it. Both are counted at no less than 0: every effect of a
+        finished mix comes from at least one effect in the state or one added
+        ingredient, but effects can merge and a mix can stop early, which only
+        drops terms when none of them is negative. The bound then never
+        underestimates, negative effect values included, so it is admissible
+        for pruning and for ranking partial mixes.
+
+        Parameters
+        ----------
+        state : int
+            Effect set as a bitmask.
+        remaining : int
+            Number of ingredients that may still be added.
+
+        Returns
+        -------
+        float
+            Upper bound on the multiplier before rounding.
+        """
+        _, rows, bonus = self._bound_table(remaining)
+        total = bonus
+        for byte, shift in self._shifts:
+            total += rows[byte][(state >> shift) & 255]
+        return total
+
+    def upper_bounds(self, states: NDArray[uint64], remaining: int) -> NDArray[float64]:
+        """Returns upper_bound for every state of an array."""
+        table, _, bonus = self._bound_table(remaining)
+        totals = zeros(states.shape, dtype=float64) + bonus
+        for byte in range(self.n_bytes):
+            totals += table[byte][(states >> uint64(byte * 8)) & uint64(255)]
+        return totals
+
+    def best_value(
+        self,
+        state: int,
+        last: int,
+        remaining: int,
+        ingredients: List[int],
+        floor: float = float('-inf')
+    ) -> float:
+        """
+        Returns the highest unrounded value of any state reachable from a
+        state by adding at most remaining ingredients, the state itself
+        included.
+
+        The walk is depth first, expands every (state, last ingredient) pair
+        once with the most ingredients left and skips branches whose
+        upper_bound cannot beat the best value found so far or floor.
+
+        Parameters
+        ----------
+        state : int
+            Effect set as a bitmask.
+        last : int
+            Last ingredient added, which may not be added next, or -1.
+        remaining : int
+            Number of ingredients that may still be added.
+        ingredients : List[int]
+            Ingredient IDs that may be added.
+        floor : float
+            Value the caller is only interested in beating. Branches bounded
+            below floor by more than BOUND_ROUNDING_SLACK are skipped, so a
+            result below that is not exact.
+
+        Returns
+        -------
+        float
+            Best reachable value before rounding.
+        """
+        apply, upper_bound = self.apply, self.upper_bound
+        best = [self.value(state)]
+        cutoff = [max(best[0], floor) - BOUND_ROUNDING_SLACK]
+        # Most ingredients left each state was expanded with
+        visited: Dict[Tuple[int, int], int] = {}
+
+        def expand(current: int, current_last: int, left: int) -> None:
+            for ingredient in ingredients:
+                if ingredient == current_last:
+                    continue
+                child = apply(current, ingredient)
+                if visited.get((child, ingredient), -1) >= left - 1:
+                    continue
+                visited[(child, ingredient)] = left - 1
+                if upper_bound(child, left - 1) < cutoff[0]:
+                    continue
+                value = self.value(child)
+                if value > best[0]:
+                    best[0] = value
+                    cutoff[0] = max(value, floor) - BOUND_ROUNDING_SLACK
+                if left > 1:
+                    expand(child, ingredient, left - 1)
+
+        if remaining > 0:
+            expand(state, last, remaining)
+        return best[0]
+
+    def _bound_table(self, remaining: int) -> Tuple[NDArray[float64], List[List[float]], float]:
+        """Returns the per byte bound table and new effect bonus for a remaining depth."""
+        if remaining not in self._bound_tables:
+            # Highest value each effect can be turned into within r transitions
+            while len(self._reach_values) <= remaining:
+                previous = self._reach_values[-1]
+                reached = previous[self._transitions].max(axis=0) if len(self._transitions) else previous
+                self._reach_values.append(maximum(previous, reached))
+
+            # The ingredient added at step j still has remaining - j transitions
+            bonus = 0.0
+            if len(self._effect_given):
+                for step in range(1, remaining + 1):
+                    bonus += float(self._reach_values[remaining - step][self._effect_given].max())
+
+            table = _byte_sums(self._reach_values[remaining], self.n_bytes)
+            self._bound_tables[remaining] = (table, table.tolist(), bonus)
+        return self._bound_tables[remaining]
+
+def get_bitset_tables(ingredients_file_path: str, effects_file_path: str) -> BitsetTables:
+    """
+    Returns the bitset tables of the compiled catalog of a pair of files,
+    built once per file version through the shared catalog cache.
+
+    Raises
+    ------
+    See catalog.get_compiled_catalog and BitsetTables.
+
+    Returns
+    -------
+    BitsetTables
+        Shared tables, must not be modified.
+    """
+    compiled = get_compiled_catalog(ingredients_file_path, effects_file_path)
+    return util.CATALOG_CACHE.get(
+        'bitset_tables',
+        (ingredients_file_path, effects_file_path),
+        lambda *_: BitsetTables(compiled)
+    )
+
+def _byte_sums(values: NDArray, n_bytes: int) -> NDArray[float64]:
+    """
+    Returns a table of shape (n_bytes, 256) holding, for every byte position
+    and byte value, the sum of the per effect values of the bits set in it.
+    """
+    padded = zeros(n_bytes * 8, dtype=float64)
+    padded[:len(values)] = values
+    byte_bits = (arange(256)[:, None] >> arange(8)[None, :]) & 1 == 1
+    table = zeros((n_bytes, 256), dtype=float64)
+    for byte in range(n_bytes):
+        for bit in range(8):
+            table[byte] += where(byte_bits[:, bit], padded[byte * 8 + bit], 0.0)
+    return table
+
+def effects_to_mask(effects: Iterable[int]) -> int:
+    """Returns the bitmask of a collection of effect IDs."""
+    mask = 0
+    for effect in effects:
+        mask |= 1 << int(effect)
+    return mask
+
+def mask_to_effects(state: int) -> Tuple[int, ...]:
+    """Returns the effect IDs of a bitmask in ascending order."""
+    state = int(state)
+    return tuple(effect for effect in range(state.bit_length()) if state >> effect & 1)
+
+def unique_pairs(states: NDArray[uint64], lasts: NDArray[int64]) -> NDArray[int64]:
+    """
+    Returns the indices of the first occurrence of every distinct
+    (state, last ingredient) pair, in ascending order.
+
+    Parameters
+    ----------
+    states : NDArray[uint64]
+        Effect sets as bitmasks.
+    lasts : NDArray[int64]
+        Last ingredient added to each state.
+
+    Returns
+    -------
+    NDArray[int64]
+        Indices into states and lasts.
+    """
+    if len(states) == 0:
+        return zeros(0, dtype=int64)
+
+    # Pack both into one key when they fit in 64 bits, which sorts faster
+    last_bits = int(lasts.max() + 1).bit_length()
+    if int(bitwise_or.reduce(states)).bit_length() + last_bits <= 64 and lasts.min() >= -1:
+        keys = (states << uint64(last_bits)) | (lasts + 1).astype(uint64)
+        _, first = unique(keys, return_index=True)
+        first.sort()
+        return first.astype(int64)
+
+    # A stable sort keeps the earliest index first within every group
+    order = lexsort((lasts, states))
+    sorted_states, sorted_lasts = states[order], lasts[order]
+    starts = concatenate((
+        [True],
+        (sorted_states[1:] != sorted_states[:-1]) | (sorted_lasts[1:] != sorted_lasts[:-1])
+    ))
+    first = order[starts]
+    first.sort()
+    return first.astype(int64)
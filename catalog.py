@@ -0,0 +1,399 @@
+import util
+
+from numpy import (
+    arange, append, bool_, concatenate, flatnonzero, float32, float64, ones, round, sort, uint16, unique, where, zeros
+)
+from numpy.typing import NDArray
+from typing import Dict, List, Tuple, Union
+
+class TransitionTable:
+    """
+    Dense compiled form of an ingredient adjacency list.
+
+    Row i of transitions maps every effect ID to the effect it becomes when
+    ingredient i is mixed in, and is the identity wherever the ingredient has no
+    replacement rule. Rules are folded into the row in the order they appear in
+    the file, so an effect rewritten by one rule and then matched by a later rule
+    of the same ingredient ends up exactly where Mix.add_ingredient used to put
+    it. Applying an ingredient to an effect array is then a single gather.
+
+    Attributes
+    ----------
+    names : List[str]
+        Name of each ingredient, empty for IDs missing from the file.
+    transitions : NDArray[uint16]
+        Lookup table of shape (n_ingredients, n_effects).
+    effect_given : NDArray[uint16]
+        Effect added by each ingredient.
+    valid : NDArray[bool_]
+        Whether each ingredient ID exists in the file.
+    """
+    def __init__(
+        self,
+        adjacency_lists: Dict[str, List[Tuple[Union[uint16, str], uint16]]],
+        n_effects: Union[int, None] = None
+    ) -> None:
+        """
+        __init__ (dunder method)
+
+        Compiles the adjacency lists returned by util.get_ingredient_adjacency_lists.
+
+        Parameters
+        ----------
+        adjacency_lists : Dict[str, List[Tuple[uint16 | str, uint16]]]
+            Adjacency lists keyed by ingredient ID.
+        n_effects : int | None
+            Number of effect columns. Defaults to one more than the largest
+            effect ID referenced by the adjacency lists.
+
+        Raises
+        ------
+        ValueError
+            If an ingredient ID is not an integer, or n_effects is too small for
+            the effects referenced by the adjacency lists.
+        """
+        ids = [int(ingredient) for ingredient in adjacency_lists.keys()]
+        referenced = [0]
+        for rules in adjacency_lists.values():
+            referenced.append(int(rules[0][1]))
+            for source, target in rules[1:]:
+                referenced.extend((int(source), int(target)))
+
+        width = max(referenced) + 1
+        if n_effects is None:
+            n_effects = width
+        elif n_effects < width:
+            raise ValueError(
+                f"n_effects must be at least {width} for this ingredient file."
+            )
+        n_ingredients = max(ids) + 1 if ids else 0
+
+        self.names : List[str] = [''] * n_ingredients
+        self.transitions : NDArray[uint16] = (
+            arange(n_effects, dtype=uint16)[None, :].repeat(n_ingredients, axis=0)
+        )
+        self.effect_given : NDArray[uint16] = zeros(n_ingredients, dtype=uint16)
+        self.valid : NDArray[bool_] = zeros(n_ingredients, dtype=bool_)
+
+        for ingredient, rules in zip(ids, adjacency_lists.values()):
+            self.names[ingredient] = rules[0][0]
+            self.effect_given[ingredient] = rules[0][1]
+            self.valid[ingredient] = True
+
+            # Fold the rules in order so chained replacements compose
+            row = self.transitions[ingredient]
+            for source, target in rules[1:]:
+                row[row == source] = target
+
+    @property
+    def n_ingredients(self) -> int:
+        return self.transitions.shape[0]
+
+    @property
+    def n_effects(self) -> int:
+        return self.transitions.shape[1]
+
+    def has_ingredient(self, ingredient: uint16) -> bool:
+        """Returns whether the ingredient ID exists in the compiled file."""
+        return 0 <= int(ingredient) < self.n_ingredients and bool(self.valid[int(ingredient)])
+
+    def apply(self, ingredient: uint16, effects: NDArray[uint16]) -> NDArray[uint16]:
+        """
+        Returns the effects after mixing in an ingredient: every effect is
+        replaced through the ingredient's row and the effect it gives is
+        appended.
+
+        Parameters
+        ----------
+        ingredient : uint16
+            A valid ingredient ID.
+        effects : NDArray[uint16]
+            Current effects, each less than n_effects.
+
+        Returns
+        -------
+        NDArray[uint16]
+            New effect array.
+        """
+        return append(self.transitions[ingredient][effects], self.effect_given[ingredient])
+
+    def widen(self, n_effects: int) -> 'TransitionTable':
+        """Returns a copy with identity columns added up to n_effects."""
+        widened = TransitionTable.__new__(TransitionTable)
+        widened.names = list(self.names)
+        widened.effect_given = self.effect_given.copy()
+        widened.valid = self.valid.copy()
+        extra = arange(self.n_effects, n_effects, dtype=uint16)[None, :].repeat(self.n_ingredients, axis=0)
+        widened.transitions = concatenate((self.transitions, extra), axis=1)
+        return widened
+
+class EffectTable:
+    """
+    Dense compiled form of the effect details.
+
+    Attributes
+    ----------
+    names : List[str]
+        Name of each effect, empty for IDs missing from the file.
+    values : NDArray[float32]
+        Multiplier value of each effect, zero for IDs missing from the file.
+    valid : NDArray[bool_]
+        Whether each effect ID exists in the file.
+    """
+    def __init__(
+        self,
+        effect_details: Dict[str, Dict[str, Union[str, float32]]],
+        n_effects: Union[int, None] = None
+    ) -> None:
+        """
+        __init__ (dunder method)
+
+        Compiles the effect details returned by util.get_effect_details.
+
+        Parameters
+        ----------
+        effect_details : Dict[str, Dict[str, str | float32]]
+            Effect details keyed by effect ID.
+        n_effects : int | None
+            Number of entries. Defaults to one more than the largest effect ID.
+
+        Raises
+        ------
+        ValueError
+            If an effect ID is not an integer, or n_effects is too small.
+        """
+        ids = [int(effect) for effect in effect_details.keys()]
+        width = max(ids) + 1 if ids else 0
+        if n_effects is None:
+            n_effects = width
+        elif n_effects < width:
+            raise ValueError(
+                f"n_effects must be at least {width} for this effect file."
+            )
+
+        self.names : List[str] = [''] * n_effects
+        self.values : NDArray[float32] = zeros(n_effects, dtype=float32)
+        self.valid : NDArray[bool_] = zeros(n_effects, dtype=bool_)
+
+        for effect, details in zip(ids, effect_details.values()):
+            self.names[effect] = details['name']
+            self.values[effect] = details['value']
+            self.valid[effect] = True
+
+    @property
+    def n_effects(self) -> int:
+        return self.values.shape[0]
+
+    def has_effect(self, effect: uint16) -> bool:
+        """Returns whether the effect ID exists in the compiled file."""
+        return 0 <= int(effect) < self.n_effects and bool(self.valid[int(effect)])
+
+    def multiplier(self, effects: NDArray[uint16]) -> float32:
+        """
+        Returns the multiplier of an effect array, see distinct_multiplier.
+        Every effect must be valid.
+        """
+        return distinct_multiplier(self.values, effects)
+
+    def widen(self, n_effects: int) -> 'EffectTable':
+        """Returns a copy with invalid zero-valued entries added up to n_effects."""
+        widened = EffectTable.__new__(EffectTable)
+        extra = n_effects - self.n_effects
+        widened.names = self.names + [''] * extra
+        widened.values = concatenate((self.values, zeros(extra, dtype=float32)))
+        widened.valid = concatenate((self.valid, zeros(extra, dtype=bool_)))
+        return widened
+
+class CompiledCatalog:
+    """
+    Ingredient and effect tables compiled from one pair of catalog files and
+    widened to a common number of effect columns. This is the only data the
+    search code needs, and it is cheap to pickle.
+
+    Attributes
+    ----------
+    ingredient_names : List[str]
+        Name of each ingredient ID.
+    effect_names : List[str]
+        Name of each effect ID.
+    transitions : NDArray[uint16]
+        Lookup table of shape (n_ingredients, n_effects), see TransitionTable.
+    effect_given : NDArray[uint16]
+        Effect added by each ingredient.
+    effect_values : NDArray[float32]
+        Multiplier value of each effect.
+    ingredient_valid : NDArray[bool_]
+        Whether each ingredient ID exists.
+    effect_valid : NDArray[bool_]
+        Whether each effect ID exists.
+    ingredients : NDArray[uint16]
+        The valid ingredient IDs in ascending order.
+    transition_valid : NDArray[bool_]
+        Whether the effect each effect turns into per ingredient exists.
+    """
+    def __init__(self, transition_table: TransitionTable, effect_table: EffectTable) -> None:
+        n_effects = max(transition_table.n_effects, effect_table.n_effects)
+        if transition_table.n_effects < n_effects:
+            transition_table = transition_table.widen(n_effects)
+        if effect_table.n_effects < n_effects:
+            effect_table = effect_table.widen(n_effects)
+
+        self.ingredient_names : List[str] = transition_table.names
+        self.effect_names : List[str] = effect_table.names
+        self.transitions : NDArray[uint16] = transition_table.transitions
+        self.effect_given : NDArray[uint16] = transition_table.effect_given
+        self.effect_values : NDArray[float32] = effect_table.values
+        self.ingredient_valid : NDArray[bool_] = transition_table.valid
+        self.effect_valid : NDArray[bool_] = effect_table.valid
+        self.ingredients : NDArray[uint16] = flatnonzero(self.ingredient_valid).astype(uint16)
+        self.transition_valid : NDArray[bool_] = self.effect_valid[self.transitions]
+
+    @property
+    def n_ingredients(self) -> int:
+        return self.transitions.shape[0]
+
+    @property
+    def n_effects(self) -> int:
+        return self.transitions.shape[1]
+
+def round_multiplier(total: float) -> float32:
+    """Rounds a summed multiplier to two decimals the way Mix.get_multiplier does."""
+    return float32(round(total, 2))
+
+def distinct_multiplier(values: NDArray, effects: NDArray[uint16]) -> float32:
+    """
+    Returns the multiplier of an effect array, the scoring rule of every part
+    of the library: as in the game an effect held twice only counts once, so
+    the value of every distinct effect is summed in ascending effect ID and
+    rounded with round_multiplier. This is the same sum bitset.BitsetTables
+    takes over an effect set.
+
+    Parameters
+    ----------
+    values : NDArray
+        Value of every effect ID.
+    effects : NDArray[uint16]
+        Effects of the mix, possibly repeated.
+
+    Returns
+    -------
+    float32
+        Multiplier rounded to two decimals.
+    """
+    return round_multiplier(sum(values[unique(effects)].astype(float64).tolist()))
+
+def distinct_multipliers(values: NDArray, effects: NDArray) -> NDArray[float32]:
+    """
+    Returns distinct_multiplier of every row of an effect matrix at once,
+    summed in the same order so the rounding matches.
+
+    Parameters
+    ----------
+    values : NDArray
+        Value of every entry the matrix can hold, including any padding.
+    effects : NDArray
+        Effects of shape (N, L), possibly repeated within a row.
+
+    Returns
+    -------
+    NDArray[float32]
+        Multiplier of every row rounded to two decimals.
+    """
+    ascending = sort(effects, axis=1)
+    counted = ones(ascending.shape, dtype=bool_)
+    counted[:, 1:] = ascending[:, 1:] != ascending[:, :-1]
+    row_values = values.astype(float64)[ascending]
+    totals = zeros(ascending.shape[0], dtype=float64)
+    for column in range(ascending.shape[1]):
+        totals += where(counted[:, column], row_values[:, column], 0.0)
+    return round(totals, 2).astype(float32)
+
+def get_transition_table(file_path: str, binary_cache: bool = False) -> TransitionTable:
+    """
+    Returns the compiled transition table of an ingredients file, built once
+    per file version through the shared catalog cache.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the ingredients JSON file.
+    binary_cache : bool
+        Parse through the binary cache next to the JSON file, see
+        util.get_ingredient_adjacency_lists.
+
+    Raises
+    ------
+    See util.get_ingredient_adjacency_lists.
+
+    Returns
+    -------
+    TransitionTable
+        Shared compiled table, must not be modified.
+    """
+    adjacency_lists = util.get_cached_ingredient_adjacency_lists(file_path, binary_cache)
+    return util.CATALOG_CACHE.get(
+        'transition_table', (file_path,), lambda _: TransitionTable(adjacency_lists)
+    )
+
+def get_effect_table(file_path: str, binary_cache: bool = False) -> EffectTable:
+    """
+    Returns the compiled effect table of an effects file, built once per file
+    version through the shared catalog cache.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the effects JSON file.
+    binary_cache : bool
+        Parse through the binary cache next to the JSON file, see
+        util.get_effect_details.
+
+    Raises
+    ------
+    See util.get_effect_details.
+
+    Returns
+    -------
+    EffectTable
+        Shared compiled table, must not be modified.
+    """
+    effect_details = util.get_cached_effect_details(file_path, binary_cache)
+    return util.CATALOG_CACHE.get(
+        'effect_table', (file_path,), lambda _: EffectTable(effect_details)
+    )
+
+def get_compiled_catalog(
+    ingredients_file_path: str,
+    effects_file_path: str,
+    binary_cache: bool = False
+) -> CompiledCatalog:
+    """
+    Returns the compiled catalog for a pair of ingredient and effect files,
+    built once per file version through the shared catalog cache.
+
+    Parameters
+    ----------
+    ingredients_file_path : str
+        Path to the ingredients JSON file.
+    effects_file_path : str
+        Path to the effects JSON file.
+    binary_cache : bool
+        Parse both files through their binary caches, see
+        util.get_ingredient_adjacency_lists.
+
+    Raises
+    ------
+    See util.get_ingredient_adjacency_lists and util.get_effect_details.
+
+    Returns
+    -------
+    CompiledCatalog
+        Shared compiled catalog, must not be modified.
+    """
+    transition_table = get_transition_table(ingredients_file_path, binary_cache)
+    effect_table = get_effect_table(effects_file_path, binary_cache)
+    return util.CATALOG_CACHE.get(
+        'compiled_catalog',
+        (ingredients_file_path, effects_file_path),
+        lambda *_: CompiledCatalog(transition_table, effect_table)
+    )
@@ -0,0 +1,232 @@
+from bitset import BitsetTables, mask_to_effects, unique_pairs
+from catalog import CompiledCatalog
+from mix import MAX_INGREDIENTS
+from numpy import arange, array, concatenate, float32, full, int64, lexsort, tile, uint64, unique, vstack
+from numpy.typing import NDArray
+from search import SearchResult, _check_search_arguments
+from typing import List, NamedTuple, Tuple
+
+class FrontierLayer(NamedTuple):
+    """
+    Every distinct (effects, last ingredient) state reached with one number
+    of ingredients.
+
+    States are ordered like the lexicographically smallest order reaching
+    each of them, and that order is the one the back-pointers rebuild.
+
+    Attributes
+    ----------
+    states : NDArray[uint64]
+        Effect sets as bitmasks.
+    lasts : NDArray[int64]
+        Last ingredient added to each state.
+    parents : NDArray[int64]
+        Index of the state each one was reached from in the previous layer.
+    multipliers : NDArray[float32]
+        Multiplier of each state.
+    """
+    states: NDArray[uint64]
+    lasts: NDArray[int64]
+    parents: NDArray[int64]
+    multipliers: NDArray[float32]
+
+class Frontier:
+    """
+    Result of expand_frontier: the layer of distinct states reached with
+    every number of ingredients, from the empty mix at depth 0.
+
+    Attributes
+    ----------
+    layers : List[FrontierLayer]
+        Layer d holds the states reached with exactly d ingredients.
+    """
+    def __init__(self, layers: List[FrontierLayer]) -> None:
+        self.layers : List[FrontierLayer] = layers
+
+    @property
+    def depth(self) -> int:
+        """Largest number of ingredients expanded."""
+        return len(self.layers) - 1
+
+    @property
+    def n_states(self) -> int:
+        """Number of (effects, last ingredient) states over every layer."""
+        return sum(len(layer.states) for layer in self.layers)
+
+    def order(self, depth: int, index: int) -> Tuple[int, ...]:
+        """
+        Follows the back-pointers of a state to the empty mix.
+
+        Parameters
+        ----------
+        depth : int
+            Layer of the state.
+        index : int
+            Index of the state in its layer.
+
+        Returns
+        -------
+        Tuple[int, ...]
+            Lexicographically smallest order reaching the state.
+        """
+        order = []
+        while depth > 0:
+            layer = self.layers[depth]
+            order.append(int(layer.lasts[index]))
+            index = int(layer.parents[index])
+            depth -= 1
+        return tuple(reversed(order))
+
+    def best_per_depth(self) -> List[SearchResult]:
+        """
+        Returns the best mix with exactly d ingredients for every depth d from
+        1 on, ties broken by the lexicographically smaller order.
+        """
+        results = []
+        for depth in range(1, len(self.layers)):
+            layer = self.layers[depth]
+            # argmax returns the first best index, which has the smallest order
+            index = int(layer.multipliers.argmax())
+            results.append(SearchResult(
+                self.order(depth, index), mask_to_effects(layer.states[index]), layer.multipliers[index]
+            ))
+        return results
+
+    def best_mixes(self, top_k: int = 10) -> List[SearchResult]:
+        """
+        Returns the top_k distinct effect sets over every depth, each with the
+        shortest order producing it, ranked like search.find_best_mixes.
+
+        Parameters
+        ----------
+        top_k : int
+            Number of results to return.
+
+        Raises
+        ------
+        ValueError
+            If top_k is less than 1.
+
+        Returns
+        -------
+        List[SearchResult]
+            Best mixes, highest multiplier first. Ties are broken by shorter
+            and then lexicographically smaller order.
+        """
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1.")
+        layers = self.layers[1:]
+        if not layers:
+            return []
+
+        states = concatenate([layer.states for layer in layers])
+        multipliers = concatenate([layer.multipliers for layer in layers])
+        depths = concatenate([full(len(layer.states), depth) for depth, layer in enumerate(layers, start=1)])
+        indices = concatenate([arange(len(layer.states)) for layer in layers])
+
+        # Keep the shallowest and then smallest order of every effect set
+        by_state = lexsort((indices, depths, states))
+        _, first = unique(states[by_state], return_index=True)
+        kept = by_state[first]
+
+        # Only orders tying with the top_k multipliers need rebuilding
+        kept_multipliers = multipliers[kept]
+        threshold = kept_multipliers[kept_multipliers.argsort()[::-1][:top_k]].min()
+        candidates = [
+            (kept_multipliers[i], self.order(int(depths[j]), int(indices[j])), int(states[j]))
+            for i, j in enumerate(kept.tolist()) if kept_multipliers[i] >= threshold
+        ]
+        candidates.sort(key=lambda item: (-item[0], len(item[1]), item[1]))
+        return [
+            SearchResult(order, mask_to_effects(state), multiplier)
+            for multiplier, order, state in candidates[:top_k]
+        ]
+
+def expand_children(
+    tables: BitsetTables,
+    states: NDArray[uint64],
+    lasts: NDArray[int64],
+    ingredients: NDArray[int64]
+) -> Tuple[NDArray[uint64], NDArray[int64], NDArray[int64]]:
+    """
+    Mixes every ingredient into every state at once, dropping children that
+    repeat their parent's last ingredient.
+
+    Children are laid out parent by parent and ingredient by ingredient
+    within a parent, see expand_frontier.
+
+    Parameters
+    ----------
+    tables : BitsetTables
+        Tables of the catalog, see bitset.BitsetTables.
+    states : NDArray[uint64]
+        Effect sets of the parents as bitmasks.
+    lasts : NDArray[int64]
+        Last ingredient added to each parent, -1 for none.
+    ingredients : NDArray[int64]
+        Ingredient IDs to mix in.
+
+    Returns
+    -------
+    Tuple[NDArray[uint64], NDArray[int64], NDArray[int64]]
+        Effect sets, last ingredients and parent indices of the children.
+    """
+    # Row i holds every parent mixed with ingredient i, read column by column
+    child_states = vstack([tables.apply_many(states, int(i)) for i in ingredients]).T.ravel()
+    child_lasts = tile(ingredients, len(states))
+    parents = arange(len(states), dtype=int64).repeat(len(ingredients))
+    allowed = child_lasts != lasts[parents]
+    return child_states[allowed], child_lasts[allowed], parents[allowed]
+
+def expand_frontier(compiled: CompiledCatalog, depth: int = MAX_INGREDIENTS) -> Frontier:
+    """
+    Expands every distinct effect state reachable within depth ingredients
+    one layer at a time, with numpy instead of one mix at a time.
+
+    The whole frontier of a depth is held as arrays of effect masks and last
+    ingredients (see bitset.BitsetTables). Every ingredient is applied to all
+    of it at once, children repeating their parent's last ingredient are
+    dropped, and children reaching the same (effects, last ingredient) state
+    are merged with numpy.unique on keys packing both into one integer, see
+    bitset.unique_pairs. Each kept state remembers the state it came from, so
+    one order per state can be rebuilt without storing any orders.
+
+    Children are laid out parent by parent and ingredient by ingredient
+    within a parent, so when the previous layer is ordered by smallest order
+    the first child reaching a state is also the smallest order reaching it,
+    and every layer stays ordered the same way. Effects are tracked as sets
+    like in search.find_best_mixes.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to expand, see catalog.get_compiled_catalog.
+    depth : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+
+    Raises
+    ------
+    ValueError
+        If depth is out of range.
+    InvalidEffectException
+        If an ingredient can produce an effect missing from the effects file.
+
+    Returns
+    -------
+    Frontier
+        Layers of distinct states with their multipliers and back-pointers.
+    """
+    _check_search_arguments(compiled, depth, 1)
+    tables = BitsetTables(compiled)
+    ingredients = compiled.ingredients.astype(int64)
+
+    states = array([0], dtype=uint64)
+    lasts = array([-1], dtype=int64)
+    layers = [FrontierLayer(states, lasts, array([-1], dtype=int64), tables.multipliers(states))]
+    for _ in range(depth):
+        child_states, child_lasts, parents = expand_children(tables, states, lasts, ingredients)
+        first = unique_pairs(child_states, child_lasts)
+        states, lasts = child_states[first], child_lasts[first]
+        layers.append(FrontierLayer(states, lasts, parents[first], tables.multipliers(states)))
+
+    return Frontier(layers)
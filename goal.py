@@ -0,0 +1,406 @@
+from bitset import BitsetTables, effects_to_mask, mask_to_effects, unique_pairs
+from catalog import CompiledCatalog
+from frontier import Frontier, FrontierLayer, expand_children, expand_frontier
+from heapq import heappop, heappush
+from mix import MAX_INGREDIENTS, InvalidEffectException, InvalidIngredientException
+from numpy import array, flatnonzero, float32, int64, isin, uint64
+from search import SearchStats, _reachable_effects
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple, Union
+
+class GoalResult(NamedTuple):
+    """
+    A mix reaching a required set of effects.
+
+    Attributes
+    ----------
+    order : Tuple[int, ...]
+        Ingredient IDs in the order they are added.
+    effects : Tuple[int, ...]
+        Effect IDs of the finished mix in ascending order.
+    multiplier : float32
+        Multiplier of the finished mix.
+    cost : float
+        Total cost of the ingredients, or the number of ingredients when no
+        costs were given.
+    """
+    order: Tuple[int, ...]
+    effects: Tuple[int, ...]
+    multiplier: float32
+    cost: float
+
+def find_recipe_with_effects(
+    compiled: CompiledCatalog,
+    required_effects: Iterable[int],
+    costs: Union[Dict[int, float], None] = None,
+    max_depth: int = MAX_INGREDIENTS
+) -> Union[GoalResult, None]:
+    """
+    Finds the cheapest ingredient order whose finished mix contains every
+    required effect.
+
+    Without costs every ingredient costs 1 and the shortest order is
+    returned. The states are then expanded a layer at a time like
+    frontier.expand_frontier, whose layers are ordered by smallest order, so
+    the first state of the first layer holding the required effects is the
+    answer. That stops at the answer's depth, but a target that needs all
+    MAX_INGREDIENTS ingredients still expands every layer, a few seconds on
+    the shipped catalog.
+
+    With costs the search is A* over mix states (effect set plus last
+    ingredient), so each reachable state is expanded once, from the cheapest
+    order reaching it, and only expanded again from a costlier order that is
+    shorter and so still has room to grow under max_depth. Every missing
+    effect has to be produced by a later ingredient, either given by it or
+    turned into from another effect, so the heuristic charges the most
+    expensive of the cheapest ingredients producing each missing effect,
+    which never overestimates. Targets of many effects with only a few
+    ingredients that produce them cheaply can still take tens of seconds.
+    Orders of equal cost are broken by length and then lexicographically.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to search, see catalog.get_compiled_catalog.
+    required_effects : Iterable[int]
+        Effect IDs the finished mix must contain.
+    costs : Dict[int, float] | None
+        Non-negative cost of every ingredient ID. Defaults to 1 each.
+    max_depth : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+
+    Raises
+    ------
+    ValueError
+        If max_depth is out of range, or costs are missing or negative.
+    InvalidEffectException
+        If a required effect is missing from the effects file.
+    InvalidIngredientException
+        If costs are given for an ingredient missing from the catalog.
+
+    Returns
+    -------
+    GoalResult | None
+        Cheapest mix found, or None when no order of at most max_depth
+        ingredients reaches the required effects.
+    """
+    if not 1 <= max_depth <= MAX_INGREDIENTS:
+        raise ValueError(f"max_depth must be between 1 and {MAX_INGREDIENTS}.")
+    required = sorted({int(effect) for effect in required_effects})
+    for effect in required:
+        if not (0 <= effect < compiled.n_effects and compiled.effect_valid[effect]):
+            raise InvalidEffectException(effect)
+
+    ingredients: List[int] = compiled.ingredients.tolist()
+    ingredient_costs = get_ingredient_costs(compiled, costs)
+    tables = BitsetTables(compiled)
+    target = effects_to_mask(required)
+
+    # Nothing can be found if a required effect is never produced
+    reachable = _reachable_effects(compiled)
+    if not set(required).issubset(reachable):
+        return None
+
+    if costs is None:
+        return _find_shortest_recipe(compiled, tables, target, max_depth)
+
+    # Cheapest ingredient giving each effect or turning another effect into it
+    producer_costs: Dict[int, float] = {}
+    for ingredient in ingredients:
+        ingredient_cost = ingredient_costs[ingredient]
+        produced = {int(compiled.effect_given[ingredient])} | {
+            int(compiled.transitions[ingredient, effect]) for effect in reachable
+            if compiled.transitions[ingredient, effect] != effect
+        }
+        for effect in produced:
+            producer_costs[effect] = min(producer_costs.get(effect, ingredient_cost), ingredient_cost)
+    key_shift = max(compiled.n_ingredients, 1).bit_length()
+
+    def estimate(state: int) -> float:
+        return max((producer_costs[effect] for effect in mask_to_effects(target & ~state)), default=0.0)
+
+    # Entries are (cost + estimate, cost, length, order, state)
+    frontier: List[Tuple[float, float, int, Tuple[int, ...], int]] = [(estimate(0), 0.0, 0, (), 0)]
+    # Shortest length each (effects, last ingredient) state was expanded at
+    expanded: Dict[int, int] = {}
+
+    while frontier:
+        _, cost, length, order, state = heappop(frontier)
+        if state & target == target:
+            return GoalResult(order, mask_to_effects(state), tables.multiplier(state), cost)
+
+        # Skip states already expanded from a cheaper order at most as long
+        last = order[-1] if order else -1
+        key = (state << key_shift) | (last + 1)
+        if expanded.get(key, max_depth + 1) <= length:
+            continue
+        expanded[key] = length
+        if length == max_depth:
+            continue
+
+        for ingredient in ingredients:
+            if ingredient == last:
+                continue
+            child = tables.apply(state, ingredient)
+            child_cost = cost + ingredient_costs[ingredient]
+            if expanded.get((child << key_shift) | (ingredient + 1), max_depth + 1) <= length + 1:
+                continue
+            heappush(
+                frontier,
+                (child_cost + estimate(child), child_cost, length + 1, order + (ingredient,), child)
+            )
+
+    return None
+
+def _find_shortest_recipe(
+    compiled: CompiledCatalog,
+    tables: BitsetTables,
+    target: int,
+    max_depth: int
+) -> Union[GoalResult, None]:
+    """Expands layers like frontier.expand_frontier until one holds the target, see find_recipe_with_effects."""
+    if target == 0:
+        return GoalResult((), (), tables.multiplier(0), 0.0)
+
+    ingredients = compiled.ingredients.astype(int64)
+    states = array([0], dtype=uint64)
+    lasts = array([-1], dtype=int64)
+    layers = [FrontierLayer(states, lasts, array([-1], dtype=int64), tables.multipliers(states))]
+    mask = uint64(target)
+    for depth in range(1, max_depth + 1):
+        child_states, child_lasts, parents = expand_children(tables, states, lasts, ingredients)
+        first = unique_pairs(child_states, child_lasts)
+        states, lasts = child_states[first], child_lasts[first]
+        layers.append(FrontierLayer(states, lasts, parents[first], tables.multipliers(states)))
+
+        # The first match has the smallest order of the layer
+        matches = flatnonzero(states & mask == mask)
+        if len(matches):
+            state = int(states[matches[0]])
+            order = Frontier(layers).order(depth, int(matches[0]))
+            return GoalResult(order, mask_to_effects(state), tables.multiplier(state), float(depth))
+    return None
+
+def find_recipe_with_exact_effects(
+    compiled: CompiledCatalog,
+    effects: Iterable[int],
+    max_depth: int = MAX_INGREDIENTS,
+    stats: Union[SearchStats, None] = None
+) -> Union[GoalResult, None]:
+    """
+    Finds the shortest ingredient order whose finished mix holds exactly the
+    given effects, no more and no fewer.
+
+    The search meets in the middle. The first half of the orders is expanded
+    forward from the empty mix with frontier.expand_frontier, and the second
+    half backward from the target, using an inverse of the transition table
+    that lists for every ingredient and effect which effects turn into it. A
+    state precedes a state S through ingredient i when i gives an effect of S
+    and every other effect of S is what i turns some of its effects into,
+    which inverting the ingredient's row enumerates directly. The two halves
+    are joined on a hash index of the backward states, allowing the join
+    whenever the forward half does not end with the ingredient the backward
+    half starts with. Each side only explores about half the depth, instead
+    of every order up to max_depth. Effects are tracked as sets like in
+    search.find_best_mixes, and orders of equal length are broken
+    lexicographically.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to search, see catalog.get_compiled_catalog.
+    effects : Iterable[int]
+        Effect IDs the finished mix must hold exactly.
+    max_depth : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+    stats : SearchStats | None
+        When given, nodes_expanded is set to the states both halves
+        explored and brute_force_nodes to the orders a forward search would.
+
+    Raises
+    ------
+    ValueError
+        If max_depth is out of range.
+    InvalidEffectException
+        If a target effect is missing from the effects file, or an
+        ingredient can produce one.
+
+    Returns
+    -------
+    GoalResult | None
+        Shortest mix found with its length as cost, or None when no order of
+        at most max_depth ingredients ends in exactly the effects.
+    """
+    if not 1 <= max_depth <= MAX_INGREDIENTS:
+        raise ValueError(f"max_depth must be between 1 and {MAX_INGREDIENTS}.")
+    target_effects = sorted({int(effect) for effect in effects})
+    for effect in target_effects:
+        if not (0 <= effect < compiled.n_effects and compiled.effect_valid[effect]):
+            raise InvalidEffectException(effect)
+
+    ingredients: List[int] = compiled.ingredients.tolist()
+    reachable = _reachable_effects(compiled)
+    target = effects_to_mask(target_effects)
+    forward_depth = (max_depth + 1) // 2
+    backward_depth = max_depth - forward_depth
+
+    forward = expand_frontier(compiled, forward_depth)
+    backward = _expand_backward(compiled, ingredients, reachable, target, backward_depth, max_depth)
+
+    if stats is not None:
+        n = len(ingredients)
+        stats.nodes_expanded = forward.n_states + sum(len(layer) for layer in backward)
+        stats.brute_force_nodes = sum(n * (n - 1) ** (length - 1) for length in range(1, max_depth + 1))
+
+    for length in range(max_depth + 1):
+        matches: List[Tuple[int, ...]] = []
+        for forward_length in range(max(0, length - len(backward) + 1), min(forward_depth, length) + 1):
+            backward_layer = backward[length - forward_length]
+            layer = forward.layers[forward_length]
+
+            # Hash index of the backward states, looked up by every forward state
+            index: Dict[int, List[Tuple[int, int]]] = {}
+            for position, (state, first, _) in enumerate(backward_layer):
+                index.setdefault(state, []).append((first, position))
+            candidates = isin(layer.states, list(index)).nonzero()[0].tolist()
+
+            for forward_index in candidates:
+                last = int(layer.lasts[forward_index])
+                for first, position in index[int(layer.states[forward_index])]:
+                    if first != last or first < 0:
+                        matches.append(
+                            forward.order(forward_length, forward_index) +
+                            _suffix(backward, length - forward_length, position)
+                        )
+        if matches:
+            order = min(matches)
+            tables = BitsetTables(compiled)
+            return GoalResult(order, mask_to_effects(target), tables.multiplier(target), float(len(order)))
+
+    return None
+
+def _expand_backward(
+    compiled: CompiledCatalog,
+    ingredients: List[int],
+    reachable: Set[int],
+    target: int,
+    depth: int,
+    max_depth: int
+) -> List[List[Tuple[int, int, int]]]:
+    """
+    Expands the states leading to target within depth ingredients. Layer j
+    holds (state, ingredient added to it next, index in layer j - 1 of the
+    state it leads to) for every distinct (state, ingredient) pair. Every
+    ingredient adds at most one effect, so a state j ingredients before the
+    end of a max_depth order holds at most max_depth - j effects and larger
+    ones are never generated.
+
+    Each layer is sorted by the suffix its entries lead to, so walking the
+    previous layer in order keeps the lexicographically smallest suffix of
+    every (state, ingredient) pair.
+    """
+    # Every nonempty set of reachable effects ingredient i turns into effect s
+    choices: List[List[List[int]]] = []
+    for ingredient in range(compiled.n_ingredients):
+        sources: List[List[int]] = [[] for _ in range(compiled.n_effects)]
+        for effect in sorted(reachable):
+            sources[int(compiled.transitions[ingredient, effect])].append(effect)
+        choices.append([_nonempty_subset_masks(effects) for effects in sources])
+
+    layers: List[List[Tuple[int, int, int]]] = [[(target, -1, -1)]]
+    for step in range(1, depth + 1):
+        seen: Set[Tuple[int, int]] = set()
+        layer: List[Tuple[int, int, int]] = []
+        for position, (state, first, _) in enumerate(layers[-1]):
+            for ingredient in ingredients:
+                if ingredient == first:
+                    continue
+                for predecessor in _predecessors(compiled, choices, state, ingredient, max_depth - step):
+                    if (predecessor, ingredient) not in seen:
+                        seen.add((predecessor, ingredient))
+                        layer.append((predecessor, ingredient, position))
+
+        # Sort by the suffix each entry leads to, the ingredient and then the
+        # position of its already sorted successor
+        layer.sort(key=lambda entry: (entry[1], entry[2]))
+        layers.append(layer)
+    return layers
+
+def _predecessors(
+    compiled: CompiledCatalog,
+    choices: List[List[List[int]]],
+    state: int,
+    ingredient: int,
+    max_effects: int
+) -> List[int]:
+    """Returns every effect set of at most max_effects effects the ingredient turns into state."""
+    given = int(compiled.effect_given[ingredient])
+    if not state >> given & 1:
+        return []
+
+    # Every effect of the state comes from some of the effects turning into
+    # it, except the given effect which may also just have been added
+    partial = [0]
+    for effect in mask_to_effects(state):
+        options = choices[ingredient][effect] + ([0] if effect == given else [])
+        partial = [
+            mask | option for mask in partial for option in options
+            if bin(mask | option).count('1') <= max_effects
+        ]
+        if not partial:
+            break
+    return partial
+
+def _nonempty_subset_masks(effects: List[int]) -> List[int]:
+    """Returns the mask of every nonempty subset of effects."""
+    masks = [0]
+    for effect in effects:
+        masks += [mask | 1 << effect for mask in masks]
+    return masks[1:]
+
+def _suffix(backward: List[List[Tuple[int, int, int]]], step: int, position: int) -> Tuple[int, ...]:
+    """Follows a backward state to the target and returns the ingredients added on the way."""
+    suffix = []
+    while step > 0:
+        _, first, position = backward[step][position]
+        suffix.append(first)
+        step -= 1
+    return tuple(suffix)
+
+def get_ingredient_costs(compiled: CompiledCatalog, costs: Union[Dict[int, float], None]) -> Dict[int, float]:
+    """
+    Returns the cost of every valid ingredient, validating the given costs.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog the costs are for, see catalog.get_compiled_catalog.
+    costs : Dict[int, float] | None
+        Cost of every valid ingredient ID, or None to count every ingredient
+        as 1.
+
+    Raises
+    ------
+    ValueError
+        If a valid ingredient has no cost or a cost is negative.
+    InvalidIngredientException
+        If a cost is given for an ingredient missing from the catalog.
+
+    Returns
+    -------
+    Dict[int, float]
+        Cost of every valid ingredient ID.
+    """
+    if costs is None:
+        return {ingredient: 1.0 for ingredient in compiled.ingredients.tolist()}
+
+    ingredient_costs: Dict[int, float] = {}
+    for ingredient in compiled.ingredients.tolist():
+        if ingredient not in costs:
+            raise ValueError(f"Missing cost for ingredient {ingredient}.")
+        if costs[ingredient] < 0:
+            raise ValueError(f"Negative cost for ingredient {ingredient}.")
+        ingredient_costs[ingredient] = float(costs[ingredient])
+    for ingredient in costs:
+        if not (0 <= int(ingredient) < compiled.n_ingredients and compiled.ingredient_valid[int(ingredient)]):
+            raise InvalidIngredientException(ingredient)
+    return ingredient_costs
@@ -0,0 +1,204 @@
+from catalog import CompiledCatalog
+from math import exp
+from mix import MAX_INGREDIENTS, DuplicateIngredientException, MaximumIngredientsAddedException, MixState
+from numpy import float64
+from random import Random
+from search import SearchResult, SearchStats, _check_search_arguments
+from time import perf_counter
+from typing import List, Tuple, Union
+
+# Moves tried by optimize_mix, each picked with the same probability
+MUTATIONS : Tuple[str, ...] = ('replace', 'insert', 'delete', 'swap')
+
+def optimize_mix(
+    compiled: CompiledCatalog,
+    time_budget: float = 1.0,
+    restarts: int = 4,
+    seed: Union[int, None] = None,
+    max_length: int = MAX_INGREDIENTS,
+    initial_temperature: float = 0.2,
+    max_iterations: Union[int, None] = None,
+    stats: Union[SearchStats, None] = None
+) -> SearchResult:
+    """
+    Looks for a high multiplier ingredient order by simulated annealing,
+    for catalogs too large to search exhaustively.
+
+    Every restart starts from a random order and repeatedly mutates it by
+    replacing, inserting or deleting one ingredient or swapping two. A
+    mutation that raises the multiplier is always kept, and one that lowers
+    it by d is kept with probability exp(-d / T), where the temperature T
+    falls linearly from initial_temperature to 0 over the restart, so the
+    search ends as a hill climb. A temperature of 0 hill climbs throughout.
+
+    Orders are evaluated on a mix.MixState that holds the effects after
+    every step of the current order, and scored like Mix with each distinct
+    effect counted once, so the result is a multiplier the exhaustive
+    searches agree with. Evaluating a mutation pops the state back to the first position
+    it changes and pushes only the ingredients from there on, and a
+    rejected mutation is undone the same way. A mutation the state refuses
+    with DuplicateIngredientException or MaximumIngredientsAddedException is
+    skipped.
+
+    The time budget is shared evenly between the restarts, so the answer
+    comes back within about time_budget seconds however large the catalog.
+    With max_iterations the temperature falls over the iterations instead of
+    the time, so the same seed gives the same result on every run that is
+    not cut short by the time budget.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to search, see catalog.get_compiled_catalog.
+    time_budget : float
+        Seconds to search for.
+    restarts : int
+        Number of independent runs from a random order.
+    seed : int | None
+        Seed of the random number generator. Defaults to a random seed.
+    max_length : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+    initial_temperature : float
+        Temperature every restart starts at, in multiplier units.
+    max_iterations : int | None
+        Mutations tried per restart, in addition to the time budget.
+    stats : SearchStats | None
+        When given, nodes_expanded is set to the number of mutations
+        evaluated.
+
+    Raises
+    ------
+    ValueError
+        If an argument is out of range.
+    InvalidEffectException
+        If an ingredient can produce an effect missing from the effects file.
+
+    Returns
+    -------
+    SearchResult
+        Best order found, its distinct effects in ascending order and its
+        multiplier as Mix.get_multiplier computes it.
+    """
+    _check_search_arguments(compiled, max_length, 1)
+    if time_budget <= 0:
+        raise ValueError("time_budget must be positive.")
+    if restarts < 1:
+        raise ValueError("restarts must be at least 1.")
+    if initial_temperature < 0:
+        raise ValueError("initial_temperature must not be negative.")
+    if max_iterations is not None and max_iterations < 1:
+        raise ValueError("max_iterations must be at least 1.")
+
+    rng = Random(seed)
+    ingredients: List[int] = compiled.ingredients.tolist()
+    values: List[float] = compiled.effect_values.astype(float64).tolist()
+    state = MixState(compiled)
+
+    def value() -> float:
+        return sum(values[effect] for effect in set(state.effects.tolist()))
+
+    def rewind(position: int, suffix: List[int]) -> bool:
+        # Pops the state back to position and pushes suffix, False if refused
+        while len(state) > position:
+            state.pop()
+        try:
+            for ingredient in suffix:
+                state.push(ingredient)
+        except (DuplicateIngredientException, MaximumIngredientsAddedException):
+            return False
+        return True
+
+    best_value, best_order = float('-inf'), []
+    evaluations = 0
+    start = perf_counter()
+    for restart in range(restarts):
+        deadline = start + time_budget * (restart + 1) / restarts
+        restart_start = perf_counter()
+
+        order = _random_order(rng, ingredients, rng.randint(1, max_length))
+        rewind(0, order)
+        current = value()
+        if current > best_value:
+            best_value, best_order = current, list(order)
+
+        iteration = 0
+        while True:
+            now = perf_counter()
+            if now >= deadline or (max_iterations is not None and iteration >= max_iterations):
+                break
+            if max_iterations is None:
+                progress = (now - restart_start) / (deadline - restart_start)
+            else:
+                progress = iteration / max_iterations
+            temperature = initial_temperature * (1.0 - progress)
+            iteration += 1
+
+            mutated = _mutate(rng, ingredients, order, max_length)
+            if mutated is None:
+                continue
+            candidate, position = mutated
+            evaluations += 1
+
+            if not rewind(position, candidate[position:]):
+                rewind(position, order[position:])
+                continue
+            candidate_value = value()
+            delta = candidate_value - current
+            if delta >= 0 or (temperature > 0 and rng.random() < exp(delta / temperature)):
+                order, current = candidate, candidate_value
+                if current > best_value:
+                    best_value, best_order = current, list(order)
+            else:
+                rewind(position, order[position:])
+
+    if stats is not None:
+        stats.nodes_expanded = evaluations
+
+    rewind(0, best_order)
+    return SearchResult(tuple(best_order), tuple(sorted(set(state.effects.tolist()))), state.get_multiplier())
+
+def _random_order(rng: Random, ingredients: List[int], length: int) -> List[int]:
+    """Returns a random order of length ingredients that never repeats the last one."""
+    order: List[int] = []
+    while len(order) < length:
+        ingredient = rng.choice(ingredients)
+        if not order or ingredient != order[-1]:
+            order.append(ingredient)
+    return order
+
+def _mutate(
+    rng: Random,
+    ingredients: List[int],
+    order: List[int],
+    max_length: int
+) -> Union[Tuple[List[int], int], None]:
+    """
+    Returns a random mutation of an order and the first position it changes,
+    or None when the mutation picked does not apply to the order.
+    """
+    mutation = rng.choice(MUTATIONS)
+    length = len(order)
+    if mutation == 'replace':
+        position = rng.randrange(length)
+        ingredient = rng.choice(ingredients)
+        if ingredient == order[position]:
+            return None
+        return order[:position] + [ingredient] + order[position + 1:], position
+    if mutation == 'insert':
+        if length >= max_length:
+            return None
+        position = rng.randrange(length + 1)
+        return order[:position] + [rng.choice(ingredients)] + order[position:], position
+    if mutation == 'delete':
+        if length <= 1:
+            return None
+        position = rng.randrange(length)
+        return order[:position] + order[position + 1:], position
+    if length < 2:
+        return None
+    first, second = sorted(rng.sample(range(length), 2))
+    if order[first] == order[second]:
+        return None
+    swapped = list(order)
+    swapped[first], swapped[second] = swapped[second], swapped[first]
+    return swapped, first
@@ -1,19 +1,49 @@
+import bitset
+import catalog
 import util
 
-from numpy import uint16, float32, array, where, append, round
+from contextlib import contextmanager
+from numpy import uint16, float32, array, append, concatenate, flatnonzero, lexsort, zeros
 from numpy.typing import NDArray
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
 
 MAX_INGREDIENTS : uint16 = uint16(8)
 
+class Suggestion(NamedTuple):
+    """
+    An ingredient ranked by Mix.suggest_next.
+
+    Attributes
+    ----------
+    ingredient : uint16
+        ID of the ingredient to add next.
+    multiplier : float32
+        Multiplier of the mix right after adding it.
+    best_multiplier : float32 | None
+        Highest multiplier reachable after adding it within the ingredients
+        left, or None when not looked ahead.
+    """
+    ingredient: uint16
+    multiplier: float32
+    best_multiplier: Union[float32, None]
+
 class Mix:
-    def __init__(self, ingredients_file_path: str, effects_file_path: str):
+    def __init__(
+        self,
+        ingredients_file_path: str,
+        effects_file_path: str,
+        initial_effects: Union[Iterable[uint16], None] = None
+    ):
         """
         __init__ (dunder method)
 
         Initializes a Mix object with the given file paths for ingredients and effects.
-        This method sets up the initial state of the mix, including empty arrays for effects and order of ingredients.
-        It also loads the ingredient adjacency lists and effect details from the specified files.
+        This method sets up the initial state of the mix, including the effects the base
+        product starts with and an empty order of ingredients.
+        The ingredient adjacency lists and effect details are read through the shared catalog
+        cache in util, so every Mix built from the same files parses them at most once. Each
+        Mix resolves its compiled tables on first use and keeps them, so later calls skip the
+        cache lookup and its file checks, and a file changed afterwards is not picked up.
 
         Parameters
         ----------
@@ -21,11 +51,42 @@ class Mix:
             Path to the ingredients file containing adjacency lists.
         effects_file_path : str
             Path to the effects file containing effect details.
+        initial_effects : Iterable[uint16] | None
+            Effects of the base product before any ingredient is added, see
+            util.get_price_details. Ingredients replace them like any other
+            effect and they count towards the multiplier, but not towards
+            MAX_INGREDIENTS. Defaults to none.
+
+        Raises
+        ------
+        InvalidEffectException
+            If an initial effect is not a valid effect ID in the effects file.
+        See add_ingredient for the errors of the ingredients file, which is
+        only read here when initial effects are given.
         """
         self._ingredients_file_path : str = ingredients_file_path
         self._effects_file_path : str = effects_file_path
         self.mix_effects: NDArray[uint16] = array([], dtype=uint16)
+        # Compiled tables, read through the cache on first use and kept after that. The
+        # transition table is widened to the initial effects
+        self._transition_table : Union[catalog.TransitionTable, None] = None
+        self._effect_table : Union[catalog.EffectTable, None] = None
+        self._compiled : Union[catalog.CompiledCatalog, None] = None
+        self._bitset_tables : Union[bitset.BitsetTables, None] = None
+        if initial_effects is not None:
+            self.mix_effects = array(list(initial_effects), dtype=uint16)
+            effect_table = self._get_effect_table()
+            for effect in self.mix_effects:
+                if not effect_table.has_effect(effect):
+                    raise InvalidEffectException(effect)
+
+            # Initial effects may lie past every effect the ingredients file mentions
+            transition_table = self._get_transition_table()
+            if self.mix_effects.size > 0 and self.mix_effects.max() >= transition_table.n_effects:
+                self._transition_table = transition_table.widen(int(self.mix_effects.max()) + 1)
         self.mix_order: NDArray[uint16] = array([], dtype=uint16)
+        # Positions each ingredient changed and the effects they held before it
+        self._undo_log : List[Tuple[NDArray, NDArray[uint16]]] = []
 
     def __str__(self) -> str:
         """
@@ -43,10 +104,13 @@ class Mix:
             f"order={self.mix_order.tolist()})"
         )
 
-    def add_ingredient(self, ingredient: uint16):
-        # Load the ingredient adjacency lists
+    def _get_transition_table(self) -> catalog.TransitionTable:
+        """Returns the compiled transition table of the mix, widened to its initial effects."""
+        if self._transition_table is not None:
+            return self._transition_table
         try:
-            ingredient_adjacency_lists = util.get_ingredient_adjacency_lists(self._ingredients_file_path)
+            self._transition_table = catalog.get_transition_table(self._ingredients_file_path)
+            return self._transition_table
         except FileNotFoundError as e:
             raise FileNotFoundError("Ingredient adjacency lists file not found.") from e
         except ValueError as e:
@@ -56,8 +120,28 @@ class Mix:
         except util.MissingKeyError as e:
             raise util.MissingKeyError("Missing required key in ingredient adjacency lists file.") from e
 
+    def _get_effect_table(self) -> catalog.EffectTable:
+        """Returns the compiled effect table of the mix."""
+        if self._effect_table is not None:
+            return self._effect_table
+        try:
+            self._effect_table = catalog.get_effect_table(self._effects_file_path)
+            return self._effect_table
+        except FileNotFoundError as e:
+            raise FileNotFoundError("Effect details file not found.") from e
+        except ValueError as e:
+            raise ValueError("Error parsing effect details file.") from e
+        except util.InvalidFileExtentionError as e:
+            raise util.InvalidFileExtentionError("Invalid file extension for effect details file.") from e
+        except util.MissingKeyError as e:
+            raise util.MissingKeyError("Missing required key in effect details file.") from e
+
+    def add_ingredient(self, ingredient: uint16):
+        # Load the compiled transition table
+        transition_table = self._get_transition_table()
+
         # Make sure the ingredient actually exists first
-        if str(ingredient) not in ingredient_adjacency_lists.keys():
+        if not transition_table.has_ingredient(ingredient):
             raise InvalidIngredientException(ingredient)
         
         # Make sure the number of mixes isn't already at max ingredients
@@ -69,39 +153,373 @@ class Mix:
             if self.mix_order[-1] == ingredient:
                 raise DuplicateIngredientException(ingredient)
         
-        # Go through effects and begin replacement
-        for effect in ingredient_adjacency_lists[str(ingredient)][1:]:
-            self.mix_effects = where(self.mix_effects == effect[0], effect[1], self.mix_effects)
+        # Replace every effect through the ingredient's row and add the effect it gives
+        effects = transition_table.apply(ingredient, self.mix_effects)
 
-        # Add the ingredient effect as a new effect
-        self.mix_effects = append(self.mix_effects, ingredient_adjacency_lists[str(ingredient)][0][1])
+        # Remember the effects the ingredient replaced so it can be popped again
+        changed = flatnonzero(effects[:-1] != self.mix_effects)
+        self._undo_log.append((changed, self.mix_effects[changed]))
+        self.mix_effects = effects
 
         # Add ingredient as last ingredient added and put it in mix order
         self.mix_order = append(self.mix_order, ingredient)
 
-    def get_multiplier(self) -> float32:
-        # Load the effect details
+    def pop_ingredient(self) -> uint16:
+        """
+        Removes the last ingredient added and restores the effects from before
+        it was added, using the positions and effects it replaced. Nothing is
+        replayed, and the restored effects are a new array so arrays read from
+        mix_effects earlier are left unchanged.
+
+        Raises
+        ------
+        EmptyMixException
+            If no ingredient has been added.
+
+        Returns
+        -------
+        uint16
+            ID of the removed ingredient.
+        """
+        if self.mix_order.size == 0:
+            raise EmptyMixException()
+
+        changed, replaced = self._undo_log.pop()
+        effects = self.mix_effects[:-1].copy()
+        effects[changed] = replaced
+        self.mix_effects = effects
+
+        ingredient = self.mix_order[-1]
+        self.mix_order = self.mix_order[:-1]
+        return ingredient
+
+    @contextmanager
+    def try_ingredient(self, ingredient: uint16) -> Iterator['Mix']:
+        """
+        Adds an ingredient for the duration of a with block and pops it again
+        afterwards, even if the block raises.
+
+        Parameters
+        ----------
+        ingredient : uint16
+            ID of the ingredient to try.
+
+        Raises
+        ------
+        See add_ingredient.
+
+        Returns
+        -------
+        Iterator[Mix]
+            Context manager yielding this mix with the ingredient added.
+        """
+        self.add_ingredient(ingredient)
         try:
-            effect_details = util.get_effect_details(self._effects_file_path)
+            yield self
+        finally:
+            self.pop_ingredient()
+
+    def suggest_next(self, k: int = 3, lookahead: bool = False) -> List[Suggestion]:
+        """
+        Ranks the ingredients that can be added next by the multiplier of the
+        mix right after adding them, without adding anything.
+
+        The effects after every candidate are gathered at once from the
+        compiled transition table, and their multipliers are scored together
+        with catalog.distinct_multipliers, each distinct effect counted once
+        like get_multiplier.
+
+        With lookahead the candidates are instead ranked by the highest
+        multiplier reachable after adding them within the MAX_INGREDIENTS
+        budget, found by a branch and bound walk like
+        search.find_best_mixes. Candidates are walked in order of their upper
+        bound and the walk stops once no remaining bound can reach the top k.
+
+        Parameters
+        ----------
+        k : int
+            Number of ingredients to return.
+        lookahead : bool
+            Rank by the best multiplier reachable within the ingredients left.
+
+        Raises
+        ------
+        ValueError
+            If k is less than 1, or a file cannot be parsed.
+        FileNotFoundError
+            If the ingredients or effects file does not exist.
+        util.InvalidFileExtentionError
+            If a file does not have a .json extension.
+        util.MissingKeyError
+            If a file is missing a required key.
+        MaximumIngredientsAddedException
+            If the mix already holds MAX_INGREDIENTS ingredients.
+        InvalidEffectException
+            If adding a candidate would put an effect missing from the effects
+            file in the mix.
+
+        Returns
+        -------
+        List[Suggestion]
+            Best k ingredients, highest multiplier first and ties broken by
+            lower ingredient ID.
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1.")
+        if self.mix_order.size == MAX_INGREDIENTS:
+            raise MaximumIngredientsAddedException()
+
+        # Load the compiled catalog, and the bitset tables for the lookahead
+        try:
+            if self._compiled is None:
+                self._compiled = catalog.get_compiled_catalog(self._ingredients_file_path, self._effects_file_path)
+            if lookahead and self._bitset_tables is None:
+                self._bitset_tables = bitset.get_bitset_tables(self._ingredients_file_path, self._effects_file_path)
         except FileNotFoundError as e:
-            raise FileNotFoundError("Effect details file not found.") from e
+            raise FileNotFoundError("Ingredient adjacency lists or effect details file not found.") from e
         except ValueError as e:
-            raise ValueError("Error parsing effect details file.") from e
+            raise ValueError("Error parsing ingredient adjacency lists or effect details file.") from e
         except util.InvalidFileExtentionError as e:
-            raise util.InvalidFileExtentionError("Invalid file extension for effect details file.") from e
+            raise util.InvalidFileExtentionError(
+                "Invalid file extension for ingredient adjacency lists or effect details file."
+            ) from e
         except util.MissingKeyError as e:
-            raise util.MissingKeyError("Missing required key in effect details file.") from e
+            raise util.MissingKeyError("Missing required key in ingredient adjacency lists or effect details file.") from e
+        compiled, tables = self._compiled, self._bitset_tables
+
+        candidates = compiled.ingredients
+        if self.mix_order.size > 0:
+            candidates = candidates[candidates != self.mix_order[-1]]
+
+        # Every effect must still be valid once the candidate is added
+        valid = compiled.transition_valid[candidates][:, self.mix_effects].all(axis=1)
+        valid &= compiled.effect_valid[compiled.effect_given[candidates]]
+        if not valid.all():
+            ingredient = candidates[valid.argmin()]
+            effects = append(compiled.transitions[ingredient, self.mix_effects], compiled.effect_given[ingredient])
+            raise InvalidEffectException(effects[compiled.effect_valid[effects].argmin()])
 
-        # Calculate the multiplier based on the effects, rounding at each step
-        multiplier = 0.0
+        # Effects of the mix after every candidate, one row per candidate
+        children = concatenate(
+            (compiled.transitions[candidates][:, self.mix_effects], compiled.effect_given[candidates][:, None]), axis=1
+        )
+        multipliers = catalog.distinct_multipliers(compiled.effect_values, children)
+
+        if not lookahead:
+            ranked = lexsort((candidates, -multipliers))[:k]
+            return [Suggestion(candidates[i], multipliers[i], None) for i in ranked]
+
+        ingredients = compiled.ingredients.tolist()
+        state = bitset.effects_to_mask(self.mix_effects.tolist())
+        remaining = int(MAX_INGREDIENTS) - self.mix_order.size - 1
+        children = [(tables.apply(state, ingredient), ingredient) for ingredient in candidates.tolist()]
+        bounds = [tables.upper_bound(child, remaining) for child, _ in children]
+
+        # Unrounded best value per candidate, walked from the highest bound
+        best: Dict[int, float] = {}
+        for position in sorted(range(len(children)), key=lambda i: -bounds[i]):
+            floor = sorted(best.values(), reverse=True)[k - 1] if len(best) >= k else float('-inf')
+            if bounds[position] < floor - bitset.BOUND_ROUNDING_SLACK:
+                break
+            child, ingredient = children[position]
+            best[position] = tables.best_value(child, ingredient, remaining, ingredients, floor)
+
+        ranked = sorted(
+            best, key=lambda i: (-catalog.round_multiplier(best[i]), -multipliers[i], candidates[i])
+        )[:k]
+        return [
+            Suggestion(candidates[i], multipliers[i], catalog.round_multiplier(best[i])) for i in ranked
+        ]
+
+    def get_multiplier(self) -> float32:
+        """
+        Returns the summed value of the effects in the mix rounded to two
+        decimals. An effect held more than once counts once, as in the game
+        and in every search, see catalog.distinct_multiplier.
+
+        Raises
+        ------
+        InvalidEffectException
+            If the mix has an effect missing from the effects file.
+
+        Returns
+        -------
+        float32
+            Multiplier of the mix.
+        """
+        # Load the compiled effect table
+        effect_table = self._get_effect_table()
+
+        # Check that every effect is valid
         for effect in self.mix_effects:
-            # Check if the effect is valid
-            if str(effect) not in effect_details.keys():
+            if not effect_table.has_effect(effect):
+                raise InvalidEffectException(effect)
+
+        # Sum the value of every distinct effect and round the result
+        return effect_table.multiplier(self.mix_effects)
+
+class MixState:
+    """
+    Compact mix for search code that keeps many partial mixes alive.
+
+    Behaves like Mix (same validation, same effects including duplicates, same
+    multiplier, same initial effects) but holds a shared compiled catalog
+    instead of file paths, has no instance dictionary and never reallocates.
+    Every ingredient adds exactly one effect, so at most MAX_INGREDIENTS
+    effects past the initial ones are ever held and a single buffer is
+    allocated once at that size: row d holds the effects after d ingredients
+    and the last row holds the order. Adding an
+    ingredient writes the next row and removing one just steps back a row,
+    which makes push and pop constant time backtracking steps and copy one
+    small array copy.
+
+    Attributes
+    ----------
+    compiled : CompiledCatalog
+        Shared catalog the mix is evaluated with. Must not be modified.
+    """
+    __slots__ = ('compiled', '_buffer', '_depth', '_initial')
+
+    def __init__(
+        self,
+        compiled: 'catalog.CompiledCatalog',
+        initial_effects: Union[Iterable[uint16], None] = None
+    ) -> None:
+        """
+        __init__ (dunder method)
+
+        Creates a mix without ingredients.
+
+        Parameters
+        ----------
+        compiled : CompiledCatalog
+            Catalog to evaluate the mix with, see catalog.get_compiled_catalog.
+        initial_effects : Iterable[uint16] | None
+            Effects of the base product before any ingredient is added, see
+            Mix.__init__. Defaults to none.
+
+        Raises
+        ------
+        InvalidEffectException
+            If an initial effect is not a valid effect ID in the effects file.
+        """
+        initial = array([] if initial_effects is None else list(initial_effects), dtype=uint16)
+        for effect in initial:
+            if not (effect < compiled.n_effects and compiled.effect_valid[effect]):
                 raise InvalidEffectException(effect)
+        self.compiled = compiled
+        self._buffer : NDArray[uint16] = zeros((MAX_INGREDIENTS + 2, MAX_INGREDIENTS + initial.size), dtype=uint16)
+        self._buffer[0, :initial.size] = initial
+        self._depth : int = 0
+        self._initial : int = initial.size
+
+    @classmethod
+    def from_files(
+        cls,
+        ingredients_file_path: str,
+        effects_file_path: str,
+        initial_effects: Union[Iterable[uint16], None] = None
+    ) -> 'MixState':
+        """Creates a mix from the shared compiled catalog of a pair of files, see __init__."""
+        return cls(catalog.get_compiled_catalog(ingredients_file_path, effects_file_path), initial_effects)
 
-            # add the mult value to the multiplie
-            multiplier += float(effect_details[str(effect)]['value'])
-        return float32(round(multiplier, 2))
+    def __len__(self) -> int:
+        return self._depth
+
+    def __str__(self) -> str:
+        return f"MixState(effects={self.effects.tolist()}, order={self.order.tolist()})"
+
+    @property
+    def effects(self) -> NDArray[uint16]:
+        """Effects of the mix in the order Mix.mix_effects holds them. Read-only view."""
+        view = self._buffer[self._depth, :self._initial + self._depth]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def order(self) -> NDArray[uint16]:
+        """Ingredients added so far. Read-only view."""
+        view = self._buffer[-1, :self._depth]
+        view.flags.writeable = False
+        return view
+
+    def push(self, ingredient: uint16) -> None:
+        """
+        Adds an ingredient to the mix.
+
+        Parameters
+        ----------
+        ingredient : uint16
+            ID of the ingredient to add.
+
+        Raises
+        ------
+        InvalidIngredientException
+            If the ingredient is missing from the catalog.
+        MaximumIngredientsAddedException
+            If MAX_INGREDIENTS ingredients were already added.
+        DuplicateIngredientException
+            If the ingredient is the last one added.
+        """
+        compiled, depth = self.compiled, self._depth
+        ingredient = int(ingredient)
+        if not (0 <= ingredient < compiled.n_ingredients and compiled.ingredient_valid[ingredient]):
+            raise InvalidIngredientException(uint16(ingredient))
+        if depth == MAX_INGREDIENTS:
+            raise MaximumIngredientsAddedException()
+        buffer = self._buffer
+        if depth > 0 and buffer[-1, depth - 1] == ingredient:
+            raise DuplicateIngredientException(uint16(ingredient))
+
+        width = self._initial + depth
+        buffer[depth + 1, :width] = compiled.transitions[ingredient][buffer[depth, :width]]
+        buffer[depth + 1, width] = compiled.effect_given[ingredient]
+        buffer[-1, depth] = ingredient
+        self._depth = depth + 1
+
+    def pop(self) -> uint16:
+        """
+        Removes the last ingredient added, restoring the mix to before it.
+
+        Raises
+        ------
+        IndexError
+            If the mix is empty.
+
+        Returns
+        -------
+        uint16
+            ID of the removed ingredient.
+        """
+        if self._depth == 0:
+            raise IndexError("pop from an empty mix")
+        self._depth -= 1
+        return self._buffer[-1, self._depth]
+
+    def copy(self) -> 'MixState':
+        """Returns an independent copy of the mix sharing the same catalog."""
+        duplicate = MixState.__new__(MixState)
+        duplicate.compiled = self.compiled
+        duplicate._buffer = self._buffer.copy()
+        duplicate._depth = self._depth
+        duplicate._initial = self._initial
+        return duplicate
+
+    def get_multiplier(self) -> float32:
+        """
+        Returns the multiplier of the mix, each distinct effect counted once
+        like Mix.get_multiplier.
+
+        Raises
+        ------
+        InvalidEffectException
+            If the mix has an effect missing from the effects file.
+        """
+        effects = self._buffer[self._depth, :self._initial + self._depth]
+        for effect in effects:
+            if not self.compiled.effect_valid[effect]:
+                raise InvalidEffectException(effect)
+        return catalog.distinct_multiplier(self.compiled.effect_values, effects)
 
 class MixException(Exception):
     """Base class for all mix exceptions."""
@@ -127,6 +545,12 @@ class MaximumIngredientsAddedException(MixException):
         self.message = message
         super().__init__(self.message)
 
+class EmptyMixException(MixException):
+    """Raised when an ingredient is removed from a mix without any."""
+    def __init__(self, message: str = "No ingredient to remove from mix."):
+        self.message = message
+        super().__init__(self.message)
+
 class DuplicateIngredientException(MixException):
     """Raised when the same ingredient is added to the mix twice in a row."""
     def __init__(self, ingredient: uint16, message: str = "Duplicate ingredient added to mix."):
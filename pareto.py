@@ -0,0 +1,281 @@
+import util
+
+from bitset import BitsetTables, effects_to_mask, mask_to_effects
+from catalog import CompiledCatalog
+from frontier import expand_children
+from goal import get_ingredient_costs
+from mix import MAX_INGREDIENTS, InvalidEffectException
+from numpy import (
+    arange, array, bool_, concatenate, float32, float64, full, inf, int64, lexsort, minimum, round,
+    searchsorted, uint16, uint64, where, zeros
+)
+from numpy.typing import NDArray
+from search import _check_search_arguments
+from typing import Dict, Iterable, List, NamedTuple, Tuple, Union
+
+class ParetoMix(NamedTuple):
+    """
+    A mix on the Pareto front of sale value, ingredient cost and length.
+
+    Attributes
+    ----------
+    order : Tuple[int, ...]
+        Ingredient IDs in the order they are added.
+    effects : Tuple[int, ...]
+        Effect IDs of the finished mix in ascending order.
+    multiplier : float32
+        Multiplier of the finished mix.
+    value : float
+        Sale price of the product with the mix, price * (1 + multiplier).
+    cost : float
+        Total cost of the ingredients.
+    """
+    order: Tuple[int, ...]
+    effects: Tuple[int, ...]
+    multiplier: float32
+    value: float
+    cost: float
+
+    @property
+    def profit(self) -> float:
+        """Sale value minus ingredient cost."""
+        return self.value - self.cost
+
+def load_prices(file_path: str) -> Tuple[Dict[int, float], Dict[str, float]]:
+    """
+    Reads a price file through the shared catalog cache, see
+    util.get_price_details.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the prices JSON file.
+
+    Raises
+    ------
+    See util.get_price_details.
+
+    Returns
+    -------
+    Tuple[Dict[int, float], Dict[str, float]]
+        Cost of every ingredient ID and price of every product name.
+    """
+    price_details = util.get_cached_price_details(file_path)
+    costs = {int(ingredient): float(entry['cost']) for ingredient, entry in price_details['ingredients'].items()}
+    prices = {entry['name']: float(entry['price']) for entry in price_details['products'].values()}
+    return costs, prices
+
+def find_pareto_front(
+    compiled: CompiledCatalog,
+    price: float,
+    costs: Dict[int, float],
+    depth: int = MAX_INGREDIENTS,
+    max_cost: Union[float, None] = None,
+    initial_effects: Iterable[int] = ()
+) -> List[ParetoMix]:
+    """
+    Finds every mix of 1 to depth ingredients that no other mix beats on sale
+    value, ingredient cost and length at once.
+
+    A mix dominates another when it sells for at least as much, costs at
+    most as much and uses at most as many ingredients. The search expands
+    the orders one ingredient at a time over (effects, last ingredient)
+    states like frontier.expand_frontier, carrying the cost of every partial
+    mix. Two partial mixes in the same state have the same future, so the
+    longer one only survives if it is strictly cheaper than every shorter or
+    equally long one already kept there, and at most depth partial mixes are
+    kept per state. Partial mixes above max_cost are dropped as soon as they
+    exceed it, as costs never go down. The finished mixes are then filtered
+    down to the front with one sweep per length. Effects are tracked as sets
+    like in search.find_best_mixes, starting from the effects of the base
+    product like Mix.__init__.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to search, see catalog.get_compiled_catalog.
+    price : float
+        Price of the base product before any effect, see load_prices.
+    costs : Dict[int, float]
+        Non-negative cost of every ingredient ID, see load_prices.
+    depth : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+    max_cost : float | None
+        Largest total ingredient cost of a mix on the front.
+    initial_effects : Iterable[int]
+        Effect IDs the base product starts with, see products.Product.
+        Defaults to none.
+
+    Raises
+    ------
+    ValueError
+        If depth is out of range, price is negative, costs are missing or
+        negative, or the catalog has too many effects to pack a state with its
+        last ingredient in 64 bits.
+    InvalidEffectException
+        If an initial effect is missing from the effects file, or an
+        ingredient can produce one.
+    InvalidIngredientException
+        If costs are given for an ingredient missing from the catalog.
+
+    Returns
+    -------
+    List[ParetoMix]
+        Mixes on the front, highest value first, then cheapest, then
+        shortest.
+    """
+    _check_search_arguments(compiled, depth, 1)
+    if price < 0:
+        raise ValueError("price must not be negative.")
+    ingredient_costs = get_ingredient_costs(compiled, costs)
+    last_bits = compiled.n_ingredients.bit_length()
+    if compiled.n_effects + last_bits > 64:
+        raise ValueError("The catalog has too many effects for a Pareto search.")
+    initial = [int(effect) for effect in initial_effects]
+    for effect in initial:
+        if not (0 <= effect < compiled.n_effects and compiled.effect_valid[effect]):
+            raise InvalidEffectException(uint16(effect))
+
+    tables = BitsetTables(compiled)
+    ingredients = compiled.ingredients.astype(int64)
+    cost_table = zeros(compiled.n_ingredients, dtype=float64)
+    for ingredient, cost in ingredient_costs.items():
+        cost_table[ingredient] = cost
+
+    # Cheapest cost each (effects, last ingredient) state was kept with so
+    # far, keyed by both packed into one integer and sorted by key
+    best_keys = zeros(0, dtype=uint64)
+    best_costs = zeros(0, dtype=float64)
+
+    states = array([effects_to_mask(initial)], dtype=uint64)
+    lasts = array([-1], dtype=int64)
+    layer_costs = array([0.0])
+    layers: List[Tuple[NDArray[uint64], NDArray[int64], NDArray[float64], NDArray[int64]]] = [
+        (states, lasts, layer_costs, array([-1], dtype=int64))
+    ]
+    for _ in range(depth):
+        child_states, child_lasts, parents = expand_children(tables, states, lasts, ingredients)
+        child_costs = layer_costs[parents] + cost_table[child_lasts]
+        if max_cost is not None:
+            allowed = child_costs <= max_cost
+            child_states, child_lasts, parents, child_costs = (
+                child_states[allowed], child_lasts[allowed], parents[allowed], child_costs[allowed]
+            )
+        keys = (child_states << uint64(last_bits)) | (child_lasts + 1).astype(uint64)
+
+        # Keep the cheapest, then first, child of every state in the layer
+        by_key = lexsort((arange(len(keys)), child_costs, keys))
+        starts = concatenate(([True], keys[by_key][1:] != keys[by_key][:-1]))[:len(keys)]
+        first = by_key[starts]
+
+        # Drop children not strictly cheaper than a shorter one in their state
+        kept, best_keys, best_costs = _keep_cheaper(best_keys, best_costs, keys[first], child_costs[first])
+        first = first[kept]
+
+        first.sort()
+        states, lasts, layer_costs = child_states[first], child_lasts[first], child_costs[first]
+        layers.append((states, lasts, layer_costs, parents[first]))
+
+    return _front(tables, layers, float(price))
+
+def most_profitable(front: List[ParetoMix], max_cost: Union[float, None] = None) -> Union[ParetoMix, None]:
+    """
+    Returns the mix of a front with the highest profit, the cheapest and
+    then shortest among equally profitable ones. A mix with the most profit
+    under a budget is always on the front.
+
+    Parameters
+    ----------
+    front : List[ParetoMix]
+        Front from find_pareto_front.
+    max_cost : float | None
+        Largest ingredient cost allowed.
+
+    Returns
+    -------
+    ParetoMix | None
+        Most profitable mix, or None when no mix is within max_cost.
+    """
+    affordable = [mix for mix in front if max_cost is None or mix.cost <= max_cost]
+    if not affordable:
+        return None
+    return min(affordable, key=lambda mix: (-mix.profit, mix.cost, len(mix.order)))
+
+def _front(
+    tables: BitsetTables,
+    layers: List[Tuple[NDArray[uint64], NDArray[int64], NDArray[float64], NDArray[int64]]],
+    price: float
+) -> List[ParetoMix]:
+    """Filters the finished mixes of every layer down to the Pareto front."""
+    kept_layers = layers[1:]
+    states = concatenate([layer[0] for layer in kept_layers])
+    costs = concatenate([layer[2] for layer in kept_layers])
+    lengths = concatenate([full(len(layer[0]), length) for length, layer in enumerate(kept_layers, start=1)])
+    indices = concatenate([arange(len(layer[0])) for layer in kept_layers])
+    if len(states) == 0:
+        return []
+    multipliers = tables.multipliers(states)
+    values = price * (1.0 + round(multipliers.astype(float64), 2))
+
+    # After sorting by value, a mix is dominated by an earlier one at most as
+    # long and at most as expensive, found with a running minimum per length
+    order = lexsort((lengths, costs, -values))
+    sorted_costs, sorted_lengths = costs[order], lengths[order]
+    dominated = zeros(len(order), dtype=bool)
+    for length in range(1, len(layers)):
+        eligible = where(sorted_lengths <= length, sorted_costs, inf)
+        running = concatenate(([inf], minimum.accumulate(eligible)[:-1]))
+        here = sorted_lengths == length
+        dominated[here] = running[here] <= sorted_costs[here]
+
+    front = []
+    for position in order[~dominated].tolist():
+        front.append(ParetoMix(
+            _rebuild_order(layers, int(lengths[position]), int(indices[position])),
+            mask_to_effects(states[position]),
+            multipliers[position],
+            float(values[position]),
+            float(costs[position])
+        ))
+    return front
+
+def _keep_cheaper(
+    best_keys: NDArray[uint64],
+    best_costs: NDArray[float64],
+    keys: NDArray[uint64],
+    costs: NDArray[float64]
+) -> Tuple[NDArray[bool_], NDArray[uint64], NDArray[float64]]:
+    """
+    Returns which of the distinct keys are new or cheaper than the cost kept
+    for them, and the sorted keys and costs updated with those.
+    """
+    positions = searchsorted(best_keys, keys)
+    clipped = minimum(positions, len(best_keys) - 1)
+    known = zeros(len(keys), dtype=bool_)
+    if len(best_keys):
+        known = best_keys[clipped] == keys
+    kept = ~known
+    kept[known] = costs[known] < best_costs[clipped[known]]
+
+    updated_costs = best_costs.copy()
+    cheaper = kept & known
+    updated_costs[clipped[cheaper]] = costs[cheaper]
+    added = kept & ~known
+    merged_keys = concatenate((best_keys, keys[added]))
+    merged_costs = concatenate((updated_costs, costs[added]))
+    order = merged_keys.argsort(kind='stable')
+    return kept, merged_keys[order], merged_costs[order]
+
+def _rebuild_order(
+    layers: List[Tuple[NDArray[uint64], NDArray[int64], NDArray[float64], NDArray[int64]]],
+    length: int,
+    index: int
+) -> Tuple[int, ...]:
+    """Follows the parents of a partial mix back to the empty mix."""
+    order = []
+    while length > 0:
+        _, lasts, _, parents = layers[length]
+        order.append(int(lasts[index]))
+        index = int(parents[index])
+        length -= 1
+    return tuple(reversed(order))
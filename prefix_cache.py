@@ -0,0 +1,178 @@
+from catalog import CompiledCatalog, distinct_multiplier
+from collections import OrderedDict
+from mix import (
+    MAX_INGREDIENTS,
+    DuplicateIngredientException,
+    InvalidEffectException,
+    InvalidIngredientException,
+    MaximumIngredientsAddedException
+)
+from numpy import append, array, float32, uint16
+from numpy.typing import NDArray
+from typing import Iterable, Tuple, Union
+
+DEFAULT_PREFIX_CACHE_CAPACITY : int = 100000
+
+class PrefixNode:
+    """
+    Cached state of a partial mix.
+
+    Attributes
+    ----------
+    order : Tuple[int, ...]
+        Ingredient IDs added so far.
+    effects : NDArray[uint16]
+        Effects of the mix in the order Mix.mix_effects holds them. Read-only.
+    """
+    def __init__(self, order: Tuple[int, ...], effects: NDArray[uint16], compiled: CompiledCatalog) -> None:
+        self.order : Tuple[int, ...] = order
+        self.effects : NDArray[uint16] = effects
+        self.effects.flags.writeable = False
+        self._compiled : CompiledCatalog = compiled
+        self._multiplier : Union[float32, None] = None
+
+    def get_multiplier(self) -> float32:
+        """
+        Returns the multiplier of the mix, computed on the first call and
+        stored on the node afterwards.
+
+        Raises
+        ------
+        InvalidEffectException
+            If the mix has an effect missing from the effects file.
+        """
+        if self._multiplier is None:
+            for effect in self.effects:
+                if not self._compiled.effect_valid[effect]:
+                    raise InvalidEffectException(effect)
+            self._multiplier = distinct_multiplier(self._compiled.effect_values, self.effects)
+        return self._multiplier
+
+class PrefixCache:
+    """
+    Bounded cache of partial mixes keyed by their ingredient order.
+
+    Every cached order is a node of a prefix tree whose parent is the same
+    order without its last ingredient, stored flat in one dictionary keyed by
+    the order tuple. Looking up an order starts from its longest cached prefix
+    and applies only the missing ingredients, caching every node on the way, so
+    extending a cached order by one ingredient costs a single transition. The
+    least recently used nodes are evicted once capacity is reached; evicting a
+    node does not affect its cached descendants.
+
+    Attributes
+    ----------
+    capacity : int
+        Maximum number of cached nodes, not counting the empty mix.
+    hits : int
+        Number of lookups whose full order was cached.
+    misses : int
+        Number of lookups that had to apply at least one ingredient.
+    """
+    def __init__(self, compiled: CompiledCatalog, capacity: int = DEFAULT_PREFIX_CACHE_CAPACITY) -> None:
+        """
+        __init__ (dunder method)
+
+        Parameters
+        ----------
+        compiled : CompiledCatalog
+            Catalog the orders are evaluated with.
+        capacity : int
+            Maximum number of cached nodes.
+
+        Raises
+        ------
+        ValueError
+            If capacity is less than 1.
+        """
+        if capacity < 1:
+            raise ValueError("Prefix cache capacity must be at least 1.")
+        self.capacity : int = capacity
+        self.hits : int = 0
+        self.misses : int = 0
+        self._compiled : CompiledCatalog = compiled
+        self._root : PrefixNode = PrefixNode((), array([], dtype=uint16), compiled)
+        self._nodes : OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, order: Iterable[int]) -> bool:
+        order = tuple(int(ingredient) for ingredient in order)
+        return order == () or order in self._nodes
+
+    def get(self, order: Iterable[int]) -> PrefixNode:
+        """
+        Returns the node of an ingredient order, evaluating and caching any
+        missing prefixes.
+
+        Parameters
+        ----------
+        order : Iterable[int]
+            Ingredient IDs in the order they are added.
+
+        Raises
+        ------
+        InvalidIngredientException
+            If an ingredient is missing from the catalog.
+        MaximumIngredientsAddedException
+            If the order is longer than MAX_INGREDIENTS.
+        DuplicateIngredientException
+            If the same ingredient is added twice in a row.
+
+        Returns
+        -------
+        PrefixNode
+            Cached node of the order.
+        """
+        order = tuple(int(ingredient) for ingredient in order)
+        if order == ():
+            return self._root
+
+        # Find the longest cached prefix
+        node = self._root
+        for length in range(len(order), 0, -1):
+            cached = self._nodes.get(order[:length])
+            if cached is not None:
+                self._nodes.move_to_end(order[:length])
+                node = cached
+                break
+
+        if len(node.order) == len(order):
+            self.hits += 1
+            return node
+
+        # Apply the missing ingredients one transition at a time
+        self.misses += 1
+        for ingredient in order[len(node.order):]:
+            node = self._extend(node, ingredient)
+        return node
+
+    def extend(self, order: Iterable[int], ingredient: int) -> PrefixNode:
+        """Returns the node of an order with one more ingredient added, see get."""
+        return self.get(tuple(order) + (ingredient,))
+
+    def get_multiplier(self, order: Iterable[int]) -> float32:
+        """Returns the multiplier of an ingredient order, see get and PrefixNode.get_multiplier."""
+        return self.get(order).get_multiplier()
+
+    def clear(self) -> None:
+        """Removes every cached node."""
+        self._nodes.clear()
+
+    def _extend(self, node: PrefixNode, ingredient: int) -> PrefixNode:
+        """Creates and caches the child of a node, validating like Mix.add_ingredient."""
+        compiled = self._compiled
+        if not (0 <= ingredient < compiled.n_ingredients and compiled.ingredient_valid[ingredient]):
+            raise InvalidIngredientException(ingredient)
+        if len(node.order) == MAX_INGREDIENTS:
+            raise MaximumIngredientsAddedException()
+        if node.order and node.order[-1] == ingredient:
+            raise DuplicateIngredientException(ingredient)
+
+        effects = append(compiled.transitions[ingredient][node.effects], compiled.effect_given[ingredient])
+        child = PrefixNode(node.order + (ingredient,), effects, compiled)
+        self._nodes[child.order] = child
+        while len(self._nodes) > self.capacity:
+            self._nodes.popitem(last=False)
+        return child
@@ -0,0 +1,325 @@
+import util
+
+from batch import EMPTY_SLOT, score_batch
+from bitset import BitsetTables, effects_to_mask, mask_to_effects
+from catalog import CompiledCatalog
+from frontier import expand_children
+from mix import MAX_INGREDIENTS, InvalidEffectException
+from numpy import (
+    arange, array, asarray, bitwise_or, concatenate, flatnonzero, float32, full, int64, isin, minimum, tile,
+    uint16, uint64, unique, zeros
+)
+from numpy.typing import ArrayLike, NDArray
+from search import SearchResult, _check_search_arguments
+from typing import Dict, List, NamedTuple, Tuple
+
+# Largest number of products searched together, one bit of a uint64 each
+MAX_BATCH_PRODUCTS : int = 64
+
+class Product(NamedTuple):
+    """
+    A base product that ingredients are mixed into.
+
+    Attributes
+    ----------
+    name : str
+        Name of the product.
+    price : float
+        Sale price before any effect multiplier.
+    effects : Tuple[int, ...]
+        Effect IDs the product starts with, see Mix.__init__.
+    """
+    name: str
+    price: float
+    effects: Tuple[int, ...]
+
+class ProductLayer(NamedTuple):
+    """
+    Every distinct (effects, last ingredient) state reached from any product
+    with one number of ingredients.
+
+    Attributes
+    ----------
+    states : NDArray[uint64]
+        Effect sets as bitmasks.
+    lasts : NDArray[int64]
+        Last ingredient added to each state.
+    parents : NDArray[int64]
+        Index in the previous layer of the first state each one was reached
+        from.
+    reach : NDArray[uint64]
+        Bit p is set when product p reaches the state.
+    """
+    states: NDArray[uint64]
+    lasts: NDArray[int64]
+    parents: NDArray[int64]
+    reach: NDArray[uint64]
+
+def load_products(file_path: str) -> List[Product]:
+    """
+    Reads the products of a price file through the shared catalog cache, see
+    util.get_price_details.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the prices JSON file.
+
+    Raises
+    ------
+    See util.get_price_details.
+
+    Returns
+    -------
+    List[Product]
+        Products in ascending product ID.
+    """
+    products = util.get_cached_price_details(file_path)['products']
+    return [
+        Product(entry['name'], float(entry['price']), tuple(int(effect) for effect in entry['effects']))
+        for _, entry in sorted(products.items(), key=lambda item: int(item[0]))
+    ]
+
+def score_products(
+    compiled: CompiledCatalog,
+    sequences: ArrayLike,
+    products: List[Product]
+) -> NDArray[float32]:
+    """
+    Scores every ingredient sequence on every product in a single
+    batch.score_batch call, each row starting from the product's effects.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to score with, see catalog.get_compiled_catalog.
+    sequences : ArrayLike
+        Ingredient IDs of shape (N, L), see batch.score_batch.
+    products : List[Product]
+        Products to score on, see load_products.
+
+    Raises
+    ------
+    See batch.score_batch.
+
+    Returns
+    -------
+    NDArray[float32]
+        Multipliers of shape (len(products), N), as Mix.get_multiplier
+        computes them on a Mix created with the product's initial effects.
+    """
+    sequences = asarray(sequences, dtype=uint16)
+    if sequences.ndim != 2:
+        raise ValueError("sequences must be a two dimensional array.")
+    n_rows = sequences.shape[0]
+    width = max((len(product.effects) for product in products), default=0)
+    initial = full((len(products), width), EMPTY_SLOT, dtype=uint16)
+    for row, product in enumerate(products):
+        initial[row, :len(product.effects)] = product.effects
+
+    multipliers, _ = score_batch(
+        compiled, tile(sequences, (len(products), 1)), initial.repeat(n_rows, axis=0)
+    )
+    return multipliers.reshape(len(products), n_rows)
+
+def find_best_mixes_per_product(
+    compiled: CompiledCatalog,
+    products: List[Product],
+    depth: int = MAX_INGREDIENTS,
+    top_k: int = 10
+) -> Dict[str, List[SearchResult]]:
+    """
+    Finds the top_k effect sets for every product at once.
+
+    Mixing the same ingredients into two products usually ends in the same
+    effects after a few steps, so instead of one search per product the
+    products share a single layered expansion like frontier.expand_frontier.
+    Layer 0 holds the distinct initial effect sets and every layer after it
+    the distinct (effects, last ingredient) states reached from any product,
+    each with a bitmask of the products reaching it. A state reached from
+    several products is expanded once for all of them, with the same
+    bitset.BitsetTables.
+
+    The multiplier of a state counts the product's initial effects, like
+    Mix.get_multiplier on a Mix created with them, and effects are tracked as
+    sets like in search.find_best_mixes.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to search, see catalog.get_compiled_catalog.
+    products : List[Product]
+        Products to search, see load_products. Names must be distinct.
+    depth : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+    top_k : int
+        Number of results per product.
+
+    Raises
+    ------
+    ValueError
+        If depth or top_k is out of range, there are more than
+        MAX_BATCH_PRODUCTS products, names repeat, or the catalog has too
+        many effects to pack a state with its last ingredient in 64 bits.
+    InvalidEffectException
+        If a product starts with, or an ingredient can produce, an effect
+        missing from the effects file.
+
+    Returns
+    -------
+    Dict[str, List[SearchResult]]
+        Best mixes of every product name, ranked like search.find_best_mixes:
+        highest multiplier first, ties broken by shorter order and then by
+        the order itself. Every order is the smallest of the shortest
+        producing its effect set from the product.
+    """
+    _check_search_arguments(compiled, depth, top_k)
+    if len(products) > MAX_BATCH_PRODUCTS:
+        raise ValueError(f"At most {MAX_BATCH_PRODUCTS} products can be searched together.")
+    if len({product.name for product in products}) != len(products):
+        raise ValueError("Product names must be distinct.")
+    for product in products:
+        for effect in product.effects:
+            if not (0 <= effect < compiled.n_effects and compiled.effect_valid[effect]):
+                raise InvalidEffectException(uint16(effect))
+    last_bits = compiled.n_ingredients.bit_length()
+    if compiled.n_effects + last_bits > 64:
+        raise ValueError("The catalog has too many effects for a batched product search.")
+
+    tables = BitsetTables(compiled)
+    layers = _expand_products(tables, compiled.ingredients.astype(int64), products, depth, last_bits)
+
+    # Flatten every layer after the first
+    kept_layers = layers[1:]
+    states = concatenate([layer.states for layer in kept_layers])
+    reach = concatenate([layer.reach for layer in kept_layers])
+    depths = concatenate([full(len(layer.states), d) for d, layer in enumerate(kept_layers, start=1)])
+    indices = concatenate([arange(len(layer.states)) for layer in kept_layers])
+    multipliers = tables.multipliers(states)
+
+    # Walk every product's states from the highest multiplier down
+    by_multiplier = (-multipliers).argsort(kind='stable')
+    sorted_reach = reach[by_multiplier]
+    sorted_multipliers = multipliers[by_multiplier]
+
+    results: Dict[str, List[SearchResult]] = {}
+    for product_index, product in enumerate(products):
+        positions = flatnonzero((sorted_reach >> uint64(product_index)) & uint64(1))
+        reached = by_multiplier[positions]
+
+        # Grow a prefix until it holds top_k effect sets, and keep every state
+        # tying with the last of them
+        size = top_k
+        while True:
+            head = reached[:size]
+            _, first = unique(states[head], return_index=True)
+            if len(first) >= top_k or size >= len(reached):
+                break
+            size *= 4
+        threshold = sorted(multipliers[head[first]].tolist(), reverse=True)[:top_k][-1] if len(first) else 0.0
+        candidates = reached[sorted_multipliers[positions] >= threshold]
+
+        # Only the shallowest occurrences of every effect set are candidates
+        shallowest: Dict[int, int] = {}
+        for i in candidates.tolist():
+            state = int(states[i])
+            shallowest[state] = min(shallowest.get(state, MAX_INGREDIENTS + 1), int(depths[i]))
+        targets = [i for i in candidates.tolist() if depths[i] == shallowest[int(states[i])]]
+        orders = _smallest_orders(
+            tables, layers, product_index, [(int(depths[i]), int(indices[i])) for i in targets]
+        )
+
+        # Keep the smallest order of every effect set and rank like search.find_best_mixes
+        best: Dict[int, Tuple[int, ...]] = {}
+        for i in targets:
+            state, order = int(states[i]), orders[int(depths[i]), int(indices[i])]
+            if state not in best or order < best[state]:
+                best[state] = order
+        ranked = sorted(
+            best.items(), key=lambda item: (-tables.multiplier(item[0]), len(item[1]), item[1])
+        )[:top_k]
+        results[product.name] = [
+            SearchResult(order, mask_to_effects(state), tables.multiplier(state)) for state, order in ranked
+        ]
+    return results
+
+def _expand_products(
+    tables: BitsetTables,
+    ingredients: NDArray[int64],
+    products: List[Product],
+    depth: int,
+    last_bits: int
+) -> List[ProductLayer]:
+    """Expands the states of every product together, see find_best_mixes_per_product."""
+    roots = array([effects_to_mask(product.effects) for product in products], dtype=uint64)
+    bits = uint64(1) << arange(len(products), dtype=uint64)
+    root_states, root_group = unique(roots, return_inverse=True)
+    root_reach = zeros(len(root_states), dtype=uint64)
+    bitwise_or.at(root_reach, root_group, bits)
+
+    states, lasts, reach = root_states, full(len(root_states), -1, dtype=int64), root_reach
+    layers = [ProductLayer(states, lasts, full(len(states), -1, dtype=int64), reach)]
+    for _ in range(depth):
+        child_states, child_lasts, parents = expand_children(tables, states, lasts, ingredients)
+        if len(child_states) == 0:
+            break
+
+        # Merge children reaching the same state, joining the products reaching them
+        keys = (child_states << uint64(last_bits)) | (child_lasts + 1).astype(uint64)
+        by_key = keys.argsort()
+        sorted_keys = keys[by_key]
+        starts = flatnonzero(concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        merged_reach = bitwise_or.reduceat(reach[parents[by_key]], starts)
+
+        # The sort is not stable, so take the smallest index of every group
+        first = minimum.reduceat(by_key, starts)
+        layout = first.argsort()
+        first = first[layout]
+        states, lasts, reach = child_states[first], child_lasts[first], merged_reach[layout]
+        layers.append(ProductLayer(states, lasts, parents[first], reach))
+    return layers
+
+def _smallest_orders(
+    tables: BitsetTables,
+    layers: List[ProductLayer],
+    product_index: int,
+    targets: List[Tuple[int, int]]
+) -> Dict[Tuple[int, int], Tuple[int, ...]]:
+    """
+    Finds the lexicographically smallest order reaching each (depth, index)
+    state of targets from a product. The recorded parents are the first
+    reached from any product, so every parent reached from this product is
+    collected walking back from the targets, one apply per layer and last
+    ingredient, and the orders are then built forward from the root.
+    """
+    bit = uint64(1) << uint64(product_index)
+    pending: Dict[int, set] = {}
+    for depth, index in targets:
+        pending.setdefault(depth, set()).add(index)
+
+    # Walk back collecting every parent of every pending state
+    edges: Dict[Tuple[int, int], List[int]] = {}
+    for depth in range(max(pending, default=0), 0, -1):
+        layer, previous = layers[depth], layers[depth - 1]
+        indices = array(sorted(pending.get(depth, ())), dtype=int64)
+        reached = flatnonzero(previous.reach & bit)
+        for last in unique(layer.lasts[indices]).tolist():
+            children = indices[layer.lasts[indices] == last]
+            allowed = reached[previous.lasts[reached] != last]
+            after = tables.apply_many(previous.states[allowed], last)
+            hits = isin(after, layer.states[children])
+            allowed, after = allowed[hits], after[hits]
+            for child in children.tolist():
+                parents = allowed[after == layer.states[child]].tolist()
+                edges[depth, child] = parents
+                pending.setdefault(depth - 1, set()).update(parents)
+
+    # Build the smallest orders forward from the product's root
+    orders: Dict[Tuple[int, int], Tuple[int, ...]] = {
+        (0, index): () for index in pending.get(0, ())
+    }
+    for depth in range(1, max(pending, default=0) + 1):
+        for index in pending.get(depth, ()):
+            last = int(layers[depth].lasts[index])
+            orders[depth, index] = min(orders[depth - 1, parent] for parent in edges[depth, index]) + (last,)
+    return {target: orders[target] for target in targets}
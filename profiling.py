@@ -0,0 +1,235 @@
+import util
+
+from atexit import register
+from functools import wraps
+from importlib import import_module
+from json import dump
+from sys import stderr
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+# Operations instrumented by default, as (module, attribute path) pairs
+DEFAULT_TARGETS : List[Tuple[str, str]] = [
+    ('util', 'get_ingredient_adjacency_lists'),
+    ('util', 'get_effect_details'),
+    ('catalog', 'get_transition_table'),
+    ('catalog', 'get_effect_table'),
+    ('catalog', 'get_compiled_catalog'),
+    ('catalog', 'TransitionTable.apply'),
+    ('catalog', 'EffectTable.multiplier'),
+    ('mix', 'Mix.add_ingredient'),
+    ('mix', 'Mix.pop_ingredient'),
+    ('mix', 'Mix.get_multiplier')
+]
+
+class OperationStats:
+    """
+    Counters of one instrumented operation.
+
+    Attributes
+    ----------
+    calls : int
+        Number of calls, including calls that raised.
+    total_seconds : float
+        Cumulative wall time of every call, including nested instrumented calls.
+    max_seconds : float
+        Slowest single call.
+    """
+    def __init__(self) -> None:
+        self.calls : int = 0
+        self.total_seconds : float = 0.0
+        self.max_seconds : float = 0.0
+
+class Profiler:
+    """
+    Opt-in instrumentation of the catalog loading and Mix operations.
+
+    Enabling replaces each target function or method with a wrapper that
+    counts calls, accumulates their time and calls every registered hook, and
+    disabling puts the original back. Nothing is wrapped while disabled, so
+    the instrumented code runs at full speed. Catalog cache hits and misses
+    are taken from util.CATALOG_CACHE as the change since enabling.
+
+    Attributes
+    ----------
+    operations : Dict[str, OperationStats]
+        Counters keyed by 'module.attribute'.
+    """
+    def __init__(self) -> None:
+        self.operations : Dict[str, OperationStats] = {}
+        self._originals : Dict[str, Tuple[Any, str, Callable]] = {}
+        self._hooks : List[Callable[[str, float], None]] = []
+        self._lock : Lock = Lock()
+        self._cache_start : Tuple[int, int] = (0, 0)
+        self._exit_report_path : Union[str, None] = None
+        self._exit_report_requested : bool = False
+        self._exit_registered : bool = False
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any operation is currently instrumented."""
+        return bool(self._originals)
+
+    def enable(
+        self,
+        targets: Union[List[Tuple[str, str]], None] = None,
+        report_at_exit: bool = False,
+        report_path: Union[str, None] = None
+    ) -> None:
+        """
+        Starts instrumenting operations. Counters keep accumulating across
+        enable and disable until reset.
+
+        Parameters
+        ----------
+        targets : List[Tuple[str, str]] | None
+            (module, attribute path) pairs to instrument, for example
+            ('mix', 'Mix.add_ingredient'). Defaults to DEFAULT_TARGETS.
+        report_at_exit : bool
+            Dump the report when the process exits.
+        report_path : str | None
+            JSON file the exit report is written to. Defaults to stderr.
+
+        Raises
+        ------
+        AttributeError
+            If a target does not exist.
+        """
+        if not self._originals:
+            self._cache_start = (util.CATALOG_CACHE.hits, util.CATALOG_CACHE.misses)
+
+        for module_name, attribute_path in (DEFAULT_TARGETS if targets is None else targets):
+            name = f"{module_name}.{attribute_path}"
+            if name in self._originals:
+                continue
+            owner = import_module(module_name)
+            *parents, attribute = attribute_path.split('.')
+            for parent in parents:
+                owner = getattr(owner, parent)
+            original = getattr(owner, attribute)
+            self._originals[name] = (owner, attribute, original)
+            self.operations.setdefault(name, OperationStats())
+            setattr(owner, attribute, self._wrap(name, original))
+
+        if report_at_exit:
+            self._exit_report_path = report_path
+            self._exit_report_requested = True
+            if not self._exit_registered:
+                register(self._report_at_exit)
+                self._exit_registered = True
+
+    def disable(self) -> None:
+        """Restores every instrumented operation."""
+        for owner, attribute, original in self._originals.values():
+            setattr(owner, attribute, original)
+        self._originals.clear()
+
+    def reset(self) -> None:
+        """Zeroes every counter and restarts the cache statistics."""
+        with self._lock:
+            for stats in self.operations.values():
+                stats.calls, stats.total_seconds, stats.max_seconds = 0, 0.0, 0.0
+            self._cache_start = (util.CATALOG_CACHE.hits, util.CATALOG_CACHE.misses)
+
+    def add_hook(self, hook: Callable[[str, float], None]) -> None:
+        """
+        Registers a callback called after every instrumented call with the
+        operation name and its duration in seconds, for tracing.
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[str, float], None]) -> None:
+        """Unregisters a callback added with add_hook."""
+        self._hooks.remove(hook)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns the counters as a JSON serializable dictionary.
+
+        Returns
+        -------
+        Dict[str, Any]
+            'operations' maps every operation to its calls, total_seconds,
+            mean_us and max_us, and 'catalog_cache' holds the hits, misses and
+            hit_rate of the catalog cache.
+        """
+        with self._lock:
+            operations = {
+                name: {
+                    'calls': stats.calls,
+                    'total_seconds': stats.total_seconds,
+                    'mean_us': stats.total_seconds / stats.calls * 1e6 if stats.calls else 0.0,
+                    'max_us': stats.max_seconds * 1e6
+                }
+                for name, stats in self.operations.items()
+            }
+        hits = util.CATALOG_CACHE.hits - self._cache_start[0]
+        misses = util.CATALOG_CACHE.misses - self._cache_start[1]
+        return {
+            'operations': operations,
+            'catalog_cache': {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0
+            }
+        }
+
+    def dump_report(self, file_path: Union[str, None] = None) -> None:
+        """Writes the report as JSON to a file, or to stderr when no path is given."""
+        if file_path is None:
+            dump(self.report(), stderr, indent=4)
+            stderr.write('\n')
+        else:
+            with open(file_path, 'w') as file:
+                dump(self.report(), file, indent=4)
+
+    def _wrap(self, name: str, function: Callable) -> Callable:
+        """Returns function wrapped to count and time its calls."""
+        stats = self.operations[name]
+        lock, hooks = self._lock, self._hooks
+
+        @wraps(function)
+        def instrumented(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                with lock:
+                    stats.calls += 1
+                    stats.total_seconds += elapsed
+                    if elapsed > stats.max_seconds:
+                        stats.max_seconds = elapsed
+                for hook in hooks:
+                    hook(name, elapsed)
+
+        return instrumented
+
+    def _report_at_exit(self) -> None:
+        """Dumps the report if one was requested when enabling."""
+        if self._exit_report_requested:
+            self.dump_report(self._exit_report_path)
+
+# Profiler shared by the whole process
+PROFILER : Profiler = Profiler()
+
+def enable(
+    targets: Union[List[Tuple[str, str]], None] = None,
+    report_at_exit: bool = False,
+    report_path: Union[str, None] = None
+) -> None:
+    """Starts instrumenting operations on the shared profiler, see Profiler.enable."""
+    PROFILER.enable(targets, report_at_exit, report_path)
+
+def disable() -> None:
+    """Restores every operation instrumented by the shared profiler."""
+    PROFILER.disable()
+
+def reset() -> None:
+    """Zeroes the counters of the shared profiler."""
+    PROFILER.reset()
+
+def report() -> Dict[str, Any]:
+    """Returns the report of the shared profiler, see Profiler.report."""
+    return PROFILER.report()
@@ -0,0 +1,473 @@
+from bitset import BOUND_ROUNDING_SLACK, BitsetTables, mask_to_effects
+from catalog import CompiledCatalog
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappushpop, nlargest
+from mix import MAX_INGREDIENTS, InvalidEffectException
+from numpy import float32, uint16
+from typing import Dict, Hashable, List, NamedTuple, Set, Tuple, Union
+
+class SearchResult(NamedTuple):
+    """
+    A mix found by a search.
+
+    Attributes
+    ----------
+    order : Tuple[int, ...]
+        Ingredient IDs in the order they are added.
+    effects : Tuple[int, ...]
+        Effect IDs of the finished mix in ascending order.
+    multiplier : float32
+        Multiplier of the finished mix.
+    """
+    order: Tuple[int, ...]
+    effects: Tuple[int, ...]
+    multiplier: float32
+
+# Entries a search keeps in its transposition table by default
+DEFAULT_TRANSPOSITION_CAPACITY : int = 1 << 22
+
+class TranspositionTable:
+    """
+    Bounded table of the search states already expanded and the number of
+    ingredients that were left when they were.
+
+    A state reached again with no more ingredients left than it was expanded
+    with cannot lead anywhere new and is skipped. Entries are kept in two
+    generations of capacity / 2 each: once the current one fills up it
+    replaces the previous one, which is dropped. Lookups check both and move
+    a state found in the previous generation back to the current one, so the
+    most recently used states are always kept and memory stays bounded
+    without any per entry bookkeeping. Forgetting a state only means
+    expanding it again.
+
+    Attributes
+    ----------
+    capacity : int
+        Maximum number of entries held.
+    hits : int
+        Lookups of a state already expanded with at least as many ingredients left.
+    misses : int
+        Lookups that stored the state.
+    evictions : int
+        Entries dropped to stay within capacity.
+    """
+    def __init__(self, capacity: int = DEFAULT_TRANSPOSITION_CAPACITY) -> None:
+        """
+        __init__ (dunder method)
+
+        Parameters
+        ----------
+        capacity : int
+            Maximum number of entries held.
+
+        Raises
+        ------
+        ValueError
+            If capacity is less than 2.
+        """
+        if capacity < 2:
+            raise ValueError("Transposition table capacity must be at least 2.")
+        self.capacity : int = capacity
+        self.hits : int = 0
+        self.misses : int = 0
+        self.evictions : int = 0
+        self._current : Dict[Hashable, int] = {}
+        self._previous : Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._current) + len(self._previous)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups that were hits."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def seen(self, key: Hashable, remaining: int) -> bool:
+        """
+        Returns whether a state was already expanded with at least remaining
+        ingredients left, and records it as expanded with remaining otherwise.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the state, the same for every order reaching it.
+        remaining : int
+            Number of ingredients that may still be added to the state.
+
+        Returns
+        -------
+        bool
+            True when the state can be skipped.
+        """
+        known = self._current.get(key)
+        if known is None:
+            # Move a state found in the previous generation to the current one,
+            # so states still in use survive the next replacement
+            known = self._previous.pop(key, None)
+            if known is not None and known >= remaining:
+                self.hits += 1
+                self._store(key, known)
+                return True
+        elif known >= remaining:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        self._store(key, remaining)
+        return False
+
+    def _store(self, key: Hashable, remaining: int) -> None:
+        """Records a state in the current generation, replacing the previous one once full."""
+        self._current[key] = remaining
+        if len(self._current) >= self.capacity // 2:
+            self.evictions += len(self._previous)
+            self._previous, self._current = self._current, {}
+
+    def clear(self) -> None:
+        """Drops every entry, keeping the counters."""
+        self._current, self._previous = {}, {}
+
+class SearchStats:
+    """
+    Counters filled in by find_best_mixes.
+
+    Attributes
+    ----------
+    nodes_expanded : int
+        Partial mixes visited and kept, each one once per shallowest depth.
+    nodes_pruned : int
+        Partial mixes cut off, with everything below them, because their
+        upper bound could not reach the current top_k.
+    nodes_deduplicated : int
+        Partial mixes skipped because the same effects and last ingredient
+        were already visited with at least as many ingredients left.
+    brute_force_nodes : int
+        Ingredient orders a search without deduplication or pruning visits.
+    table_lookups : int
+        Transposition table lookups, nodes_deduplicated of them were hits.
+    table_evictions : int
+        Transposition table entries dropped to stay within its capacity.
+    """
+    def __init__(self) -> None:
+        self.nodes_expanded : int = 0
+        self.nodes_pruned : int = 0
+        self.nodes_deduplicated : int = 0
+        self.brute_force_nodes : int = 0
+        self.table_lookups : int = 0
+        self.table_evictions : int = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"SearchStats(nodes_expanded={self.nodes_expanded}, nodes_pruned={self.nodes_pruned}, "
+            f"nodes_deduplicated={self.nodes_deduplicated}, brute_force_nodes={self.brute_force_nodes}, "
+            f"table_hit_rate={self.table_hit_rate:.3f}, table_evictions={self.table_evictions})"
+        )
+
+    @property
+    def table_hit_rate(self) -> float:
+        """Share of transposition table lookups that found an expanded state."""
+        return self.nodes_deduplicated / self.table_lookups if self.table_lookups else 0.0
+
+    def add(self, other: 'SearchStats') -> None:
+        """Adds the search counters of another run, used to merge worker results."""
+        self.nodes_expanded += other.nodes_expanded
+        self.nodes_pruned += other.nodes_pruned
+        self.nodes_deduplicated += other.nodes_deduplicated
+        self.table_lookups += other.table_lookups
+        self.table_evictions += other.table_evictions
+
+def find_best_mixes(
+    compiled: CompiledCatalog,
+    depth: int = MAX_INGREDIENTS,
+    top_k: int = 10,
+    workers: int = 1,
+    prune: bool = True,
+    stats: Union[SearchStats, None] = None,
+    table_capacity: int = DEFAULT_TRANSPOSITION_CAPACITY
+) -> List[SearchResult]:
+    """
+    Searches every ingredient order of up to depth ingredients and returns the
+    top_k distinct effect sets by multiplier, each with the shortest order
+    found that produces it.
+
+    The search is a depth first walk over mix states. A state is the set of
+    effects in the mix together with the last ingredient added (which the next
+    ingredient may not repeat), and each state is only expanded from the
+    shallowest depth it is reached at, so the billions of orders collapse into
+    the few million states they actually produce. Expanded states are kept in
+    a TranspositionTable of table_capacity entries. Effect sets are stored as
+    bitmasks, see bitset.BitsetTables, which score an effect produced twice
+    once like Mix.get_multiplier (see catalog.distinct_multiplier).
+
+    With prune set the walk is also a branch and bound: once top_k effect
+    sets are known, a partial mix whose upper bound (see
+    bitset.BitsetTables.upper_bound) for the ingredients left falls below the
+    worst of them by more than rounding can make up is not expanded. The
+    results are the same as without pruning.
+
+    With more than one worker the orders are split into one contiguous group
+    of prefixes per worker, in lexicographic order, and the groups are
+    searched in a process pool that receives the compiled catalog once. A
+    worker walks its prefixes with a single transposition table, so states
+    are deduplicated across every prefix of its group, and the partial
+    results are merged here. Workers do not share their tables, so a state
+    reached from several groups is expanded once per group: the total work
+    grows with the number of workers rather than the number of prefixes, and
+    the speedup is below linear, see the README for measurements.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to search, see catalog.get_compiled_catalog.
+    depth : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+    top_k : int
+        Number of results to return.
+    workers : int
+        Number of processes to search with. 1 searches in this process.
+    prune : bool
+        Skip partial mixes that cannot reach the top_k.
+    stats : SearchStats | None
+        When given, its counters are set to the work the search did.
+    table_capacity : int
+        Maximum number of states each transposition table holds. A smaller
+        table uses less memory and expands forgotten states again.
+
+    Raises
+    ------
+    ValueError
+        If depth, top_k, workers or table_capacity is out of range.
+    InvalidEffectException
+        If an ingredient can produce an effect missing from the effects file.
+
+    Returns
+    -------
+    List[SearchResult]
+        Best mixes, highest multiplier first. Ties are broken by shorter and
+        then lexicographically smaller order.
+    """
+    _check_search_arguments(compiled, depth, top_k)
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+    if table_capacity < 2:
+        raise ValueError("table_capacity must be at least 2.")
+
+    run_stats = SearchStats()
+    if workers == 1:
+        best = _search_subtree(
+            BitsetTables(compiled), compiled.ingredients.tolist(), depth, top_k, [()], prune, run_stats,
+            table_capacity
+        )
+    else:
+        groups = _partition_prefixes(compiled.ingredients.tolist(), depth, workers)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_search_worker,
+            initargs=(compiled, depth, top_k, prune, table_capacity)
+        ) as executor:
+            partial = []
+            for entries, worker_stats in executor.map(_search_worker, groups):
+                partial.append(entries)
+                run_stats.add(worker_stats)
+        best = _merge_ranked(partial, top_k)
+
+        # Prefixes of two ingredients share their first one, possibly across
+        # workers, so the mixes along them are counted once here
+        run_stats.nodes_expanded += len({
+            prefix[:length] for group in groups for prefix in group for length in range(1, len(prefix) + 1)
+        })
+
+    if stats is not None:
+        n = len(compiled.ingredients)
+        stats.nodes_expanded = run_stats.nodes_expanded
+        stats.nodes_pruned = run_stats.nodes_pruned
+        stats.nodes_deduplicated = run_stats.nodes_deduplicated
+        stats.table_lookups = run_stats.table_lookups
+        stats.table_evictions = run_stats.table_evictions
+        stats.brute_force_nodes = sum(n * (n - 1) ** (length - 1) for length in range(1, depth + 1))
+
+    return [
+        SearchResult(order, mask_to_effects(state), multiplier)
+        for multiplier, order, state in best
+    ]
+
+def _search_subtree(
+    tables: BitsetTables,
+    ingredients: List[int],
+    depth: int,
+    top_k: int,
+    prefixes: List[Tuple[int, ...]],
+    prune: bool = True,
+    stats: Union[SearchStats, None] = None,
+    table_capacity: int = DEFAULT_TRANSPOSITION_CAPACITY
+) -> List[Tuple[float32, Tuple[int, ...], int]]:
+    """
+    Searches the orders starting with any of the prefixes, walked in the
+    order given with one shared transposition table, and returns the top_k
+    ranked (multiplier, order, state) entries, see find_best_mixes.
+    """
+    apply = tables.apply
+    upper_bound = tables.upper_bound
+    key_shift = max(tables.n_ingredients, 1).bit_length()
+
+    # Most ingredients left each (effects, last ingredient) state was expanded
+    # with, keyed by the effect mask and last ingredient packed into one int
+    table = TranspositionTable(table_capacity)
+    seen = table.seen
+    # Shortest order producing each effect set
+    best_orders: Dict[int, Tuple[int, ...]] = {}
+    # Unrounded values of the best top_k effect sets so far, worst first
+    best_values: List[float] = []
+    # Partial mixes bounded below this cannot reach the top_k
+    cutoff = [float('-inf')]
+    # Expanded and pruned partial mixes
+    counts = [0, 0]
+
+    def record(state: int, order: Tuple[int, ...]) -> None:
+        known = best_orders.get(state)
+        if known is None:
+            best_orders[state] = order
+            if len(best_values) < top_k:
+                heappush(best_values, tables.value(state))
+            else:
+                heappushpop(best_values, tables.value(state))
+            if prune and len(best_values) == top_k:
+                cutoff[0] = best_values[0] - BOUND_ROUNDING_SLACK
+        elif (len(order), order) < (len(known), known):
+            best_orders[state] = order
+
+    def expand(state: int, last: int, order: Tuple[int, ...]) -> None:
+        child_depth = len(order) + 1
+        for ingredient in ingredients:
+            if ingredient == last:
+                continue
+            child = apply(state, ingredient)
+
+            # Skip states already expanded with at least as much budget left
+            if seen((child << key_shift) | ingredient, depth - child_depth):
+                continue
+
+            # Nothing below can reach the top_k, and the cutoff only rises, so
+            # the same state reached later with less budget is skipped too
+            if prune and upper_bound(child, depth - child_depth) < cutoff[0]:
+                counts[1] += 1
+                continue
+
+            counts[0] += 1
+            child_order = order + (ingredient,)
+            record(child, child_order)
+            if child_depth < depth:
+                expand(child, ingredient, child_order)
+
+    for prefix in prefixes:
+        # Walk down the prefix, recording the mixes along it
+        state, last = 0, -1
+        for length, ingredient in enumerate(prefix, start=1):
+            state, last = apply(state, ingredient), ingredient
+            record(state, prefix[:length])
+        if len(prefix) < depth:
+            expand(state, last, prefix)
+
+    if stats is not None:
+        stats.nodes_expanded += counts[0]
+        stats.nodes_pruned += counts[1]
+        stats.nodes_deduplicated += table.hits
+        stats.table_lookups += table.hits + table.misses
+        stats.table_evictions += table.evictions
+
+    scored = (
+        (tables.multiplier(state), order, state) for state, order in best_orders.items()
+    )
+    return nlargest(top_k, scored, key=_rank_key)
+
+def _rank_key(item: Tuple[float32, Tuple[int, ...], int]) -> Tuple:
+    """Orders ranked entries by multiplier, then shorter, then smaller order."""
+    return (item[0], -len(item[1]), [-i for i in item[1]])
+
+def _merge_ranked(
+    partial: List[List[Tuple[float32, Tuple[int, ...], int]]],
+    top_k: int
+) -> List[Tuple[float32, Tuple[int, ...], int]]:
+    """Merges ranked entries from several searches, keeping the best order per state."""
+    merged: Dict[int, Tuple[float32, Tuple[int, ...], int]] = {}
+    for entries in partial:
+        for entry in entries:
+            known = merged.get(entry[2])
+            if known is None or _rank_key(entry) > _rank_key(known):
+                merged[entry[2]] = entry
+    return nlargest(top_k, merged.values(), key=_rank_key)
+
+def _partition_prefixes(ingredients: List[int], depth: int, workers: int) -> List[List[Tuple[int, ...]]]:
+    """
+    Splits the orders into prefixes of one ingredient, or of two when there
+    are too few ingredients to keep every worker busy, and deals them out in
+    lexicographic order as one contiguous group per worker.
+    """
+    prefixes = [(ingredient,) for ingredient in ingredients]
+    if depth > 1 and len(prefixes) < 2 * workers:
+        prefixes = [
+            (first, second) for first in ingredients for second in ingredients if first != second
+        ]
+    n_groups = min(workers, len(prefixes))
+    return [
+        prefixes[len(prefixes) * group // n_groups:len(prefixes) * (group + 1) // n_groups]
+        for group in range(n_groups)
+    ]
+
+# State of each search worker process, set once by _init_search_worker
+_worker_state : Dict[str, object] = {}
+
+def _init_search_worker(
+    compiled: CompiledCatalog,
+    depth: int,
+    top_k: int,
+    prune: bool,
+    table_capacity: int
+) -> None:
+    """Builds the bitset tables of a worker process from the shipped catalog."""
+    _worker_state['tables'] = BitsetTables(compiled)
+    _worker_state['ingredients'] = compiled.ingredients.tolist()
+    _worker_state['depth'] = depth
+    _worker_state['top_k'] = top_k
+    _worker_state['prune'] = prune
+    _worker_state['table_capacity'] = table_capacity
+
+def _search_worker(prefixes: List[Tuple[int, ...]]) -> Tuple[List[Tuple[float32, Tuple[int, ...], int]], SearchStats]:
+    """Searches one group of prefixes inside a worker process."""
+    stats = SearchStats()
+    entries = _search_subtree(
+        _worker_state['tables'],
+        _worker_state['ingredients'],
+        _worker_state['depth'],
+        _worker_state['top_k'],
+        prefixes,
+        _worker_state['prune'],
+        stats,
+        _worker_state['table_capacity']
+    )
+    return entries, stats
+
+def _check_search_arguments(compiled: CompiledCatalog, depth: int, top_k: int) -> None:
+    """Validates the common search arguments and the effects the catalog can produce."""
+    if not 1 <= depth <= MAX_INGREDIENTS:
+        raise ValueError(f"depth must be between 1 and {MAX_INGREDIENTS}.")
+    if top_k < 1:
+        raise ValueError("top_k must be at least 1.")
+
+    # Every effect an ingredient can produce must have a value
+    for effect in sorted(_reachable_effects(compiled)):
+        if not compiled.effect_valid[effect]:
+            raise InvalidEffectException(uint16(effect))
+
+def _reachable_effects(compiled: CompiledCatalog) -> Set[int]:
+    """Returns every effect some order of ingredients can put in a mix."""
+    reachable = set(compiled.effect_given[compiled.ingredients].tolist())
+    frontier = list(reachable)
+    while frontier:
+        current = frontier.pop()
+        for target in compiled.transitions[compiled.ingredients, current].tolist():
+            if target not in reachable:
+                reachable.add(target)
+                frontier.append(target)
+    return reachable
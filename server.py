@@ -0,0 +1,429 @@
+import asyncio
+import catalog
+import search
+
+from argparse import ArgumentParser
+from batch import EMPTY_SLOT, score_batch
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from json import JSONDecodeError, dumps, loads
+from mix import MAX_INGREDIENTS, MixException
+from numpy import full, uint16
+from os import path
+from typing import Any, Dict, List, Set, Tuple, Union
+
+# Paths to the shipped catalogs
+INGREDIENTS_JSON : str = path.join(path.dirname(__file__), "assets/ingredients.json")
+EFFECTS_JSON : str = path.join(path.dirname(__file__), "assets/effects.json")
+
+# Scoring requests arriving within this many seconds of each other share one batch
+DEFAULT_BATCH_WINDOW : float = 0.002
+# A batch is scored right away once it holds this many sequences
+DEFAULT_MAX_BATCH_ROWS : int = 4096
+
+class RequestError(Exception):
+    """
+    Raised when a request is malformed. The message is sent back to the client.
+    """
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+class RecipeServer:
+    """
+    Asyncio query service answering line-delimited JSON requests over TCP.
+
+    The catalogs are compiled once when the server is created. Every line a
+    client sends is one JSON object with an 'op' and an optional 'id' echoed
+    in the reply, and replies are written as one JSON object per line as
+    soon as each request is answered, so clients may pipeline requests.
+
+    - {"op": "score", "order": [...]} replies with the multiplier and
+      effects of the order, exactly like Mix.
+    - {"op": "next", "order": [...], "k": 3} replies with the k ingredients
+      whose addition gives the highest multiplier, as [ingredient, multiplier]
+      pairs.
+    - {"op": "search", "depth": 8, "top_k": 10} replies with
+      search.find_best_mixes results. Every operation counts each distinct
+      effect once, so scoring the order of a result gives its multiplier.
+
+    Score and next requests are not evaluated one by one: the sequences of
+    every such request arriving within batch_window seconds are gathered and
+    scored together with one batch.score_batch call. Searches run in a pool
+    of worker processes, so the event loop keeps answering other clients
+    while they run. Malformed requests get {"error": message}.
+
+    Attributes
+    ----------
+    compiled : CompiledCatalog
+        Catalog every request is answered with.
+    batches_scored : int
+        Number of score_batch calls made.
+    rows_scored : int
+        Number of sequences scored.
+    """
+    def __init__(
+        self,
+        ingredients_file_path: str = INGREDIENTS_JSON,
+        effects_file_path: str = EFFECTS_JSON,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch_rows: int = DEFAULT_MAX_BATCH_ROWS,
+        search_workers: int = 1
+    ) -> None:
+        """
+        __init__ (dunder method)
+
+        Parameters
+        ----------
+        ingredients_file_path : str
+            Path to the ingredients JSON file.
+        effects_file_path : str
+            Path to the effects JSON file.
+        batch_window : float
+            Seconds to wait for more sequences before scoring a batch.
+        max_batch_rows : int
+            Number of sequences that triggers scoring a batch immediately.
+        search_workers : int
+            Number of processes running searches.
+
+        Raises
+        ------
+        ValueError
+            If batch_window is negative or max_batch_rows or search_workers is
+            less than 1. See also catalog.get_compiled_catalog.
+        """
+        if batch_window < 0:
+            raise ValueError("batch_window must not be negative.")
+        if max_batch_rows < 1:
+            raise ValueError("max_batch_rows must be at least 1.")
+        if search_workers < 1:
+            raise ValueError("search_workers must be at least 1.")
+
+        self.compiled : catalog.CompiledCatalog = catalog.get_compiled_catalog(ingredients_file_path, effects_file_path)
+        self.batch_window : float = batch_window
+        self.max_batch_rows : int = max_batch_rows
+        self.batches_scored : int = 0
+        self.rows_scored : int = 0
+
+        self._search_workers : int = search_workers
+        self._executor : Union[ProcessPoolExecutor, None] = None
+        self._server : Union[asyncio.AbstractServer, None] = None
+        self._tasks : Set[asyncio.Task] = set()
+
+        # Sequences waiting to be scored and the futures waiting for them
+        self._pending_rows : List[Tuple[int, ...]] = []
+        self._pending_futures : List[Tuple[asyncio.Future, int, int]] = []
+        self._flush_handle : Union[asyncio.TimerHandle, None] = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> Tuple[str, int]:
+        """
+        Starts listening for clients.
+
+        Parameters
+        ----------
+        host : str
+            Address to listen on.
+        port : int
+            Port to listen on, 0 picks a free one.
+
+        Returns
+        -------
+        Tuple[str, int]
+            Address and port the server listens on.
+        """
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        """Serves clients until cancelled."""
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stops listening, finishes answering pending requests and stops the workers."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            # Joining the workers blocks, so wait for it outside the event loop
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def handle_request(self, request: Any) -> Dict[str, Any]:
+        """
+        Answers one decoded request, see the class docstring for the operations.
+
+        Parameters
+        ----------
+        request : Any
+            Decoded JSON request.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Reply, holding 'error' if the request could not be answered.
+        """
+        reply: Dict[str, Any] = {}
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("Request must be a JSON object.")
+            if 'id' in request:
+                reply['id'] = request['id']
+
+            op = request.get('op')
+            if op == 'score':
+                multiplier, effects = await self.score(_order(request))
+                reply.update({'multiplier': multiplier, 'effects': effects})
+            elif op == 'next':
+                reply['ingredients'] = await self.best_next(_order(request), _integer(request, 'k', 1))
+            elif op == 'search':
+                reply['results'] = await self.search(
+                    _integer(request, 'depth', int(MAX_INGREDIENTS)), _integer(request, 'top_k', 10)
+                )
+            else:
+                raise RequestError(f"Unknown op: {op!r}")
+        except (RequestError, MixException, ValueError) as e:
+            reply['error'] = str(e)
+        return reply
+
+    async def score(self, order: List[int]) -> Tuple[float, List[int]]:
+        """
+        Scores one ingredient order through the next batch.
+
+        Raises
+        ------
+        MixException
+            If the order is not a valid mix.
+
+        Returns
+        -------
+        Tuple[float, List[int]]
+            Multiplier and effects of the order.
+        """
+        self._check_order(order)
+        multipliers, effects = await self._enqueue([tuple(order)])
+        return multipliers[0], effects[0]
+
+    async def best_next(self, order: List[int], k: int = 1) -> List[List[Union[int, float]]]:
+        """
+        Scores every ingredient that can follow an order through the next
+        batch and returns the best k as [ingredient, multiplier] pairs, highest
+        multiplier first and ties broken by lower ingredient ID.
+
+        Raises
+        ------
+        MixException
+            If the order is not a valid mix or already holds MAX_INGREDIENTS.
+        RequestError
+            If k is less than 1.
+        """
+        self._check_order(order)
+        if len(order) == MAX_INGREDIENTS:
+            raise RequestError("The mix already holds the maximum number of ingredients.")
+        if k < 1:
+            raise RequestError("k must be at least 1.")
+
+        candidates = [i for i in self.compiled.ingredients.tolist() if not order or i != order[-1]]
+        multipliers, _ = await self._enqueue([tuple(order) + (i,) for i in candidates])
+        ranked = sorted(zip(candidates, multipliers), key=lambda pair: (-pair[1], pair[0]))
+        return [[ingredient, multiplier] for ingredient, multiplier in ranked[:k]]
+
+    async def search(self, depth: int, top_k: int) -> List[Dict[str, Any]]:
+        """
+        Runs search.find_best_mixes in the worker pool.
+
+        Raises
+        ------
+        ValueError
+            If depth or top_k is out of range.
+        RequestError
+            If a worker process died during the search.
+        """
+        search._check_search_arguments(self.compiled, depth, top_k)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._search_workers,
+                initializer=_init_search_process,
+                initargs=(self.compiled,)
+            )
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self._executor, _search_process, depth, top_k)
+        except BrokenProcessPool as e:
+            # Start a fresh pool for the next search
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            raise RequestError("A search worker stopped unexpectedly.") from e
+        return [
+            {'order': list(order), 'effects': list(effects), 'multiplier': multiplier}
+            for order, effects, multiplier in results
+        ]
+
+    def _check_order(self, order: List[int]) -> None:
+        """Validates an order up front so it cannot fail a whole batch."""
+        compiled = self.compiled
+        if len(order) > MAX_INGREDIENTS:
+            raise RequestError(f"An order holds at most {MAX_INGREDIENTS} ingredients.")
+        for position, ingredient in enumerate(order):
+            if not (0 <= ingredient < compiled.n_ingredients and compiled.ingredient_valid[ingredient]):
+                raise RequestError(f"Invalid ingredient: {ingredient}")
+            if position > 0 and order[position - 1] == ingredient:
+                raise RequestError(f"Duplicate ingredient: {ingredient}")
+
+    def _enqueue(self, rows: List[Tuple[int, ...]]) -> asyncio.Future:
+        """Adds sequences to the pending batch and returns a future of their scores."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        start = len(self._pending_rows)
+        self._pending_rows.extend(rows)
+        self._pending_futures.append((future, start, len(rows)))
+
+        if len(self._pending_rows) >= self.max_batch_rows:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        """Scores every pending sequence with one batch and resolves their futures."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        rows, futures = self._pending_rows, self._pending_futures
+        self._pending_rows, self._pending_futures = [], []
+        if not rows:
+            return
+
+        try:
+            multipliers, effects = self._score_rows(rows)
+        except MixException:
+            # Only a catalog problem can fail a batch, score alone to find out who
+            for future, start, count in futures:
+                if future.cancelled():
+                    continue
+                try:
+                    result = self._score_rows(rows[start:start + count])
+                except MixException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            return
+
+        for future, start, count in futures:
+            if not future.cancelled():
+                future.set_result((multipliers[start:start + count], effects[start:start + count]))
+
+    def _score_rows(self, rows: List[Tuple[int, ...]]) -> Tuple[List[float], List[List[int]]]:
+        """Scores sequences of any length with one score_batch call."""
+        width = max(len(row) for row in rows)
+        sequences = full((len(rows), width), EMPTY_SLOT, dtype=uint16)
+        for index, row in enumerate(rows):
+            sequences[index, :len(row)] = row
+        multipliers, effects = score_batch(self.compiled, sequences)
+        self.batches_scored += 1
+        self.rows_scored += len(rows)
+        return (
+            [round(float(multiplier), 2) for multiplier in multipliers],
+            [[effect for effect in row if effect != EMPTY_SLOT] for row in effects.tolist()]
+        )
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Reads requests from one client and answers each as soon as it is done."""
+        tasks: Set[asyncio.Task] = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # The rest of an overlong line cannot be told apart from
+                    # the next request, so answer and stop reading
+                    writer.write(dumps({'error': "Request line is too long."}).encode() + b'\n')
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._answer(line, writer))
+                tasks.add(task)
+                self._tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(self._tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        """Decodes one request line and writes its reply line."""
+        try:
+            request = loads(line)
+        except (JSONDecodeError, UnicodeDecodeError):
+            reply: Dict[str, Any] = {'error': "Request is not valid JSON."}
+        else:
+            reply = await self.handle_request(request)
+        if not writer.is_closing():
+            writer.write(dumps(reply).encode() + b'\n')
+            await writer.drain()
+
+def _order(request: Dict[str, Any]) -> List[int]:
+    """Returns the ingredient order of a request."""
+    order = request.get('order', [])
+    if not isinstance(order, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in order):
+        raise RequestError("order must be a list of ingredient IDs.")
+    return order
+
+def _integer(request: Dict[str, Any], key: str, default: int) -> int:
+    """Returns an integer field of a request."""
+    value = request.get(key, default)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise RequestError(f"{key} must be an integer.")
+    return value
+
+# Catalog of each search worker process, set once by _init_search_process
+_search_state : Dict[str, Any] = {}
+
+def _init_search_process(compiled: catalog.CompiledCatalog) -> None:
+    """Keeps the compiled catalog the server sent once per search worker process."""
+    _search_state['compiled'] = compiled
+
+def _search_process(depth: int, top_k: int) -> List[Tuple[Tuple[int, ...], Tuple[int, ...], float]]:
+    """Runs one search inside a worker process."""
+    return [
+        (result.order, result.effects, round(float(result.multiplier), 2))
+        for result in search.find_best_mixes(_search_state['compiled'], depth=depth, top_k=top_k)
+    ]
+
+def main(arguments: Union[List[str], None] = None) -> int:
+    """Command line entry point serving the shipped or given catalogs."""
+    parser = ArgumentParser(description="Serve recipe queries as line-delimited JSON over TCP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ingredients', default=INGREDIENTS_JSON)
+    parser.add_argument('--effects', default=EFFECTS_JSON)
+    parser.add_argument('--batch-window', type=float, default=DEFAULT_BATCH_WINDOW)
+    parser.add_argument('--search-workers', type=int, default=1)
+    options = parser.parse_args(arguments)
+
+    async def run() -> None:
+        server = RecipeServer(
+            options.ingredients, options.effects,
+            batch_window=options.batch_window, search_workers=options.search_workers
+        )
+        host, port = await server.start(options.host, options.port)
+        print(f"Serving on {host}:{port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,368 @@
+import catalog
+
+from argparse import ArgumentParser
+from bitset import BitsetTables, effects_to_mask, mask_to_effects, unique_pairs
+from catalog import CompiledCatalog
+from frontier import expand_children
+from hashlib import sha256
+from mix import MAX_INGREDIENTS, DuplicateIngredientException, InvalidIngredientException
+from mmap import ACCESS_READ, mmap
+from numpy import (
+    arange, array, concatenate, dtype, float32, frombuffer, full, int32, int64,
+    minimum, searchsorted, uint8, uint64, unique
+)
+from numpy.typing import NDArray
+from os import path, replace
+from search import _check_search_arguments
+from struct import pack, unpack_from
+from typing import Iterable, List, Tuple, Union
+
+# Layout of the file header, padded so every section starts 8 byte aligned
+STATE_GRAPH_MAGIC : bytes = b'S1SG'
+STATE_GRAPH_VERSION : int = 1
+_HEADER_FORMAT : str = '<4sIQIII32s'
+_HEADER_SIZE : int = 64
+
+# Marks a transition to a state outside the graph
+NO_STATE : int = -1
+
+class StateGraphException(Exception):
+    """
+    Raised when a state graph file is malformed or a query leaves the graph.
+    """
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+def catalog_fingerprint(compiled: CompiledCatalog) -> bytes:
+    """
+    Returns a SHA-256 digest of the tables a state graph is built from, used
+    to tell whether a graph file still matches a catalog.
+    """
+    digest = sha256()
+    for table in (
+        compiled.transitions, compiled.effect_given, compiled.effect_values,
+        compiled.ingredient_valid, compiled.effect_valid
+    ):
+        digest.update(str(table.dtype).encode())
+        digest.update(str(table.shape).encode())
+        digest.update(table.tobytes())
+    return digest.digest()
+
+def build_state_graph(
+    compiled: CompiledCatalog,
+    file_path: str,
+    depth: int = MAX_INGREDIENTS
+) -> int:
+    """
+    Enumerates every effect set reachable within depth ingredients and writes
+    the state table, the transition of every state by every ingredient and
+    every multiplier to a flat binary file that StateGraph maps read-only.
+
+    Effects are tracked as sets like in search.find_best_mixes. The file holds,
+    after a 64 byte header, the sorted uint64 effect masks, their float32
+    multipliers, the uint8 fewest ingredients reaching each of them and an
+    int32 matrix of shape (states, ingredients) holding the index of the state
+    every ingredient leads to, or NO_STATE when that state is not in the graph.
+    The file is written next to its final path and renamed into place, so
+    readers never map a partially written graph.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to build from, see catalog.get_compiled_catalog.
+    file_path : str
+        Path of the binary file to write.
+    depth : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+
+    Raises
+    ------
+    ValueError
+        If depth is out of range.
+    InvalidEffectException
+        If an ingredient can produce an effect missing from the effects file.
+
+    Returns
+    -------
+    int
+        Number of states in the graph.
+    """
+    _check_search_arguments(compiled, depth, 1)
+    tables = BitsetTables(compiled)
+    ingredients = compiled.ingredients.astype(int64)
+
+    # Walk the depths over (effects, last ingredient) pairs, as the next
+    # ingredient may not repeat the last one
+    layer_states = array([0], dtype=uint64)
+    layer_lasts = array([-1], dtype=int64)
+    reached_states: List[NDArray[uint64]] = [layer_states]
+    reached_depths: List[NDArray[uint8]] = [array([0], dtype=uint8)]
+    for step in range(1, depth + 1):
+        child_states, child_lasts, _ = expand_children(tables, layer_states, layer_lasts, ingredients)
+        first = unique_pairs(child_states, child_lasts)
+        layer_states, layer_lasts = child_states[first], child_lasts[first]
+        reached_states.append(layer_states)
+        reached_depths.append(full(len(layer_states), step, dtype=uint8))
+
+    # One entry per effect set, keeping the fewest ingredients reaching it
+    all_states = concatenate(reached_states)
+    all_depths = concatenate(reached_depths)
+    states, inverse = unique(all_states, return_inverse=True)
+    min_depths = full(len(states), depth, dtype=uint8)
+    minimum.at(min_depths, inverse, all_depths)
+
+    # Transition of every state by every ingredient, looked up in the sorted table
+    transitions = full((len(states), compiled.n_ingredients), NO_STATE, dtype=int32)
+    for ingredient in ingredients:
+        children = tables.apply_many(states, int(ingredient))
+        indices = minimum(searchsorted(states, children), len(states) - 1)
+        found = states[indices] == children
+        transitions[found, ingredient] = indices[found]
+
+    multipliers = tables.multipliers(states).astype(float32)
+
+    header = pack(
+        _HEADER_FORMAT, STATE_GRAPH_MAGIC, STATE_GRAPH_VERSION, len(states),
+        compiled.n_ingredients, compiled.n_effects, depth, catalog_fingerprint(compiled)
+    )
+    temporary_path = file_path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(header.ljust(_HEADER_SIZE, b'\0'))
+        for section in (states, multipliers, min_depths, transitions):
+            file.write(section.tobytes())
+            file.write(b'\0' * (-section.nbytes % 8))
+    replace(temporary_path, file_path)
+    return len(states)
+
+class StateGraph:
+    """
+    Read-only view of a state graph file written by build_state_graph.
+
+    The file is mapped into memory rather than read, so opening it costs no
+    parsing, and every process mapping the same file shares one copy of it in
+    the page cache. Arrays are views of the mapping and cannot be written.
+
+    Attributes
+    ----------
+    depth : int
+        Maximum number of ingredients the graph was built for.
+    n_ingredients : int
+        Number of ingredient IDs, including gaps.
+    n_effects : int
+        Number of effect IDs, including gaps.
+    fingerprint : bytes
+        Digest of the catalog the graph was built from, see catalog_fingerprint.
+    states : NDArray[uint64]
+        Sorted effect masks.
+    multipliers : NDArray[float32]
+        Multiplier of every state.
+    min_depths : NDArray[uint8]
+        Fewest ingredients reaching every state.
+    transitions : NDArray[int32]
+        State index every ingredient leads to from every state, or NO_STATE.
+    """
+    def __init__(self, file_path: str) -> None:
+        """
+        __init__ (dunder method)
+
+        Parameters
+        ----------
+        file_path : str
+            Path of a file written by build_state_graph.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the file does not exist.
+        StateGraphException
+            If the file is not a state graph or is truncated.
+        """
+        if not path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        with open(file_path, 'rb') as file:
+            if path.getsize(file_path) < _HEADER_SIZE:
+                raise StateGraphException(f"File is not a state graph: {file_path}")
+            self._buffer : mmap = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        magic, version, n_states, n_ingredients, n_effects, depth, fingerprint = unpack_from(
+            _HEADER_FORMAT, self._buffer, 0
+        )
+        if magic != STATE_GRAPH_MAGIC:
+            self.close()
+            raise StateGraphException(f"File is not a state graph: {file_path}")
+        if version != STATE_GRAPH_VERSION:
+            self.close()
+            raise StateGraphException(f"Unsupported state graph version {version}: {file_path}")
+
+        self.depth : int = depth
+        self.n_ingredients : int = n_ingredients
+        self.n_effects : int = n_effects
+        self.fingerprint : bytes = fingerprint
+
+        # Every section is a view of the mapping
+        offset = _HEADER_SIZE
+        sections = []
+        for section_dtype, shape in (
+            (uint64, (n_states,)),
+            (float32, (n_states,)),
+            (uint8, (n_states,)),
+            (int32, (n_states, n_ingredients))
+        ):
+            count = n_states * (n_ingredients if len(shape) == 2 else 1)
+            size = count * dtype(section_dtype).itemsize
+            if offset + size > len(self._buffer):
+                self.close()
+                raise StateGraphException(f"State graph file is truncated: {file_path}")
+            sections.append(frombuffer(self._buffer, dtype=section_dtype, count=count, offset=offset).reshape(shape))
+            offset += size + (-size % 8)
+
+        self.states : NDArray[uint64] = sections[0]
+        self.multipliers : NDArray[float32] = sections[1]
+        self.min_depths : NDArray[uint8] = sections[2]
+        self.transitions : NDArray[int32] = sections[3]
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __enter__(self) -> 'StateGraph':
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Releases the mapping. Arrays taken from the graph must not be used
+        afterwards.
+        """
+        self.states = self.multipliers = self.min_depths = self.transitions = None
+        try:
+            self._buffer.close()
+        except BufferError:
+            # Views handed out are still alive, the mapping goes with them
+            pass
+
+    def matches(self, compiled: CompiledCatalog) -> bool:
+        """Returns whether the graph was built from the given catalog."""
+        return self.fingerprint == catalog_fingerprint(compiled)
+
+    def index_of(self, effects: Iterable[int]) -> int:
+        """
+        Returns the index of an effect set in the graph.
+
+        Raises
+        ------
+        StateGraphException
+            If the effect set is not in the graph.
+        """
+        state = effects_to_mask(effects)
+        index = int(searchsorted(self.states, uint64(state)))
+        if index == len(self.states) or int(self.states[index]) != state:
+            raise StateGraphException(f"Effects {mask_to_effects(state)} are not in the state graph.")
+        return index
+
+    def state_after(self, order: Iterable[int]) -> int:
+        """
+        Follows an ingredient order from the empty mix.
+
+        Parameters
+        ----------
+        order : Iterable[int]
+            Ingredient IDs in the order they are added.
+
+        Raises
+        ------
+        InvalidIngredientException
+            If an ingredient is missing from the catalog.
+        DuplicateIngredientException
+            If the same ingredient is added twice in a row.
+        StateGraphException
+            If the order is longer than depth. States reached within depth
+            ingredients are merged across depths, so a longer order could
+            otherwise keep following transitions past the depth the graph
+            was built for.
+
+        Returns
+        -------
+        int
+            Index of the state the order reaches.
+        """
+        index, last = 0, None
+        for step, ingredient in enumerate(order, start=1):
+            if step > self.depth:
+                raise StateGraphException(f"Order is longer than the depth {self.depth} of the state graph.")
+            ingredient = int(ingredient)
+            # Every ingredient in the catalog leads somewhere from the empty mix
+            if not 0 <= ingredient < self.n_ingredients or self.transitions[0, ingredient] == NO_STATE:
+                raise InvalidIngredientException(ingredient)
+            if ingredient == last:
+                raise DuplicateIngredientException(ingredient)
+            index = int(self.transitions[index, ingredient])
+            if index == NO_STATE:
+                raise StateGraphException(f"Order leaves the state graph built for depth {self.depth}.")
+            last = ingredient
+        return index
+
+    def effects_after(self, order: Iterable[int]) -> Tuple[int, ...]:
+        """Returns the effect IDs after an ingredient order in ascending order, see state_after."""
+        return mask_to_effects(int(self.states[self.state_after(order)]))
+
+    def multiplier_after(self, order: Iterable[int]) -> float32:
+        """Returns the multiplier after an ingredient order, see state_after."""
+        return self.multipliers[self.state_after(order)]
+
+    def best_next(self, order: Iterable[int], k: int = 1) -> List[Tuple[int, float32]]:
+        """
+        Ranks the ingredients that can be added after an order by the
+        multiplier of the mix they lead to.
+
+        Parameters
+        ----------
+        order : Iterable[int]
+            Ingredient IDs added so far.
+        k : int
+            Number of ingredients to return.
+
+        Raises
+        ------
+        See state_after.
+
+        Returns
+        -------
+        List[Tuple[int, float32]]
+            Up to k (ingredient, multiplier) pairs, highest multiplier first and
+            ties broken by lower ingredient ID. Ingredients leading out of the
+            graph and the last ingredient of the order are left out, and
+            nothing is returned once the order holds depth ingredients.
+        """
+        order = [int(ingredient) for ingredient in order]
+        index = self.state_after(order)
+        if len(order) == self.depth:
+            return []
+        children = self.transitions[index]
+        candidates = arange(self.n_ingredients)[children != NO_STATE]
+        if order:
+            candidates = candidates[candidates != order[-1]]
+        ranked = sorted(
+            ((int(ingredient), self.multipliers[children[ingredient]]) for ingredient in candidates),
+            key=lambda pair: (-pair[1], pair[0])
+        )
+        return ranked[:k]
+
+def main(arguments: Union[List[str], None] = None) -> int:
+    """Command line entry point building a state graph from a pair of catalogs."""
+    parser = ArgumentParser(description="Build the reachable effect state graph of a catalog.")
+    parser.add_argument('output', help="Path of the binary file to write.")
+    parser.add_argument('--ingredients', default=path.join(path.dirname(__file__), "assets/ingredients.json"))
+    parser.add_argument('--effects', default=path.join(path.dirname(__file__), "assets/effects.json"))
+    parser.add_argument('--depth', type=int, default=int(MAX_INGREDIENTS), help="Maximum number of ingredients.")
+    options = parser.parse_args(arguments)
+
+    compiled = catalog.get_compiled_catalog(options.ingredients, options.effects)
+    n_states = build_state_graph(compiled, options.output, options.depth)
+    print(f"Wrote {n_states} states to {options.output}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,229 @@
+from bitset import BOUND_ROUNDING_SLACK, BitsetTables, effects_to_mask, mask_to_effects
+from catalog import CompiledCatalog
+from json import dumps
+from mix import MAX_INGREDIENTS, InvalidEffectException, InvalidIngredientException
+from numpy import float32
+from search import SearchResult, _check_search_arguments
+from typing import Iterable, Iterator, List, Tuple, Union
+
+def iter_mixes(
+    compiled: CompiledCatalog,
+    depth: int = MAX_INGREDIENTS,
+    min_multiplier: Union[float, None] = None,
+    required_effects: Iterable[int] = (),
+    forbidden_effects: Iterable[int] = (),
+    allowed_ingredients: Union[Iterable[int], None] = None
+) -> Iterator[SearchResult]:
+    """
+    Lazily yields every ingredient order of up to depth ingredients whose
+    finished mix passes the filters, as soon as it is reached.
+
+    Orders are walked depth first with an explicit stack, shorter orders
+    before their extensions and ingredients in ascending ID order, so memory
+    stays bounded by depth however many orders are produced. The filters are
+    checked on every partial mix before its branch is entered:
+
+    - min_multiplier: skipped when the upper bound on anything the branch can
+      still reach (see bitset.BitsetTables.upper_bound) is below it by more
+      than rounding can make up.
+    - required_effects: skipped when a required effect can no longer appear
+      within the ingredients left.
+    - forbidden_effects: skipped when the mix holds a forbidden effect that
+      no allowed ingredient ever transforms.
+    - allowed_ingredients: other ingredients are never added.
+
+    Pruned branches are never expanded. Effects are tracked as sets like in
+    search.find_best_mixes, and unlike that search every order is yielded,
+    including orders that reach the same effects.
+
+    Parameters
+    ----------
+    compiled : CompiledCatalog
+        Catalog to enumerate, see catalog.get_compiled_catalog.
+    depth : int
+        Maximum number of ingredients, from 1 to MAX_INGREDIENTS.
+    min_multiplier : float | None
+        Smallest multiplier yielded.
+    required_effects : Iterable[int]
+        Effect IDs every yielded mix contains.
+    forbidden_effects : Iterable[int]
+        Effect IDs no yielded mix contains.
+    allowed_ingredients : Iterable[int] | None
+        Ingredient IDs that may be used. Defaults to every ingredient.
+
+    Raises
+    ------
+    ValueError
+        If depth is out of range.
+    InvalidEffectException
+        If a filter names an effect missing from the effects file, or an
+        ingredient can produce one.
+    InvalidIngredientException
+        If allowed_ingredients names an ingredient missing from the catalog.
+
+    Returns
+    -------
+    Iterator[SearchResult]
+        Generator of matching mixes.
+    """
+    _check_search_arguments(compiled, depth, 1)
+    required = effects_to_mask(_check_effects(compiled, required_effects))
+    forbidden = effects_to_mask(_check_effects(compiled, forbidden_effects))
+    if allowed_ingredients is None:
+        ingredients: List[int] = compiled.ingredients.tolist()
+    else:
+        ingredients = sorted({int(ingredient) for ingredient in allowed_ingredients})
+        for ingredient in ingredients:
+            if not (0 <= ingredient < compiled.n_ingredients and compiled.ingredient_valid[ingredient]):
+                raise InvalidIngredientException(ingredient)
+
+    return _walk(compiled, depth, min_multiplier, required, forbidden, ingredients)
+
+def _walk(
+    compiled: CompiledCatalog,
+    depth: int,
+    min_multiplier: Union[float, None],
+    required: int,
+    forbidden: int,
+    ingredients: List[int]
+) -> Iterator[SearchResult]:
+    """Generator behind iter_mixes, split out so arguments are checked on the call."""
+    tables = BitsetTables(compiled)
+    apply = tables.apply
+    threshold = None if min_multiplier is None else float32(min_multiplier)
+    cutoff = None if threshold is None else float(threshold) - BOUND_ROUNDING_SLACK
+    reach = _ReachTables(compiled, ingredients, depth) if required else None
+
+    # Forbidden effects no allowed ingredient transforms stay in the mix for good
+    permanent = 0
+    for effect in range(compiled.n_effects):
+        if forbidden >> effect & 1 and all(compiled.transitions[i, effect] == effect for i in ingredients):
+            permanent |= 1 << effect
+
+    # Frame i holds the state after the first i ingredients of order and the
+    # position of the next ingredient to try from it
+    order: List[int] = []
+    states: List[int] = [0]
+    positions: List[int] = [0]
+    while positions:
+        level = len(order)
+        if level == depth or positions[-1] == len(ingredients):
+            positions.pop()
+            states.pop()
+            if level:
+                order.pop()
+            continue
+
+        ingredient = ingredients[positions[-1]]
+        positions[-1] += 1
+        if level and ingredient == order[-1]:
+            continue
+        child = apply(states[-1], ingredient)
+        remaining = depth - level - 1
+
+        # Prune branches that cannot produce a match anywhere below
+        if child & permanent:
+            continue
+        if reach is not None and required & ~reach.possible(child, remaining):
+            continue
+        if cutoff is not None and tables.upper_bound(child, remaining) < cutoff:
+            continue
+
+        order.append(ingredient)
+        states.append(child)
+        positions.append(0)
+
+        if child & required != required or child & forbidden:
+            continue
+        multiplier = tables.multiplier(child)
+        if threshold is None or multiplier >= threshold:
+            yield SearchResult(tuple(order), mask_to_effects(child), multiplier)
+
+def write_mixes(file_path: str, mixes: Iterable[SearchResult]) -> int:
+    """
+    Writes mixes to a file as they are produced, one JSON object per line
+    with the keys order, effects and multiplier.
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the file to write.
+    mixes : Iterable[SearchResult]
+        Mixes to write, for example from iter_mixes.
+
+    Returns
+    -------
+    int
+        Number of mixes written.
+    """
+    count = 0
+    with open(file_path, 'w') as file:
+        for result in mixes:
+            file.write(dumps({
+                'order': list(result.order),
+                'effects': list(result.effects),
+                'multiplier': round(float(result.multiplier), 2)
+            }) + '\n')
+            count += 1
+    return count
+
+def _check_effects(compiled: CompiledCatalog, effects: Iterable[int]) -> List[int]:
+    """Validates effect IDs given to a filter."""
+    checked = sorted({int(effect) for effect in effects})
+    for effect in checked:
+        if not (0 <= effect < compiled.n_effects and compiled.effect_valid[effect]):
+            raise InvalidEffectException(effect)
+    return checked
+
+class _ReachTables:
+    """
+    Masks of the effects a mix can still contain after a number of further
+    ingredients, looked up one byte of the state at a time like
+    bitset.BitsetTables.
+    """
+    def __init__(self, compiled: CompiledCatalog, ingredients: List[int], depth: int) -> None:
+        n_effects = compiled.n_effects
+        self._shifts : List[Tuple[int, int]] = [(byte, byte * 8) for byte in range((n_effects + 7) // 8)]
+
+        # Effects each effect can turn into within r ingredients, itself included
+        reach: List[List[int]] = [[1 << effect for effect in range(n_effects)]]
+        for _ in range(depth):
+            previous = reach[-1]
+            reach.append([
+                previous[effect] | _union(previous[int(compiled.transitions[i, effect])] for i in ingredients)
+                for effect in range(n_effects)
+            ])
+
+        # Effects the ingredients added within r steps can leave in the mix
+        given = [int(compiled.effect_given[i]) for i in ingredients]
+        self._given : List[int] = [
+            _union(reach[remaining - step][effect] for step in range(1, remaining + 1) for effect in given)
+            for remaining in range(depth + 1)
+        ]
+
+        self._tables : List[List[List[int]]] = []
+        for masks in reach:
+            per_byte = []
+            for byte, shift in self._shifts:
+                row = [0] * 256
+                for value in range(1, 256):
+                    low = value & -value
+                    effect = shift + low.bit_length() - 1
+                    row[value] = row[value ^ low] | (masks[effect] if effect < n_effects else 0)
+                per_byte.append(row)
+            self._tables.append(per_byte)
+
+    def possible(self, state: int, remaining: int) -> int:
+        """Returns the mask of effects the mix can hold after up to remaining more ingredients."""
+        rows = self._tables[remaining]
+        mask = self._given[remaining]
+        for byte, shift in self._shifts:
+            mask |= rows[byte][(state >> shift) & 255]
+        return mask
+
+def _union(masks: Iterable[int]) -> int:
+    """ORs masks together."""
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
@@ -0,0 +1,136 @@
+from numpy import array, float32, random, uint16
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import batch
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import batch
+import bitset
+import catalog
+import mix
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredient_invalid_effect_correlation.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+ASSET_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/ingredients.json"
+)
+ASSET_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/effects.json"
+)
+
+def random_sequences(n_ingredients, n_rows, seed):
+    """Builds padded random sequences with no ingredient repeated back to back."""
+    generator = random.default_rng(seed)
+    sequences = array([[batch.EMPTY_SLOT] * mix.MAX_INGREDIENTS] * n_rows, dtype=uint16)
+    for row in range(n_rows):
+        last = None
+        for step in range(generator.integers(1, mix.MAX_INGREDIENTS + 1)):
+            ingredient = generator.integers(0, n_ingredients)
+            while ingredient == last:
+                ingredient = generator.integers(0, n_ingredients)
+            sequences[row, step] = last = ingredient
+    return sequences
+
+def test_score_batch_matches_mix():
+    """Ensure every row scores exactly like replaying it through Mix."""
+    compiled = catalog.get_compiled_catalog(ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON)
+    sequences = random_sequences(compiled.n_ingredients, 200, 0)
+    multipliers, effects = batch.score_batch(compiled, sequences)
+
+    assert multipliers.dtype == float32
+    assert effects.dtype == uint16
+    for row in range(sequences.shape[0]):
+        mix_instance = mix.Mix(ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON)
+        for ingredient in sequences[row][sequences[row] != batch.EMPTY_SLOT]:
+            mix_instance.add_ingredient(ingredient)
+        assert multipliers[row] == mix_instance.get_multiplier()
+        assert effects[row][effects[row] != batch.EMPTY_SLOT].tolist() == mix_instance.mix_effects.tolist()
+
+    pass
+
+def test_score_batch_matches_bitset_states():
+    """Ensure every row scores like the effect set the searches track for it."""
+    compiled = catalog.get_compiled_catalog(ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    sequences = random_sequences(compiled.n_ingredients, 300, 2)
+    sequences[0] = [9, 0, 9, 0, 9, 0, 9, 2]
+    multipliers, _ = batch.score_batch(compiled, sequences)
+
+    for row in range(sequences.shape[0]):
+        state = 0
+        for ingredient in sequences[row][sequences[row] != batch.EMPTY_SLOT].tolist():
+            state = tables.apply(state, ingredient)
+        assert multipliers[row] == tables.multiplier(state)
+
+    # Six copies of the same effect are worth one
+    assert multipliers[0] == float32(1.5)
+
+    pass
+
+def test_score_batch_upgrade():
+    """Test the upgrade example from the Mix tests as a batch of one."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    multipliers, effects = batch.score_batch(compiled, [[0, 7, 8], [0, batch.EMPTY_SLOT, batch.EMPTY_SLOT]])
+
+    assert effects.tolist() == [[2, 7, 8], [0, batch.EMPTY_SLOT, batch.EMPTY_SLOT]]
+    assert multipliers[1] == float32(0.12)
+
+    pass
+
+def test_score_batch_initial_effects():
+    """Ensure rows starting from initial effects score like a Mix created with them."""
+    compiled = catalog.get_compiled_catalog(ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON)
+    sequences = random_sequences(compiled.n_ingredients, 50, 1)
+    initial = array([[4, batch.EMPTY_SLOT], [9, 21], [batch.EMPTY_SLOT, batch.EMPTY_SLOT]] * 17, dtype=uint16)[:50]
+    multipliers, effects = batch.score_batch(compiled, sequences, initial)
+
+    assert effects.shape == (50, 2 + mix.MAX_INGREDIENTS)
+    for row in range(sequences.shape[0]):
+        start = initial[row][initial[row] != batch.EMPTY_SLOT]
+        mix_instance = mix.Mix(ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON, initial_effects=start)
+        for ingredient in sequences[row][sequences[row] != batch.EMPTY_SLOT]:
+            mix_instance.add_ingredient(ingredient)
+        assert multipliers[row] == mix_instance.get_multiplier()
+        assert effects[row][effects[row] != batch.EMPTY_SLOT].tolist() == mix_instance.mix_effects.tolist()
+
+    # One row of initial effects is shared by every sequence
+    shared, _ = batch.score_batch(compiled, sequences, [4])
+    assert shared[0] == multipliers[0]
+    with raises(mix.InvalidEffectException):
+        batch.score_batch(compiled, sequences, [999])
+    with raises(ValueError):
+        batch.score_batch(compiled, sequences, initial[:10])
+
+    pass
+
+def test_score_batch_errors():
+    """Ensure invalid rows raise the same exceptions as Mix."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    with raises(mix.InvalidIngredientException):
+        batch.score_batch(compiled, [[0, 1], [999, 1]])
+    with raises(mix.DuplicateIngredientException):
+        batch.score_batch(compiled, [[0, 1], [1, 1]])
+    with raises(mix.MaximumIngredientsAddedException):
+        batch.score_batch(compiled, [list(range(mix.MAX_INGREDIENTS + 1))])
+    with raises(ValueError):
+        batch.score_batch(compiled, [[0, batch.EMPTY_SLOT, 1]])
+    with raises(ValueError):
+        batch.score_batch(compiled, [0, 1])
+
+    invalid = catalog.get_compiled_catalog(
+        TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON
+    )
+    with raises(mix.InvalidEffectException):
+        batch.score_batch(invalid, [[0]])
+
+    pass
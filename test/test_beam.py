@@ -0,0 +1,70 @@
+from numpy import uint16
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import beam
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import beam
+import bitset
+import catalog
+import mix
+import search
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+
+def test_beam_search_wide_beam_is_exact():
+    """Ensure a beam wide enough to hold every state matches the exhaustive search."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    exact = search.find_best_mixes(compiled, depth=4, top_k=100000)
+    approximate = beam.beam_search(compiled, width=100000, depth=4, top_k=100000)
+
+    # Every reachable effect set is found with the same multiplier
+    assert (
+        {(result.effects, result.multiplier) for result in approximate} ==
+        {(result.effects, result.multiplier) for result in exact}
+    )
+    assert [result.multiplier for result in approximate] == [result.multiplier for result in exact]
+
+    pass
+
+def test_beam_search_orders_are_valid():
+    """Ensure the returned orders reproduce the returned effects."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    for heuristic in (False, True):
+        results = beam.beam_search(compiled, width=4, top_k=5, heuristic=heuristic)
+        assert len(results) == 5
+        for result in results:
+            assert len(result.order) <= mix.MAX_INGREDIENTS
+            assert all(a != b for a, b in zip(result.order, result.order[1:]))
+            state = 0
+            for ingredient in result.order:
+                state = tables.apply(state, ingredient)
+            assert bitset.mask_to_effects(state) == result.effects
+
+    pass
+
+def test_beam_search_upper_bound_is_admissible():
+    """Ensure the heuristic bound is never below what the exhaustive search reaches."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    best = search.find_best_mixes(compiled, depth=5, top_k=1)[0]
+    assert tables.upper_bound(0, 5) >= best.multiplier
+
+    pass
+
+def test_beam_search_invalid_width():
+    """Ensure a beam without room for a partial mix is rejected."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    with raises(ValueError):
+        beam.beam_search(compiled, width=0)
+
+    pass
@@ -0,0 +1,65 @@
+from json import dump, load
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import benchmark
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import benchmark
+
+def test_measure_fields():
+    """Ensure a measurement reports throughput and percentile latencies."""
+    result = benchmark.measure(lambda: sum(range(100)), number=5, repeat=10)
+
+    for key in ('ops_per_sec', 'min_us', 'mean_us', 'p50_us', 'p90_us', 'p99_us'):
+        assert key in result
+    assert result['min_us'] <= result['p50_us'] <= result['p90_us'] <= result['p99_us']
+    assert result['ops_per_sec'] > 0
+
+    pass
+
+def test_run_benchmarks_covers_hot_paths():
+    """Ensure every hot path is benchmarked on the shipped catalogs."""
+    results = benchmark.run_benchmarks(repeat=2, number=1)
+
+    assert 'util.get_ingredient_adjacency_lists' in results
+    assert 'util.get_effect_details' in results
+    assert 'mix.Mix.get_multiplier' in results
+    for length in range(1, 9):
+        assert f'mix.Mix.add_ingredient[chain={length}]' in results
+
+    pass
+
+def test_compare_flags_regressions():
+    """Ensure only slowdowns beyond the tolerance are reported as regressions."""
+    baseline = {'fast': {'p50_us': 10.0}, 'slow': {'p50_us': 10.0}}
+    results = {'fast': {'p50_us': 11.0}, 'slow': {'p50_us': 20.0}, 'new': {'p50_us': 1.0}}
+    comparison = benchmark.compare(results, baseline, tolerance=0.25)
+
+    assert not comparison['fast']['regression']
+    assert comparison['slow']['regression']
+    assert comparison['slow']['ratio'] == 2.0
+    assert 'new' not in comparison
+
+    pass
+
+def test_main_compares_only_when_asked(tmp_path):
+    """Ensure the baseline is only compared with --compare and a missing one is an error."""
+    baseline = str(tmp_path / "baseline.json")
+    arguments = ['--baseline', baseline, '--repeat', '1', '--number', '1']
+    with raises(SystemExit):
+        benchmark.main(arguments + ['--compare'])
+    assert benchmark.main(arguments + ['--save-baseline']) == 0
+
+    # A baseline far faster than anything can run only fails when compared
+    with open(baseline, 'r') as file:
+        stored = load(file)
+    for result in stored['results'].values():
+        result['p50_us'] = 1e-9
+    with open(baseline, 'w') as file:
+        dump(stored, file)
+    assert benchmark.main(arguments) == 0
+    assert benchmark.main(arguments + ['--compare']) == 1
+
+    pass
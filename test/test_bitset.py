@@ -0,0 +1,136 @@
+from numpy import array, float32, int64, uint64
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import bitset
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import bitset
+import catalog
+import stream
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+ASSET_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/ingredients.json"
+)
+ASSET_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/effects.json"
+)
+
+def reference_apply(compiled, effects, ingredient):
+    """Applies an ingredient to a set of effects one effect at a time."""
+    children = {int(compiled.transitions[ingredient, effect]) for effect in effects}
+    children.add(int(compiled.effect_given[ingredient]))
+    return children
+
+def test_mask_conversion():
+    """Test converting between effect IDs and bitmasks."""
+    assert bitset.effects_to_mask([0, 3, 33]) == (1 << 0) | (1 << 3) | (1 << 33)
+    assert bitset.mask_to_effects((1 << 0) | (1 << 3) | (1 << 33)) == (0, 3, 33)
+    assert bitset.mask_to_effects(0) == ()
+
+    pass
+
+def test_bitset_apply_matches_sets():
+    """Ensure the byte tables give the same sets as applying the rows directly."""
+    compiled = catalog.get_compiled_catalog(ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+
+    effect_sets = [set(), {0}, {3, 18, 33}, {6, 9, 12, 19, 31}, set(range(0, 34, 3))]
+    for effects in effect_sets:
+        state = bitset.effects_to_mask(effects)
+        for ingredient in compiled.ingredients.tolist():
+            expected = reference_apply(compiled, effects, ingredient)
+            assert bitset.mask_to_effects(tables.apply(state, ingredient)) == tuple(sorted(expected))
+
+    pass
+
+def test_bitset_vectorized_matches_scalar():
+    """Ensure the array methods agree with the scalar methods."""
+    compiled = catalog.get_compiled_catalog(ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    states = [0, 1 << 5, (1 << 3) | (1 << 18) | (1 << 33), (1 << 34) - 1]
+    state_array = array(states, dtype=uint64)
+
+    for ingredient in compiled.ingredients.tolist():
+        children = tables.apply_many(state_array, ingredient)
+        assert children.tolist() == [tables.apply(state, ingredient) for state in states]
+
+    multipliers = tables.multipliers(state_array)
+    assert multipliers.dtype == float32
+    assert multipliers.tolist() == [tables.multiplier(state) for state in states]
+
+    pass
+
+def test_bitset_multiplier():
+    """Test the multiplier of a bitmask against the sample effect values."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+
+    assert tables.multiplier(0) == float32(0.0)
+    assert tables.multiplier(bitset.effects_to_mask([0, 7])) == float32(0.87)
+
+    pass
+
+def test_bitset_too_many_effects():
+    """Ensure catalogs wider than a 64 bit mask are rejected."""
+    adjacency_lists = {'0': [('wide', 70)]}
+    transition_table = catalog.TransitionTable(adjacency_lists)
+    effect_table = catalog.EffectTable({'0': {'name': 'effect_0', 'value': float32(0.1)}})
+    with raises(ValueError):
+        bitset.BitsetTables(catalog.CompiledCatalog(transition_table, effect_table))
+
+    pass
+
+def test_unique_pairs_keeps_first_occurrence():
+    """Test that unique_pairs returns the first index of every distinct pair in order."""
+    states = array([5, 3, 5, 5, 3], dtype=uint64)
+    lasts = array([1, 2, 1, 2, 2], dtype=int64)
+    assert bitset.unique_pairs(states, lasts).tolist() == [0, 1, 3]
+    assert bitset.unique_pairs(states[:0], lasts[:0]).tolist() == []
+
+    # States using the top bit cannot be packed with the last ingredient
+    wide = states | uint64(1 << 63)
+    assert bitset.unique_pairs(wide, lasts).tolist() == [0, 1, 3]
+
+    pass
+
+def test_upper_bound_with_negative_values(tmp_path):
+    """Ensure the bound never underestimates a reachable mix when effects are worth less than nothing."""
+    ingredients_json, effects_json = str(tmp_path / "ingredients.json"), str(tmp_path / "effects.json")
+    with open(ingredients_json, 'w') as file:
+        file.write(
+            '{"0": {"name": "i0", "effect_given": 0, "replaces_on_mix": {"1": 0}},'
+            ' "1": {"name": "i1", "effect_given": 1, "replaces_on_mix": {"0": 1}}}'
+        )
+    with open(effects_json, 'w') as file:
+        file.write(
+            '{"0": {"name": "e0", "value": -0.1}, "1": {"name": "e1", "value": -0.3}}'
+        )
+    compiled = catalog.get_compiled_catalog(ingredients_json, effects_json)
+    tables = bitset.BitsetTables(compiled)
+
+    def best_reachable(state, last, remaining):
+        best = tables.value(state)
+        if remaining:
+            for ingredient in range(2):
+                if ingredient != last:
+                    best = max(best, best_reachable(tables.apply(state, ingredient), ingredient, remaining - 1))
+        return best
+
+    for state in range(4):
+        for remaining in range(4):
+            assert tables.upper_bound(state, remaining) >= best_reachable(state, -1, remaining)
+
+    # The stream filter keeps the single ingredient order above the threshold
+    orders = [result.order for result in stream.iter_mixes(compiled, depth=2, min_multiplier=-0.15)]
+    assert (0,) in orders
+
+    pass
@@ -0,0 +1,101 @@
+from numpy import array, float32, issubdtype, uint16
+from os import path
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import catalog
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import catalog
+import util
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredient_invalid_effect_correlation.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+
+def test_transition_table_basic():
+    """Test compiling the sample ingredients into a dense table."""
+    table = catalog.TransitionTable(util.get_ingredient_adjacency_lists(TEST_INGREDIENTS_JSON))
+
+    # Check the shapes and types of the compiled arrays
+    assert table.transitions.shape == (9, 9)
+    assert issubdtype(table.transitions.dtype, uint16)
+    assert table.effect_given.tolist() == list(range(9))
+    assert table.valid.all()
+
+    # Ingredient 0 replaces 1 with 2 and 3 with 4 and leaves the rest alone
+    assert table.transitions[0].tolist() == [0, 2, 2, 4, 4, 5, 6, 7, 8]
+
+    pass
+
+def test_transition_table_chained_rules():
+    """Ensure rules of one ingredient compose in file order like Mix did."""
+    adjacency_lists = {
+        '0': [('chain', uint16(0)), (uint16(1), uint16(2)), (uint16(2), uint16(3))]
+    }
+    table = catalog.TransitionTable(adjacency_lists)
+
+    # Effect 1 becomes 2 through the first rule and 3 through the second
+    assert table.transitions[0].tolist() == [0, 3, 3, 3]
+    assert table.apply(uint16(0), array([1, 2], dtype=uint16)).tolist() == [3, 3, 0]
+
+    pass
+
+def test_transition_table_has_ingredient():
+    """Ensure missing ingredient IDs are reported as invalid."""
+    adjacency_lists = {'2': [('only', uint16(0))]}
+    table = catalog.TransitionTable(adjacency_lists)
+
+    assert table.has_ingredient(uint16(2))
+    assert not table.has_ingredient(uint16(0))
+    assert not table.has_ingredient(uint16(999))
+
+    pass
+
+def test_effect_table_multiplier():
+    """Test summing effect values from the compiled effect table."""
+    table = catalog.EffectTable(util.get_effect_details(TEST_EFFECTS_JSON))
+
+    assert issubdtype(table.values.dtype, float32)
+    assert table.multiplier(array([0, 7], dtype=uint16)) == float32(0.87)
+    assert table.multiplier(array([], dtype=uint16)) == float32(0.0)
+
+    pass
+
+def test_distinct_multipliers():
+    """Test that repeated effects count once and every row scores like distinct_multiplier."""
+    table = catalog.EffectTable(util.get_effect_details(TEST_EFFECTS_JSON))
+    assert catalog.distinct_multiplier(table.values, array([7, 0, 7, 7], dtype=uint16)) == float32(0.87)
+
+    rows = array([[7, 0, 7], [0, 7, 0], [4, 7, 7], [1, 2, 3]], dtype=uint16)
+    multipliers = catalog.distinct_multipliers(table.values, rows)
+    assert multipliers.tolist() == [catalog.distinct_multiplier(table.values, row) for row in rows]
+    assert multipliers[0] == multipliers[1] == float32(0.87)
+
+    pass
+
+def test_compiled_catalog_widening():
+    """Ensure the compiled catalog pads both tables to a common width."""
+    compiled = catalog.get_compiled_catalog(
+        TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON
+    )
+
+    # Ingredient 0 gives effect 50 which the effects file does not define
+    assert compiled.n_effects == 51
+    assert compiled.effect_values.shape == (51,)
+    assert not compiled.effect_valid[50]
+    assert compiled.transitions[1, 50] == 50
+    assert compiled.ingredients.tolist() == list(range(9))
+
+    # A second lookup is served from the shared cache
+    assert compiled is catalog.get_compiled_catalog(
+        TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON
+    )
+
+    pass
@@ -0,0 +1,98 @@
+from itertools import product
+from numpy import array, int64, uint64
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import frontier
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import bitset
+import catalog
+import frontier
+import search
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+ASSET_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/ingredients.json"
+)
+ASSET_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/effects.json"
+)
+
+def test_expand_frontier_layers_hold_every_state_once():
+    """Ensure every layer holds each reachable (effects, last ingredient) state once with its smallest order."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    expanded = frontier.expand_frontier(compiled, depth=4)
+    assert expanded.depth == 4
+
+    for depth in range(1, 5):
+        # Smallest order reaching every state, enumerated in lexicographic order
+        expected = {}
+        for order in product(range(9), repeat=depth):
+            if any(a == b for a, b in zip(order, order[1:])):
+                continue
+            state = 0
+            for ingredient in order:
+                state = tables.apply(state, ingredient)
+            expected.setdefault((state, order[-1]), order)
+
+        layer = expanded.layers[depth]
+        found = {
+            (int(state), int(last)): expanded.order(depth, index)
+            for index, (state, last) in enumerate(zip(layer.states, layer.lasts))
+        }
+        assert len(found) == len(layer.states)
+        assert found == expected
+        assert layer.multipliers.tolist() == tables.multipliers(layer.states).tolist()
+
+    pass
+
+def test_expand_children_layout():
+    """Ensure children come parent by parent, ingredient by ingredient, without repeating the last ingredient."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    states = array([0, tables.apply(0, 2)], dtype=uint64)
+    lasts = array([-1, 2], dtype=int64)
+
+    child_states, child_lasts, parents = frontier.expand_children(tables, states, lasts, compiled.ingredients.astype(int64))
+    expected = [
+        (tables.apply(int(states[parent]), ingredient), ingredient, parent)
+        for parent in range(2) for ingredient in range(9) if ingredient != lasts[parent]
+    ]
+    assert list(zip(child_states.tolist(), child_lasts.tolist(), parents.tolist())) == expected
+
+    pass
+
+def test_expand_frontier_matches_exhaustive_search():
+    """Ensure the best mixes over the frontier match find_best_mixes."""
+    for ingredients_json, effects_json, depth in [
+        (TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON, 6),
+        (ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON, 4)
+    ]:
+        compiled = catalog.get_compiled_catalog(ingredients_json, effects_json)
+        expanded = frontier.expand_frontier(compiled, depth=depth)
+        assert expanded.best_mixes(top_k=25) == search.find_best_mixes(compiled, depth=depth, top_k=25)
+
+        # The best of every depth is the best mix of exactly that many ingredients
+        for result in expanded.best_per_depth():
+            assert result.multiplier == max(expanded.layers[len(result.order)].multipliers)
+
+    pass
+
+def test_expand_frontier_invalid_arguments():
+    """Ensure out of range depths and top_k are rejected."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    with raises(ValueError):
+        frontier.expand_frontier(compiled, depth=0)
+    with raises(ValueError):
+        frontier.expand_frontier(compiled, depth=2).best_mixes(top_k=0)
+
+    pass
@@ -0,0 +1,143 @@
+from itertools import product
+from numpy import uint16
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import goal
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import catalog
+import goal
+import mix
+import search
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+
+def replay(order):
+    """Builds a Mix from an order and returns its effects as a set."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for ingredient in order:
+        mix_instance.add_ingredient(uint16(ingredient))
+    return set(mix_instance.mix_effects.tolist())
+
+def test_find_recipe_shortest():
+    """Ensure the shortest order containing the required effects is found."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    result = goal.find_recipe_with_effects(compiled, {2, 7, 8})
+
+    # Three effects need at least three ingredients
+    assert len(result.order) == 3
+    assert result.cost == 3.0
+    assert {2, 7, 8}.issubset(replay(result.order))
+    assert {2, 7, 8}.issubset(result.effects)
+
+    pass
+
+def test_find_recipe_shortest_matches_exhaustive():
+    """Ensure the shortest and then smallest order is found for every pair of effects."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    orders = [
+        order for length in range(1, 4) for order in product(range(9), repeat=length)
+        if all(a != b for a, b in zip(order, order[1:]))
+    ]
+    effects = {order: replay(order) for order in orders}
+
+    for required in ({2, 7}, {0, 4}, {1, 6}, {3, 5, 8}):
+        expected = next((order for order in orders if required.issubset(effects[order])), None)
+        result = goal.find_recipe_with_effects(compiled, required, max_depth=3)
+        assert (result.order if result else None) == expected
+        if result:
+            assert result.cost == float(len(result.order))
+            assert set(result.effects) == effects[result.order]
+
+    assert goal.find_recipe_with_effects(compiled, set()).order == ()
+
+    pass
+
+def test_find_recipe_is_cheapest():
+    """Ensure the result with costs matches the cheapest order found by brute force."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    costs = {ingredient: 1.0 + 3 * (ingredient % 3) for ingredient in range(9)}
+    required = {4, 6}
+    result = goal.find_recipe_with_effects(compiled, required, costs=costs, max_depth=4)
+
+    best = None
+    for length in range(1, 5):
+        for order in product(range(9), repeat=length):
+            if any(a == b for a, b in zip(order, order[1:])):
+                continue
+            if required.issubset(replay(order)):
+                cost = sum(costs[ingredient] for ingredient in order)
+                best = cost if best is None else min(best, cost)
+
+    assert result.cost == best
+    assert sum(costs[ingredient] for ingredient in result.order) == result.cost
+    assert required.issubset(replay(result.order))
+
+    pass
+
+def test_find_recipe_unreachable():
+    """Ensure None is returned when no order within the depth reaches the effects."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+
+    # A mix of three ingredients holds at most three effects
+    assert goal.find_recipe_with_effects(compiled, {0, 1, 2, 3, 4}, max_depth=3) is None
+
+    pass
+
+def test_find_recipe_errors():
+    """Ensure invalid arguments are rejected."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    with raises(mix.InvalidEffectException):
+        goal.find_recipe_with_effects(compiled, {99})
+    with raises(ValueError):
+        goal.find_recipe_with_effects(compiled, {1}, max_depth=0)
+    with raises(ValueError):
+        goal.find_recipe_with_effects(compiled, {1}, costs={0: 1.0})
+    with raises(ValueError):
+        goal.find_recipe_with_effects(compiled, {1}, costs={i: -1.0 for i in range(9)})
+
+    pass
+
+def test_find_recipe_with_exact_effects_matches_exhaustive():
+    """Ensure every reachable effect set is found with the shortest, smallest order."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for max_depth in (3, 5, 6, 7):
+        for expected in search.find_best_mixes(compiled, depth=max_depth, top_k=100000):
+            result = goal.find_recipe_with_exact_effects(compiled, expected.effects, max_depth=max_depth)
+            assert result.order == expected.order
+            assert result.effects == expected.effects
+            assert result.multiplier == expected.multiplier
+            assert result.cost == len(expected.order)
+            assert replay(result.order) == set(expected.effects)
+
+    pass
+
+def test_find_recipe_with_exact_effects_unreachable():
+    """Ensure None is returned for effect sets no order reaches within the depth."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    reachable = {result.effects for result in search.find_best_mixes(compiled, depth=4, top_k=100000)}
+    target = next(
+        result.effects for result in search.find_best_mixes(compiled, depth=6, top_k=100000)
+        if result.effects not in reachable
+    )
+    stats = search.SearchStats()
+    assert goal.find_recipe_with_exact_effects(compiled, target, max_depth=4, stats=stats) is None
+    assert 0 < stats.nodes_expanded < stats.brute_force_nodes
+    assert goal.find_recipe_with_exact_effects(compiled, target, max_depth=6) is not None
+
+    # The empty mix is the only one without effects
+    assert goal.find_recipe_with_exact_effects(compiled, []).order == ()
+    with raises(mix.InvalidEffectException):
+        goal.find_recipe_with_exact_effects(compiled, [99])
+    with raises(ValueError):
+        goal.find_recipe_with_exact_effects(compiled, [2], max_depth=0)
+
+    pass
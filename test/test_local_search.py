@@ -0,0 +1,106 @@
+from itertools import product
+from numpy import uint16
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import local_search
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import catalog
+import local_search
+import mix
+import search
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredient_invalid_effect_correlation.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+
+def replay(order):
+    """Builds a Mix from an order."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for ingredient in order:
+        mix_instance.add_ingredient(uint16(ingredient))
+    return mix_instance
+
+def test_optimize_mix_finds_the_best_short_mix():
+    """Ensure the optimizer reaches the best multiplier found by brute force over Mix."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    best = max(
+        replay(order).get_multiplier()
+        for length in range(1, 4)
+        for order in product(range(9), repeat=length)
+        if all(a != b for a, b in zip(order, order[1:]))
+    )
+
+    stats = search.SearchStats()
+    result = local_search.optimize_mix(
+        compiled, time_budget=60.0, restarts=4, seed=7, max_length=3, max_iterations=500, stats=stats
+    )
+    assert result.multiplier == best
+    assert 0 < stats.nodes_expanded <= 4 * 500
+
+    pass
+
+def test_optimize_mix_matches_find_best_mixes():
+    """Ensure the optimizer scores like the exhaustive search and reaches its best multiplier."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for max_length in [4, 5, mix.MAX_INGREDIENTS]:
+        best = search.find_best_mixes(compiled, depth=max_length, top_k=1)[0]
+        result = local_search.optimize_mix(
+            compiled, time_budget=60.0, restarts=4, seed=7, max_length=max_length, max_iterations=500
+        )
+        assert result.multiplier == best.multiplier
+        assert result.effects == best.effects
+
+    pass
+
+def test_optimize_mix_result_is_a_valid_mix():
+    """Ensure the result is an order Mix accepts with the returned effects and multiplier."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    result = local_search.optimize_mix(compiled, time_budget=0.2, restarts=2, seed=3)
+
+    assert 1 <= len(result.order) <= mix.MAX_INGREDIENTS
+    mix_instance = replay(result.order)
+    assert result.effects == tuple(sorted(set(mix_instance.mix_effects.tolist())))
+    assert result.multiplier == mix_instance.get_multiplier()
+
+    pass
+
+def test_optimize_mix_is_reproducible():
+    """Ensure the same seed and iteration count give the same result."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    runs = [
+        local_search.optimize_mix(compiled, time_budget=60.0, restarts=2, seed=11, max_iterations=300)
+        for _ in range(2)
+    ]
+    assert runs[0] == runs[1]
+
+    pass
+
+def test_optimize_mix_errors():
+    """Ensure invalid arguments and catalogs are rejected."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for arguments in [
+        {'time_budget': 0},
+        {'restarts': 0},
+        {'max_length': 0},
+        {'max_length': 9},
+        {'initial_temperature': -1},
+        {'max_iterations': 0}
+    ]:
+        with raises(ValueError):
+            local_search.optimize_mix(compiled, **arguments)
+
+    invalid = catalog.get_compiled_catalog(TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON)
+    with raises(mix.InvalidEffectException):
+        local_search.optimize_mix(invalid, time_budget=0.1)
+
+    pass
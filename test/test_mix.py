@@ -17,9 +17,27 @@ TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON: str = path.join(
 TEST_EFFECTS_JSON: str = path.join(
     path.dirname(__file__), "assets/test_sample_effects.json"
 )
+TEST_BAD_EXTENSION: str = path.join(
+    path.dirname(__file__), "assets/test_bad_extension.txt"
+)
+TEST_INGREDIENTS_MISSING_KEYS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients_missing_keys.json"
+)
+TEST_INGREDIENTS_INVALID_VALUE_TYPE_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients_invalid_value_type_1.json"
+)
+ASSET_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/ingredients.json"
+)
+ASSET_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/effects.json"
+)
 
 # Import the util module from the parent directory
+import bitset
+import catalog
 import mix
+import util
 
 def test_mix_init():
     """Test the initialization of the Mix class."""
@@ -48,6 +66,26 @@ def test_mix_add_ingredient():
 
     pass
 
+def test_mix_resolves_tables_once(monkeypatch):
+    """Test that a mix reads its compiled tables through the cache only on first use."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    mix_instance.add_ingredient(uint16(0))
+    mix_instance.get_multiplier()
+    mix_instance.suggest_next(lookahead=True)
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("catalog cache read again")
+    for name in ('get_transition_table', 'get_effect_table', 'get_compiled_catalog'):
+        monkeypatch.setattr(catalog, name, unexpected)
+    monkeypatch.setattr(mix.bitset, 'get_bitset_tables', unexpected)
+
+    for ingredient in [7, 8, 1]:
+        mix_instance.add_ingredient(uint16(ingredient))
+    assert mix_instance.get_multiplier() > 0
+    assert len(mix_instance.suggest_next(lookahead=True)) == 3
+
+    pass
+
 def test_mix_add_upgrade_ingredient():
     """Test adding an upgrade ingredient to the mix."""
     mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
@@ -124,6 +162,24 @@ def test_mix_get_multiplier():
 
     pass
 
+def test_mix_get_multiplier_counts_effects_once():
+    """Test that an effect held twice only counts once towards the multiplier."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for ingredient in [7, 0, 7]:
+        mix_instance.add_ingredient(uint16(ingredient))
+
+    # Effect 7 is held twice but only its first copy is worth 0.75
+    assert mix_instance.mix_effects.tolist() == [7, 4, 7]
+    assert mix_instance.get_multiplier() == float32(1.42)
+
+    # MixState scores the same order the same way
+    state = mix.MixState.from_files(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for ingredient in [7, 0, 7]:
+        state.push(uint16(ingredient))
+    assert state.get_multiplier() == mix_instance.get_multiplier()
+
+    pass
+
 def test_mix_get_multiplier_invalid_effect():
     """Test getting the multiplier with an invalid effect."""
     mix_instance = mix.Mix(TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON)
@@ -136,3 +192,307 @@ def test_mix_get_multiplier_invalid_effect():
         mix_instance.get_multiplier()
 
     pass
+
+def test_mix_state_matches_mix():
+    """Test that MixState gives the same effects and multiplier as Mix."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    state = mix.MixState(compiled)
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+
+    for ingredient in [2, 3, 2, 5, 1, 0, 8, 4]:
+        state.push(uint16(ingredient))
+        mix_instance.add_ingredient(uint16(ingredient))
+        assert state.effects.tolist() == mix_instance.mix_effects.tolist()
+        assert state.order.tolist() == mix_instance.mix_order.tolist()
+        assert state.get_multiplier() == mix_instance.get_multiplier()
+    assert len(state) == 8
+
+    pass
+
+def test_mix_state_push_pop_copy():
+    """Test backtracking with push and pop and that copies are independent."""
+    state = mix.MixState.from_files(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    state.push(uint16(2))
+    state.push(uint16(3))
+    before = (state.effects.tolist(), state.get_multiplier())
+
+    state.push(uint16(5))
+    assert state.pop() == uint16(5)
+    assert (state.effects.tolist(), state.get_multiplier()) == before
+
+    duplicate = state.copy()
+    duplicate.push(uint16(1))
+    assert len(duplicate) == 3
+    assert len(state) == 2
+    assert duplicate.compiled is state.compiled
+
+    state.pop()
+    state.pop()
+    with raises(IndexError):
+        state.pop()
+
+    # Views cannot be used to change the mix and no attributes can be added
+    with raises(ValueError):
+        duplicate.effects[0] = 0
+    with raises(AttributeError):
+        duplicate.extra = 1
+
+    pass
+
+def test_mix_state_exceptions():
+    """Test that MixState raises the same exceptions as Mix."""
+    state = mix.MixState.from_files(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    with raises(mix.InvalidIngredientException):
+        state.push(uint16(99))
+
+    state.push(uint16(1))
+    with raises(mix.DuplicateIngredientException):
+        state.push(uint16(1))
+
+    for ingredient in [2, 3, 2, 3, 2, 3, 2]:
+        state.push(uint16(ingredient))
+    with raises(mix.MaximumIngredientsAddedException):
+        state.push(uint16(4))
+
+    invalid = mix.MixState.from_files(TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON)
+    invalid.push(uint16(0))
+    with raises(mix.InvalidEffectException):
+        invalid.get_multiplier()
+
+    pass
+
+def test_mix_state_initial_effects():
+    """Test that MixState starts from initial effects like Mix and keeps them through pop and copy."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    state = mix.MixState(compiled, initial_effects=[1, 4])
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON, initial_effects=[1, 4])
+    assert state.effects.tolist() == [1, 4]
+    assert state.get_multiplier() == mix_instance.get_multiplier()
+
+    for ingredient in [0, 7, 0, 3, 2, 5, 1, 8]:
+        state.push(uint16(ingredient))
+        mix_instance.add_ingredient(uint16(ingredient))
+        assert state.effects.tolist() == mix_instance.mix_effects.tolist()
+        assert state.get_multiplier() == mix_instance.get_multiplier()
+    with raises(mix.MaximumIngredientsAddedException):
+        state.push(uint16(4))
+
+    duplicate = state.copy()
+    while len(duplicate):
+        duplicate.pop()
+    assert duplicate.effects.tolist() == [1, 4]
+    assert len(state) == 8
+
+    with raises(mix.InvalidEffectException):
+        mix.MixState.from_files(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON, initial_effects=[999])
+
+    pass
+
+def test_mix_pop_ingredient():
+    """Test that popping an ingredient restores the mix from before it was added."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    history = []
+    for ingredient in [2, 3, 2, 5, 1, 0, 8, 4]:
+        history.append((mix_instance.mix_effects.tolist(), mix_instance.mix_order.tolist()))
+        mix_instance.add_ingredient(uint16(ingredient))
+
+    # Pop back to the empty mix one step at a time
+    for ingredient in reversed([2, 3, 2, 5, 1, 0, 8, 4]):
+        assert mix_instance.pop_ingredient() == uint16(ingredient)
+        assert (mix_instance.mix_effects.tolist(), mix_instance.mix_order.tolist()) == history.pop()
+
+    with raises(mix.EmptyMixException):
+        mix_instance.pop_ingredient()
+
+    # The mix can be grown again after popping
+    mix_instance.add_ingredient(uint16(2))
+    mix_instance.add_ingredient(uint16(3))
+    replay = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    replay.add_ingredient(uint16(2))
+    replay.add_ingredient(uint16(3))
+    assert mix_instance.mix_effects.tolist() == replay.mix_effects.tolist()
+    assert mix_instance.get_multiplier() == replay.get_multiplier()
+
+    pass
+
+def test_mix_try_ingredient():
+    """Test that try_ingredient adds an ingredient only inside the with block."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    mix_instance.add_ingredient(uint16(2))
+    before = mix_instance.mix_effects.tolist()
+
+    # Explore every sibling without replaying the order
+    multipliers = {}
+    for ingredient in [0, 1, 3, 4]:
+        with mix_instance.try_ingredient(uint16(ingredient)) as trial:
+            multipliers[ingredient] = trial.get_multiplier()
+        assert mix_instance.mix_effects.tolist() == before
+    for ingredient, multiplier in multipliers.items():
+        replay = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+        replay.add_ingredient(uint16(2))
+        replay.add_ingredient(uint16(ingredient))
+        assert replay.get_multiplier() == multiplier
+
+    # The ingredient is popped even when the block raises, and not added when invalid
+    with raises(RuntimeError):
+        with mix_instance.try_ingredient(uint16(3)):
+            raise RuntimeError()
+    assert mix_instance.mix_order.tolist() == [2]
+    with raises(mix.DuplicateIngredientException):
+        with mix_instance.try_ingredient(uint16(2)):
+            pass
+    assert mix_instance.mix_order.tolist() == [2]
+
+    pass
+
+def test_mix_pop_ingredient_keeps_earlier_arrays():
+    """Test that popping does not change effect arrays read before the pop."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    mix_instance.add_ingredient(uint16(0))
+    with mix_instance.try_ingredient(uint16(7)):
+        # Ingredient 7 replaces the effect of ingredient 0
+        saved = mix_instance.mix_effects
+        assert saved.tolist() == [4, 7]
+    assert saved.tolist() == [4, 7]
+    assert mix_instance.mix_effects.tolist() == [0]
+
+    pass
+
+def test_mix_suggest_next():
+    """Test that suggest_next ranks every next ingredient like adding it would."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for ingredient in [5, 4, 3]:
+        mix_instance.add_ingredient(uint16(ingredient))
+        before = (mix_instance.mix_effects.tolist(), mix_instance.mix_order.tolist())
+
+        suggestions = mix_instance.suggest_next(k=10)
+        expected = []
+        for candidate in range(9):
+            if candidate != ingredient:
+                with mix_instance.try_ingredient(uint16(candidate)):
+                    expected.append((candidate, mix_instance.get_multiplier()))
+        expected.sort(key=lambda pair: (-pair[1], pair[0]))
+        assert [(int(s.ingredient), s.multiplier) for s in suggestions] == expected
+        assert all(s.best_multiplier is None for s in suggestions)
+        assert mix_instance.suggest_next(k=2) == suggestions[:2]
+
+        # Nothing was added to the mix
+        assert (mix_instance.mix_effects.tolist(), mix_instance.mix_order.tolist()) == before
+
+    pass
+
+def test_mix_suggest_next_lookahead():
+    """Test that lookahead ranks by the best multiplier reachable within the budget."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+
+    def best_reachable(state, last, remaining):
+        best = tables.value(state)
+        if remaining:
+            for ingredient in range(9):
+                if ingredient != last:
+                    best = max(best, best_reachable(tables.apply(state, ingredient), ingredient, remaining - 1))
+        return best
+
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for ingredient in [2, 7, 0, 6, 1]:
+        mix_instance.add_ingredient(uint16(ingredient))
+    state = bitset.effects_to_mask(mix_instance.mix_effects.tolist())
+
+    suggestions = mix_instance.suggest_next(k=3, lookahead=True)
+    plain = {int(s.ingredient): s.multiplier for s in mix_instance.suggest_next(k=8)}
+    expected = sorted(
+        (
+            (catalog.round_multiplier(best_reachable(tables.apply(state, candidate), candidate, 2)), plain[candidate], candidate)
+            for candidate in range(9) if candidate != 1
+        ),
+        key=lambda entry: (-entry[0], -entry[1], entry[2])
+    )[:3]
+    assert [(s.best_multiplier, s.multiplier, int(s.ingredient)) for s in suggestions] == expected
+
+    pass
+
+def test_mix_suggest_next_lookahead_bounds_multiplier():
+    """Test that the best reachable multiplier is never below the multiplier right after adding."""
+    mix_instance = mix.Mix(ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON)
+    for ingredient in [9, 0, 9, 0, 9, 0, 9]:
+        mix_instance.add_ingredient(uint16(ingredient))
+        # Short mixes leave a budget too large to walk quickly
+        if mix_instance.mix_order.size >= 4:
+            for suggestion in mix_instance.suggest_next(k=20, lookahead=True):
+                assert suggestion.best_multiplier >= suggestion.multiplier
+
+    pass
+
+def test_mix_suggest_next_invalid():
+    """Test that suggest_next rejects full mixes, bad k and invalid effects."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    with raises(ValueError):
+        mix_instance.suggest_next(k=0)
+    for ingredient in [1, 2, 1, 2, 1, 2, 1, 2]:
+        mix_instance.add_ingredient(uint16(ingredient))
+    with raises(mix.MaximumIngredientsAddedException):
+        mix_instance.suggest_next()
+
+    invalid_instance = mix.Mix(TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON)
+    with raises(mix.InvalidEffectException):
+        invalid_instance.suggest_next()
+
+    # File errors are reported like add_ingredient reports them
+    for ingredients_file_path, error in [
+        ("missing.json", FileNotFoundError),
+        (TEST_BAD_EXTENSION, util.InvalidFileExtentionError),
+        (TEST_INGREDIENTS_MISSING_KEYS_JSON, util.MissingKeyError),
+        (TEST_INGREDIENTS_INVALID_VALUE_TYPE_JSON, ValueError)
+    ]:
+        for lookahead in [False, True]:
+            with raises(error) as info:
+                mix.Mix(ingredients_file_path, TEST_EFFECTS_JSON).suggest_next(lookahead=lookahead)
+            assert "ingredient adjacency lists or effect details file" in str(info.value).lower()
+
+    pass
+
+def test_mix_initial_effects_past_ingredients(tmp_path):
+    """Test that initial effects no ingredient mentions are kept through every ingredient added."""
+    ingredients = tmp_path / "ingredients.json"
+    effects = tmp_path / "effects.json"
+    ingredients.write_text(
+        '{"0": {"name": "i0", "effect_given": 0, "replaces_on_mix": {"1": 0}},'
+        ' "1": {"name": "i1", "effect_given": 1, "replaces_on_mix": {}}}'
+    )
+    effects.write_text(
+        '{"0": {"name": "e0", "value": 0.1}, "1": {"name": "e1", "value": 0.2},'
+        ' "2": {"name": "e2", "value": 0.4}}'
+    )
+
+    mix_instance = mix.Mix(str(ingredients), str(effects), initial_effects=[2, 1])
+    for ingredient in [0, 1, 0]:
+        mix_instance.add_ingredient(uint16(ingredient))
+    assert mix_instance.mix_effects.tolist() == [2, 0, 0, 0, 0]
+    assert mix_instance.get_multiplier() == float32(0.5)
+
+    pass
+
+def test_mix_initial_effects():
+    """Test that a mix can start from the effects of a base product."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON, initial_effects=[1, 4])
+    assert mix_instance.mix_effects.tolist() == [1, 4]
+    assert mix_instance.mix_order.size == 0
+    assert mix_instance.get_multiplier() == float32(1.01)
+
+    # Ingredients replace the initial effects like any other effect
+    mix_instance.add_ingredient(uint16(0))
+    assert mix_instance.mix_effects.tolist() == [2, 4, 0]
+    assert mix_instance.get_multiplier() == float32(1.35)
+
+    # Popping the only ingredient restores the initial effects
+    mix_instance.pop_ingredient()
+    assert mix_instance.mix_effects.tolist() == [1, 4]
+    with raises(mix.EmptyMixException):
+        mix_instance.pop_ingredient()
+
+    # Initial effects must exist in the effects file
+    with raises(mix.InvalidEffectException):
+        mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON, initial_effects=[999])
+
+    pass
@@ -0,0 +1,141 @@
+from itertools import product
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import pareto
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import bitset
+import catalog
+import mix
+import pareto
+import products
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+TEST_PRICES_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_prices.json"
+)
+
+def brute_force_mixes(depth, costs, price, initial_effects=()):
+    """Returns (value, cost, length) of every order of up to depth ingredients."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    mixes = set()
+    for length in range(1, depth + 1):
+        for order in product(range(9), repeat=length):
+            if any(a == b for a, b in zip(order, order[1:])):
+                continue
+            state = bitset.effects_to_mask(initial_effects)
+            for ingredient in order:
+                state = tables.apply(state, ingredient)
+            value = price * (1.0 + round(float(tables.multiplier(state)), 2))
+            mixes.add((value, sum(costs[ingredient] for ingredient in order), length))
+    return mixes
+
+def test_load_prices():
+    """Ensure costs are keyed by ingredient ID and prices by product name."""
+    costs, prices = pareto.load_prices(TEST_PRICES_JSON)
+    assert costs == {0: 1.0, 1: 2.0, 2: 3.0, 3: 4.0, 4: 5.0, 5: 1.5, 6: 2.5, 7: 3.5, 8: 4.5}
+    assert prices == {'test_product_0': 10.0, 'test_product_1': 25.0}
+
+    pass
+
+def test_find_pareto_front_matches_brute_force():
+    """Ensure the front holds exactly the non-dominated mixes with valid orders."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    costs, prices = pareto.load_prices(TEST_PRICES_JSON)
+    price = prices['test_product_1']
+
+    for depth in (3, 4):
+        mixes = brute_force_mixes(depth, costs, price)
+        expected = {
+            mix for mix in mixes
+            if not any(
+                other != mix and other[0] >= mix[0] and other[1] <= mix[1] and other[2] <= mix[2]
+                for other in mixes
+            )
+        }
+        front = pareto.find_pareto_front(compiled, price, costs, depth=depth)
+        assert {(mix.value, mix.cost, len(mix.order)) for mix in front} == expected
+        assert len(front) == len(expected)
+        assert [mix.value for mix in front] == sorted((mix.value for mix in front), reverse=True)
+
+        for mix in front:
+            state = 0
+            for ingredient in mix.order:
+                state = tables.apply(state, ingredient)
+            assert bitset.mask_to_effects(state) == mix.effects
+            assert mix.multiplier == tables.multiplier(state)
+            assert sum(costs[ingredient] for ingredient in mix.order) == mix.cost
+
+    pass
+
+def test_find_pareto_front_from_product_effects():
+    """Ensure the front starts from the effects of the base product."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    costs, _ = pareto.load_prices(TEST_PRICES_JSON)
+
+    for base in products.load_products(TEST_PRICES_JSON):
+        mixes = brute_force_mixes(3, costs, base.price, base.effects)
+        expected = {
+            mix for mix in mixes
+            if not any(
+                other != mix and other[0] >= mix[0] and other[1] <= mix[1] and other[2] <= mix[2]
+                for other in mixes
+            )
+        }
+        front = pareto.find_pareto_front(compiled, base.price, costs, depth=3, initial_effects=base.effects)
+        assert {(result.value, result.cost, len(result.order)) for result in front} == expected
+
+        for result in front:
+            state = bitset.effects_to_mask(base.effects)
+            for ingredient in result.order:
+                state = tables.apply(state, ingredient)
+            assert bitset.mask_to_effects(state) == result.effects
+
+    with raises(mix.InvalidEffectException):
+        pareto.find_pareto_front(compiled, 10.0, costs, initial_effects=[99])
+
+    pass
+
+def test_most_profitable_under_budget():
+    """Ensure the most profitable mix under a budget matches brute force."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    costs, prices = pareto.load_prices(TEST_PRICES_JSON)
+    price = prices['test_product_0']
+    mixes = brute_force_mixes(4, costs, price)
+
+    for budget in (1.0, 4.0, 7.5, None):
+        front = pareto.find_pareto_front(compiled, price, costs, depth=4)
+        bounded = pareto.find_pareto_front(compiled, price, costs, depth=4, max_cost=budget)
+        best = pareto.most_profitable(front, max_cost=budget)
+        assert pareto.most_profitable(bounded) == best
+        assert all(budget is None or mix.cost <= budget for mix in bounded)
+        assert best.profit == max(value - cost for value, cost, _ in mixes if budget is None or cost <= budget)
+
+    assert pareto.find_pareto_front(compiled, price, costs, depth=4, max_cost=0.5) == []
+    assert pareto.most_profitable([], max_cost=10.0) is None
+
+    pass
+
+def test_find_pareto_front_errors():
+    """Ensure invalid prices and costs are rejected."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    costs, _ = pareto.load_prices(TEST_PRICES_JSON)
+    with raises(ValueError):
+        pareto.find_pareto_front(compiled, -1.0, costs)
+    with raises(ValueError):
+        pareto.find_pareto_front(compiled, 10.0, {0: 1.0})
+    with raises(ValueError):
+        pareto.find_pareto_front(compiled, 10.0, costs, depth=0)
+
+    pass
@@ -0,0 +1,105 @@
+from numpy import float32, uint16
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import prefix_cache
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import catalog
+import mix
+import prefix_cache
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredient_invalid_effect_correlation.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+
+def test_prefix_cache_matches_mix():
+    """Ensure cached nodes hold the same state as a Mix built from scratch."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    cache = prefix_cache.PrefixCache(compiled)
+
+    order = (0, 7, 8, 1, 2, 3)
+    node = cache.get(order)
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for ingredient in order:
+        mix_instance.add_ingredient(uint16(ingredient))
+
+    assert node.order == order
+    assert node.effects.tolist() == mix_instance.mix_effects.tolist()
+    assert node.get_multiplier() == mix_instance.get_multiplier()
+
+    # Every prefix was cached on the way
+    assert len(cache) == len(order)
+    assert cache.get((0, 7, 8)).effects.tolist() == [2, 7, 8]
+
+    # An effect held twice counts once, like Mix
+    repeated = cache.get((7, 0, 7))
+    assert repeated.effects.tolist() == [7, 4, 7]
+    assert repeated.get_multiplier() == float32(1.42)
+
+    pass
+
+def test_prefix_cache_extend():
+    """Ensure extending a cached prefix only evaluates the new ingredient."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    cache = prefix_cache.PrefixCache(compiled)
+
+    cache.get((0, 7))
+    node = cache.extend((0, 7), 8)
+    assert node.effects.tolist() == [2, 7, 8]
+    assert len(cache) == 3
+    assert cache.misses == 2
+
+    # Looking the same order up again is a hit and returns the same node
+    assert cache.get([0, 7, 8]) is node
+    assert cache.hits == 1
+    assert isinstance(node.get_multiplier(), float32)
+
+    pass
+
+def test_prefix_cache_eviction():
+    """Ensure the cache never holds more nodes than its capacity."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    cache = prefix_cache.PrefixCache(compiled, capacity=3)
+
+    cache.get((0, 1, 2, 3, 4))
+    assert len(cache) == 3
+    assert (0, 1, 2, 3, 4) in cache
+    assert (0, 1) not in cache
+    assert () in cache
+
+    # An evicted prefix is rebuilt on demand
+    assert cache.get((0, 1)).effects.tolist() == [0, 1]
+
+    with raises(ValueError):
+        prefix_cache.PrefixCache(compiled, capacity=0)
+
+    pass
+
+def test_prefix_cache_errors():
+    """Ensure invalid orders raise the same exceptions as Mix."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    cache = prefix_cache.PrefixCache(compiled)
+
+    with raises(mix.InvalidIngredientException):
+        cache.get((0, 999))
+    with raises(mix.DuplicateIngredientException):
+        cache.get((0, 0))
+    with raises(mix.MaximumIngredientsAddedException):
+        cache.get(tuple(range(mix.MAX_INGREDIENTS + 1)))
+
+    invalid = catalog.get_compiled_catalog(
+        TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON
+    )
+    with raises(mix.InvalidEffectException):
+        prefix_cache.PrefixCache(invalid).get_multiplier((0,))
+
+    pass
@@ -0,0 +1,126 @@
+from itertools import product as orders_of
+from numpy import float32, uint16
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import products
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import bitset
+import catalog
+import mix
+import products
+import search
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+TEST_PRICES_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_prices.json"
+)
+
+def test_load_products():
+    """Ensure products keep their price and initial effects in product ID order."""
+    assert products.load_products(TEST_PRICES_JSON) == [
+        products.Product('test_product_0', 10.0, ()),
+        products.Product('test_product_1', 25.0, (1, 4))
+    ]
+
+    pass
+
+def test_score_products_matches_mix():
+    """Ensure every sequence scores on every product like a Mix created with its effects."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    product_list = products.load_products(TEST_PRICES_JSON)
+    sequences = [[0, 7, 8], [3, 2, 65535], [5, 65535, 65535]]
+    multipliers = products.score_products(compiled, sequences, product_list)
+
+    assert multipliers.shape == (2, 3)
+    assert multipliers.dtype == float32
+    for row, product in enumerate(product_list):
+        for column, sequence in enumerate(sequences):
+            mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON, initial_effects=product.effects)
+            for ingredient in sequence:
+                if ingredient != 65535:
+                    mix_instance.add_ingredient(uint16(ingredient))
+            assert multipliers[row, column] == mix_instance.get_multiplier()
+
+    pass
+
+def test_find_best_mixes_per_product_matches_separate_searches():
+    """Ensure the shared search finds what one search per product finds, with valid orders."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    product_list = products.load_products(TEST_PRICES_JSON) + [products.Product('test_product_2', 5.0, (7,))]
+
+    for depth in (3, 5):
+        results = products.find_best_mixes_per_product(compiled, product_list, depth, top_k=8)
+        assert list(results) == [product.name for product in product_list]
+        for product in product_list:
+            alone = products.find_best_mixes_per_product(compiled, [product], depth, top_k=8)[product.name]
+            found = results[product.name]
+            assert found == alone
+            assert len({result.effects for result in found}) == len(found) == 8
+
+            # Replaying every order from the product's effects gives its effect set
+            for result in found:
+                assert all(a != b for a, b in zip(result.order, result.order[1:]))
+                state = bitset.effects_to_mask(product.effects)
+                for ingredient in result.order:
+                    state = tables.apply(state, ingredient)
+                assert state == bitset.effects_to_mask(result.effects)
+                assert result.multiplier == tables.multiplier(state)
+
+        # A product without initial effects matches the regular search
+        expected = search.find_best_mixes(compiled, depth, top_k=8)
+        assert results['test_product_0'] == expected
+
+    pass
+
+def test_find_best_mixes_per_product_matches_brute_force():
+    """Ensure every product gets the smallest shortest order of the best effect sets, ties included."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    tables = bitset.BitsetTables(compiled)
+    product_list = products.load_products(TEST_PRICES_JSON) + [products.Product('test_product_2', 5.0, (7,))]
+
+    for depth in (3, 4):
+        results = products.find_best_mixes_per_product(compiled, product_list, depth, top_k=12)
+        for product in product_list:
+            # Shortest and then smallest order of every reachable effect set
+            best = {}
+            for length in range(1, depth + 1):
+                for order in orders_of(compiled.ingredients.tolist(), repeat=length):
+                    if any(a == b for a, b in zip(order, order[1:])):
+                        continue
+                    state = bitset.effects_to_mask(product.effects)
+                    for ingredient in order:
+                        state = tables.apply(state, ingredient)
+                    if state not in best or (len(order), order) < (len(best[state]), best[state]):
+                        best[state] = order
+            expected = sorted(
+                best.items(), key=lambda item: (-tables.multiplier(item[0]), len(item[1]), item[1])
+            )[:12]
+            assert [(result.order, bitset.effects_to_mask(result.effects)) for result in results[product.name]] == [
+                (order, state) for state, order in expected
+            ]
+
+    pass
+
+def test_find_best_mixes_per_product_errors():
+    """Ensure invalid products are rejected."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    with raises(mix.InvalidEffectException):
+        products.find_best_mixes_per_product(compiled, [products.Product('bad', 1.0, (999,))], 2)
+    with raises(ValueError):
+        products.find_best_mixes_per_product(
+            compiled, [products.Product('same', 1.0, ()), products.Product('same', 2.0, (1,))], 2
+        )
+    with raises(ValueError):
+        products.find_best_mixes_per_product(compiled, products.load_products(TEST_PRICES_JSON), 0)
+
+    pass
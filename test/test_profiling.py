@@ -0,0 +1,117 @@
+from json import load
+from numpy import uint16
+from os import path
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import profiling
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import catalog
+import mix
+import profiling
+import util
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+
+def test_profiler_counts_operations():
+    """Ensure instrumented operations are counted and timed while enabled."""
+    profiler = profiling.Profiler()
+    util.clear_catalog_cache()
+    profiler.enable()
+    try:
+        mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+        mix_instance.add_ingredient(uint16(2))
+        mix_instance.add_ingredient(uint16(3))
+        mix_instance.get_multiplier()
+        mix_instance.pop_ingredient()
+
+        # A mix keeps its tables, so only a second mix looks them up again
+        mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON).add_ingredient(uint16(2))
+    finally:
+        profiler.disable()
+
+    report = profiler.report()
+    operations = report['operations']
+    assert operations['mix.Mix.add_ingredient']['calls'] == 3
+    assert operations['mix.Mix.get_multiplier']['calls'] == 1
+    assert operations['mix.Mix.pop_ingredient']['calls'] == 1
+    assert operations['util.get_ingredient_adjacency_lists']['calls'] == 1
+    assert operations['mix.Mix.add_ingredient']['total_seconds'] > 0
+
+    # The first catalog lookups miss and the later ones hit
+    assert report['catalog_cache']['misses'] > 0
+    assert report['catalog_cache']['hits'] > 0
+    assert 0 < report['catalog_cache']['hit_rate'] < 1
+
+    pass
+
+def test_profiler_disable_restores_originals():
+    """Ensure disabling puts the original functions back and stops counting."""
+    original_add = mix.Mix.add_ingredient
+    original_table = catalog.get_transition_table
+    profiler = profiling.Profiler()
+
+    profiler.enable()
+    assert profiler.enabled
+    assert mix.Mix.add_ingredient is not original_add
+    profiler.disable()
+    assert not profiler.enabled
+    assert mix.Mix.add_ingredient is original_add
+    assert catalog.get_transition_table is original_table
+
+    mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON).add_ingredient(uint16(1))
+    assert profiler.report()['operations']['mix.Mix.add_ingredient']['calls'] == 0
+
+    pass
+
+def test_profiler_hooks_and_reset():
+    """Ensure hooks see every instrumented call and reset zeroes the counters."""
+    profiler = profiling.Profiler()
+    calls = []
+
+    def hook(name, elapsed):
+        calls.append((name, elapsed))
+
+    profiler.add_hook(hook)
+    profiler.enable(targets=[('mix', 'Mix.get_multiplier')])
+    try:
+        mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+        mix_instance.add_ingredient(uint16(1))
+        mix_instance.get_multiplier()
+        profiler.remove_hook(hook)
+        mix_instance.get_multiplier()
+    finally:
+        profiler.disable()
+
+    assert [name for name, _ in calls] == ['mix.Mix.get_multiplier']
+    assert calls[0][1] >= 0
+    assert profiler.report()['operations']['mix.Mix.get_multiplier']['calls'] == 2
+
+    profiler.reset()
+    assert profiler.report()['operations']['mix.Mix.get_multiplier']['calls'] == 0
+
+    pass
+
+def test_profiler_dump_report(tmp_path):
+    """Ensure the report is written as JSON."""
+    profiler = profiling.Profiler()
+    profiler.enable(targets=[('util', 'get_effect_details')])
+    try:
+        util.get_effect_details(TEST_EFFECTS_JSON)
+    finally:
+        profiler.disable()
+
+    file_path = str(tmp_path / "report.json")
+    profiler.dump_report(file_path)
+    with open(file_path, 'r') as file:
+        report = load(file)
+    assert report['operations']['util.get_effect_details']['calls'] == 1
+    assert set(report) == {'operations', 'catalog_cache'}
+
+    pass
@@ -0,0 +1,212 @@
+from itertools import product
+from numpy import float32, uint16
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import search
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import catalog
+import mix
+import search
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredient_invalid_effect_correlation.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+ASSET_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/ingredients.json"
+)
+ASSET_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/effects.json"
+)
+
+def brute_force_multipliers(compiled, depth):
+    """Scores every valid order of up to depth ingredients as effect sets."""
+    values = compiled.effect_values.tolist()
+    best = {}
+    for length in range(1, depth + 1):
+        for order in product(compiled.ingredients.tolist(), repeat=length):
+            if any(a == b for a, b in zip(order, order[1:])):
+                continue
+            effects = set()
+            for ingredient in order:
+                effects = {int(compiled.transitions[ingredient, e]) for e in effects}
+                effects.add(int(compiled.effect_given[ingredient]))
+            best[frozenset(effects)] = catalog.round_multiplier(sum(values[e] for e in sorted(effects)))
+    return best
+
+def test_find_best_mixes_matches_brute_force():
+    """Ensure the search finds the same best effect sets as trying every order."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    expected = brute_force_multipliers(compiled, 4)
+    results = search.find_best_mixes(compiled, depth=4, top_k=len(expected))
+
+    # Every reachable effect set is reported exactly once
+    assert len(results) == len(expected)
+    for result in results:
+        assert result.multiplier == expected[frozenset(result.effects)]
+
+    # Results are sorted best first
+    multipliers = [result.multiplier for result in results]
+    assert multipliers == sorted(multipliers, reverse=True)
+
+    pass
+
+def test_find_best_mixes_orders_are_valid():
+    """Ensure every returned order can be replayed with Mix."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for result in search.find_best_mixes(compiled, depth=mix.MAX_INGREDIENTS, top_k=5):
+        mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+        for ingredient in result.order:
+            mix_instance.add_ingredient(uint16(ingredient))
+        assert set(mix_instance.mix_effects.tolist()) == set(result.effects)
+        assert isinstance(result.multiplier, float32)
+
+    pass
+
+def test_find_best_mixes_invalid_arguments():
+    """Ensure out of range arguments are rejected."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    with raises(ValueError):
+        search.find_best_mixes(compiled, depth=0)
+    with raises(ValueError):
+        search.find_best_mixes(compiled, depth=mix.MAX_INGREDIENTS + 1)
+    with raises(ValueError):
+        search.find_best_mixes(compiled, top_k=0)
+
+    pass
+
+def test_find_best_mixes_invalid_effect():
+    """Ensure a catalog producing an unknown effect is rejected."""
+    compiled = catalog.get_compiled_catalog(
+        TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON
+    )
+    with raises(mix.InvalidEffectException):
+        search.find_best_mixes(compiled, depth=2)
+
+    pass
+
+def test_find_best_mixes_parallel_matches_serial():
+    """Ensure splitting the search across processes gives the same results."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    serial = search.find_best_mixes(compiled, depth=5, top_k=20)
+    parallel = search.find_best_mixes(compiled, depth=5, top_k=20, workers=2)
+    assert parallel == serial
+
+    with raises(ValueError):
+        search.find_best_mixes(compiled, workers=0)
+
+    pass
+
+def test_partition_prefixes_groups():
+    """Ensure every worker gets one contiguous group and no prefix is lost."""
+    groups = search._partition_prefixes(list(range(9)), 5, 4)
+    assert len(groups) == 4
+    assert [prefix for group in groups for prefix in group] == [(i,) for i in range(9)]
+
+    # Too few ingredients for the workers splits on the first two
+    groups = search._partition_prefixes(list(range(3)), 5, 4)
+    assert [prefix for group in groups for prefix in group] == [
+        (first, second) for first in range(3) for second in range(3) if first != second
+    ]
+    assert search._partition_prefixes(list(range(3)), 1, 4) == [[(0,)], [(1,)], [(2,)]]
+
+    pass
+
+def test_find_best_mixes_pruning_matches_exhaustive():
+    """Ensure branch and bound pruning returns the same results with less work."""
+    for ingredients_json, effects_json, depth in [
+        (TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON, 6),
+        (ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON, 5)
+    ]:
+        compiled = catalog.get_compiled_catalog(ingredients_json, effects_json)
+        exhaustive_stats, pruned_stats = search.SearchStats(), search.SearchStats()
+        exhaustive = search.find_best_mixes(compiled, depth=depth, top_k=5, prune=False, stats=exhaustive_stats)
+        pruned = search.find_best_mixes(compiled, depth=depth, top_k=5, stats=pruned_stats)
+        assert pruned == exhaustive
+
+        assert exhaustive_stats.nodes_pruned == 0
+        assert pruned_stats.nodes_expanded + pruned_stats.nodes_pruned <= exhaustive_stats.nodes_expanded
+        assert pruned_stats.nodes_expanded < exhaustive_stats.nodes_expanded
+        assert exhaustive_stats.nodes_expanded < exhaustive_stats.brute_force_nodes
+
+    pass
+
+def test_find_best_mixes_parallel_stats():
+    """Ensure worker counters are merged into the stats."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    stats = search.SearchStats()
+    search.find_best_mixes(compiled, depth=4, top_k=3, workers=2, stats=stats)
+    assert stats.nodes_expanded > 0
+    assert stats.brute_force_nodes == sum(9 * 8 ** (length - 1) for length in range(1, 5))
+
+    # Prefixes of two ingredients sharing their first one count it once
+    stats = search.SearchStats()
+    search.find_best_mixes(compiled, depth=2, top_k=3, workers=5, prune=False, stats=stats)
+    assert stats.nodes_expanded == stats.brute_force_nodes == 9 + 9 * 8
+
+    pass
+
+def test_transposition_table():
+    """Ensure the table skips states expanded with as much budget and stays bounded."""
+    table = search.TranspositionTable(capacity=4)
+    assert not table.seen('a', 2)
+    assert table.seen('a', 2)
+    assert table.seen('a', 1)
+    assert not table.seen('a', 3)
+    assert (table.hits, table.misses) == (2, 2)
+    assert table.hit_rate == 0.5
+
+    for key in range(10):
+        table.seen(key, 0)
+        assert len(table) <= 4
+    assert table.evictions > 0
+    assert not table.seen('a', 3)
+
+    with raises(ValueError):
+        search.TranspositionTable(capacity=1)
+
+    pass
+
+def test_transposition_table_keeps_used_states():
+    """Ensure a state hit in the previous generation survives the next replacement."""
+    table = search.TranspositionTable(capacity=4)
+    table.seen('a', 2)
+    table.seen('b', 2)
+    assert table.evictions == 0 and len(table) == 2
+
+    # 'a' is hit from the previous generation, then two new states replace it
+    assert table.seen('a', 2)
+    assert len(table) == 2
+    table.seen('c', 2)
+    table.seen('d', 2)
+    assert table.seen('a', 2)
+    assert not table.seen('b', 2)
+
+    pass
+
+def test_find_best_mixes_table_capacity():
+    """Ensure a small transposition table gives the same results with evictions."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    full_stats, small_stats = search.SearchStats(), search.SearchStats()
+    full = search.find_best_mixes(compiled, depth=6, top_k=5, stats=full_stats)
+    small = search.find_best_mixes(compiled, depth=6, top_k=5, stats=small_stats, table_capacity=16)
+    assert small == full
+
+    assert full_stats.table_evictions == 0
+    assert small_stats.table_evictions > 0
+    assert full_stats.table_lookups == full_stats.nodes_expanded + full_stats.nodes_pruned + full_stats.nodes_deduplicated
+    assert 0 < small_stats.table_hit_rate < full_stats.table_hit_rate
+
+    with raises(ValueError):
+        search.find_best_mixes(compiled, table_capacity=1)
+
+    pass
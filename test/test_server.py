@@ -0,0 +1,216 @@
+import asyncio
+
+from json import dumps, loads
+from numpy import float32, uint16
+from os import _exit, path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import server
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import mix
+import search
+import server
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredient_invalid_effect_correlation.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+
+def mix_score(order):
+    """Scores an order with Mix."""
+    mix_instance = mix.Mix(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    for ingredient in order:
+        mix_instance.add_ingredient(uint16(ingredient))
+    return mix_instance.get_multiplier(), mix_instance.mix_effects.tolist()
+
+async def query(host, port, requests):
+    """Sends requests on one connection and returns the replies by id."""
+    reader, writer = await asyncio.open_connection(host, port)
+    for request in requests:
+        writer.write(dumps(request).encode() + b'\n')
+    await writer.drain()
+    replies = [loads(await reader.readline()) for _ in requests]
+    writer.close()
+    await writer.wait_closed()
+    return replies
+
+def test_server_batches_concurrent_scores():
+    """Ensure concurrent clients are answered like Mix with fewer batches than requests."""
+    orders = [[2], [2, 3], [0, 1, 2], [5, 4, 3, 2, 1], [], [8, 7, 6, 5, 4, 3, 2, 1]] * 20
+
+    async def run():
+        recipe_server = server.RecipeServer(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON, batch_window=0.01)
+        host, port = await recipe_server.start()
+        try:
+            replies = await asyncio.gather(*[
+                query(host, port, [{'id': index, 'op': 'score', 'order': order}])
+                for index, order in enumerate(orders)
+            ])
+        finally:
+            await recipe_server.close()
+        return recipe_server, [reply for client in replies for reply in client]
+
+    recipe_server, replies = asyncio.run(run())
+    assert len(replies) == len(orders)
+    for reply in replies:
+        multiplier, effects = mix_score(orders[reply['id']])
+        assert float32(reply['multiplier']) == multiplier
+        assert reply['effects'] == effects
+
+    assert recipe_server.rows_scored == len(orders)
+    assert recipe_server.batches_scored < len(orders)
+
+    pass
+
+def test_server_best_next_and_search():
+    """Ensure next ranks the following ingredients and search matches find_best_mixes."""
+    async def run():
+        recipe_server = server.RecipeServer(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+        host, port = await recipe_server.start()
+        try:
+            return await query(host, port, [
+                {'id': 'next', 'op': 'next', 'order': [2], 'k': 3},
+                {'id': 'search', 'op': 'search', 'depth': 3, 'top_k': 2}
+            ]), recipe_server.compiled
+        finally:
+            await recipe_server.close()
+
+    replies, compiled = asyncio.run(run())
+    replies = {reply['id']: reply for reply in replies}
+
+    expected = sorted(
+        ((i, mix_score([2, i])[0]) for i in range(9) if i != 2), key=lambda pair: (-pair[1], pair[0])
+    )[:3]
+    assert [(i, float32(m)) for i, m in replies['next']['ingredients']] == expected
+
+    results = search.find_best_mixes(compiled, depth=3, top_k=2)
+    assert [tuple(result['order']) for result in replies['search']['results']] == [r.order for r in results]
+
+    pass
+
+def test_server_scores_search_results_alike():
+    """Ensure scoring the order of a search result returns the multiplier the search reported."""
+    async def run():
+        recipe_server = server.RecipeServer(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+        host, port = await recipe_server.start()
+        try:
+            results = (await query(host, port, [{'id': 0, 'op': 'search', 'depth': 8, 'top_k': 10}]))[0]['results']
+            scores = await query(host, port, [
+                {'id': index, 'op': 'score', 'order': result['order']} for index, result in enumerate(results)
+            ])
+        finally:
+            await recipe_server.close()
+        return results, sorted(scores, key=lambda reply: reply['id'])
+
+    results, scores = asyncio.run(run())
+    assert len(results) == 10
+    for result, score in zip(results, scores):
+        assert score['multiplier'] == result['multiplier']
+        assert sorted(set(score['effects'])) == result['effects']
+
+    pass
+
+def test_server_errors():
+    """Ensure bad requests get an error reply without affecting the others."""
+    async def run():
+        recipe_server = server.RecipeServer(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+        host, port = await recipe_server.start()
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(b'not json\n')
+            await writer.drain()
+            invalid_json = loads(await reader.readline())
+            writer.close()
+            await writer.wait_closed()
+            return invalid_json, await query(host, port, [
+                {'id': 1, 'op': 'score', 'order': [99]},
+                {'id': 2, 'op': 'score', 'order': [1, 1]},
+                {'id': 3, 'op': 'dance'},
+                {'id': 4, 'op': 'search', 'depth': 0},
+                {'id': 5, 'op': 'next', 'order': [1, 2, 1, 2, 1, 2, 1, 2]},
+                {'id': 6, 'op': 'score', 'order': [1]}
+            ])
+        finally:
+            await recipe_server.close()
+
+    invalid_json, replies = asyncio.run(run())
+    assert 'error' in invalid_json
+    replies = {reply['id']: reply for reply in replies}
+    for request_id in range(1, 6):
+        assert 'error' in replies[request_id]
+    assert float32(replies[6]['multiplier']) == mix_score([1])[0]
+
+    with raises(ValueError):
+        server.RecipeServer(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON, batch_window=-1)
+
+    pass
+
+def test_server_overlong_line():
+    """Ensure a request line over the stream limit gets an error reply instead of a dropped connection."""
+    async def run():
+        recipe_server = server.RecipeServer(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+        host, port = await recipe_server.start()
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(b'[' + b' ' * 200000 + b']\n')
+            await writer.drain()
+            reply = loads(await reader.readline())
+            writer.close()
+            await writer.wait_closed()
+            return reply, await query(host, port, [{'id': 1, 'op': 'score', 'order': [1]}])
+        finally:
+            await recipe_server.close()
+
+    reply, replies = asyncio.run(run())
+    assert 'error' in reply
+    assert float32(replies[0]['multiplier']) == mix_score([1])[0]
+
+    pass
+
+def test_server_broken_search_worker(monkeypatch):
+    """Ensure a search whose worker dies gets an error reply and the pool is replaced."""
+    # Search workers are forked after this, so they inherit the patch
+    monkeypatch.setattr(search, 'find_best_mixes', lambda *arguments, **keywords: _exit(1))
+
+    async def run():
+        recipe_server = server.RecipeServer(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+        host, port = await recipe_server.start()
+        try:
+            first = await query(host, port, [{'id': 1, 'op': 'search', 'depth': 2, 'top_k': 1}])
+            second = await query(host, port, [{'id': 2, 'op': 'search', 'depth': 2, 'top_k': 1}])
+        finally:
+            await recipe_server.close()
+        return first + second
+
+    for reply in asyncio.run(run()):
+        assert 'error' in reply
+
+    pass
+
+def test_server_invalid_effect():
+    """Ensure a catalog problem fails only the requests it affects."""
+    async def run():
+        recipe_server = server.RecipeServer(
+            TEST_INGREDIENT_INVALID_EFFECT_CORRELATION_JSON, TEST_EFFECTS_JSON, batch_window=0.01
+        )
+        try:
+            return await asyncio.gather(
+                recipe_server.handle_request({'op': 'score', 'order': [0]}),
+                recipe_server.handle_request({'op': 'score', 'order': [1]})
+            )
+        finally:
+            await recipe_server.close()
+
+    invalid, valid = asyncio.run(run())
+    assert 'error' in invalid
+    assert 'multiplier' in valid
+
+    pass
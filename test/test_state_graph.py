@@ -0,0 +1,140 @@
+from itertools import product
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import state_graph
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import catalog
+import mix
+import search
+import state_graph
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+
+def effect_set(compiled, order):
+    """Applies an order to a set of effects one effect at a time."""
+    effects = set()
+    for ingredient in order:
+        effects = {int(compiled.transitions[ingredient, e]) for e in effects}
+        effects.add(int(compiled.effect_given[ingredient]))
+    return tuple(sorted(effects))
+
+def test_state_graph_matches_orders(tmp_path):
+    """Ensure every order up to the graph depth reaches its effect set and multiplier."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    file_path = str(tmp_path / "graph.bin")
+    n_states = state_graph.build_state_graph(compiled, file_path, depth=4)
+
+    with state_graph.StateGraph(file_path) as graph:
+        assert len(graph) == n_states
+        assert graph.depth == 4
+        assert graph.matches(compiled)
+
+        values = compiled.effect_values.tolist()
+        reached = set()
+        for length in range(0, 5):
+            for order in product(compiled.ingredients.tolist(), repeat=length):
+                if any(a == b for a, b in zip(order, order[1:])):
+                    continue
+                effects = effect_set(compiled, order)
+                reached.add(effects)
+                assert graph.effects_after(order) == effects
+                assert graph.multiplier_after(order) == catalog.round_multiplier(sum(values[e] for e in effects))
+                assert graph.min_depths[graph.index_of(effects)] <= length
+
+        # Exactly the reachable effect sets are stored
+        assert len(reached) == n_states
+
+    pass
+
+def test_state_graph_best_next(tmp_path):
+    """Ensure best_next ranks the allowed ingredients by the multiplier they lead to."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    file_path = str(tmp_path / "graph.bin")
+    state_graph.build_state_graph(compiled, file_path, depth=3)
+
+    with state_graph.StateGraph(file_path) as graph:
+        ranked = graph.best_next([2], k=len(compiled.ingredients))
+        ingredients = [ingredient for ingredient, _ in ranked]
+        assert 2 not in ingredients
+        assert sorted(ingredients) == [i for i in compiled.ingredients.tolist() if i != 2]
+        for ingredient, multiplier in ranked:
+            assert multiplier == graph.multiplier_after([2, ingredient])
+        assert [m for _, m in ranked] == sorted((m for _, m in ranked), reverse=True)
+
+        # The best first ingredient agrees with a depth 1 search
+        assert graph.best_next([])[0][1] == search.find_best_mixes(compiled, depth=1, top_k=1)[0].multiplier
+
+    pass
+
+def test_state_graph_stops_at_depth(tmp_path):
+    """Ensure orders longer than the depth are rejected and a full order has no next ingredient."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    file_path = str(tmp_path / "graph.bin")
+    state_graph.build_state_graph(compiled, file_path, depth=3)
+
+    with state_graph.StateGraph(file_path) as graph:
+        assert graph.best_next([0, 1, 0], k=9) == []
+        assert len(graph.best_next([0, 1], k=9)) > 0
+        for order in ([0, 1, 0, 1], [0, 1] * 6):
+            with raises(state_graph.StateGraphException):
+                graph.multiplier_after(order)
+            with raises(state_graph.StateGraphException):
+                graph.best_next(order)
+
+    pass
+
+def test_state_graph_is_read_only(tmp_path):
+    """Ensure the mapped arrays cannot be written."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    file_path = str(tmp_path / "graph.bin")
+    state_graph.build_state_graph(compiled, file_path, depth=2)
+
+    with state_graph.StateGraph(file_path) as graph:
+        with raises(ValueError):
+            graph.multipliers[0] = 1.0
+
+    pass
+
+def test_state_graph_invalid_queries(tmp_path):
+    """Ensure invalid orders raise the same exceptions as Mix."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    file_path = str(tmp_path / "graph.bin")
+    state_graph.build_state_graph(compiled, file_path, depth=2)
+
+    with state_graph.StateGraph(file_path) as graph:
+        with raises(mix.InvalidIngredientException):
+            graph.multiplier_after([99])
+        with raises(mix.DuplicateIngredientException):
+            graph.multiplier_after([1, 1])
+        with raises(state_graph.StateGraphException):
+            graph.index_of([0, 1, 2, 3, 4, 5])
+
+    pass
+
+def test_state_graph_invalid_files(tmp_path):
+    """Ensure missing, foreign and truncated files are rejected."""
+    with raises(FileNotFoundError):
+        state_graph.StateGraph(str(tmp_path / "missing.bin"))
+
+    foreign = tmp_path / "foreign.bin"
+    foreign.write_bytes(b'\0' * 128)
+    with raises(state_graph.StateGraphException):
+        state_graph.StateGraph(str(foreign))
+
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    file_path = tmp_path / "graph.bin"
+    state_graph.build_state_graph(compiled, str(file_path), depth=2)
+    file_path.write_bytes(file_path.read_bytes()[:100])
+    with raises(state_graph.StateGraphException):
+        state_graph.StateGraph(str(file_path))
+
+    pass
@@ -0,0 +1,127 @@
+from itertools import product
+from json import loads
+from numpy import float32
+from os import path
+from pytest import raises
+from sys import path as syspath
+
+# Add parent directory to sys.path so we can import stream
+syspath.insert(0, path.abspath(path.join(path.dirname(__file__), '..')))
+
+import catalog
+import mix
+import stream
+
+# Paths to the test data files
+TEST_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_ingredients.json"
+)
+TEST_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_effects.json"
+)
+ASSET_INGREDIENTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/ingredients.json"
+)
+ASSET_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "../assets/effects.json"
+)
+
+def brute_force_orders(compiled, depth, ingredients=None):
+    """Scores every valid order of up to depth ingredients as effect sets."""
+    values = compiled.effect_values.tolist()
+    ingredients = compiled.ingredients.tolist() if ingredients is None else ingredients
+    scored = {}
+    for length in range(1, depth + 1):
+        for order in product(ingredients, repeat=length):
+            if any(a == b for a, b in zip(order, order[1:])):
+                continue
+            effects = set()
+            for ingredient in order:
+                effects = {int(compiled.transitions[ingredient, e]) for e in effects}
+                effects.add(int(compiled.effect_given[ingredient]))
+            scored[order] = (tuple(sorted(effects)), catalog.round_multiplier(sum(values[e] for e in sorted(effects))))
+    return scored
+
+def test_iter_mixes_yields_every_order():
+    """Ensure every order is yielded once with its effects and multiplier."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    expected = brute_force_orders(compiled, 3)
+    results = list(stream.iter_mixes(compiled, depth=3))
+
+    assert len(results) == len(expected)
+    for result in results:
+        assert (result.effects, result.multiplier) == expected[result.order]
+
+    # Depth first, each order before its extensions
+    assert [result.order for result in results[:3]] == [(0,), (0, 1), (0, 1, 0)]
+
+    pass
+
+def test_iter_mixes_filters_match_brute_force():
+    """Ensure the pushed down filters yield exactly the matching orders."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    allowed = [0, 2, 3, 5, 7]
+    scored = brute_force_orders(compiled, 4, allowed)
+    multipliers = sorted({multiplier for _, multiplier in scored.values()})
+    effects = sorted({effect for effects, _ in scored.values() for effect in effects})
+
+    for min_multiplier, required, forbidden in [
+        (multipliers[len(multipliers) // 2], (), ()),
+        (None, (effects[0],), ()),
+        (None, (), (effects[-1],)),
+        (multipliers[1], (effects[1],), (effects[0],))
+    ]:
+        expected = [
+            order for order, (order_effects, multiplier) in scored.items()
+            if (min_multiplier is None or multiplier >= float32(min_multiplier))
+            and set(required) <= set(order_effects)
+            and not set(forbidden) & set(order_effects)
+        ]
+        results = stream.iter_mixes(
+            compiled, depth=4, min_multiplier=min_multiplier,
+            required_effects=required, forbidden_effects=forbidden, allowed_ingredients=allowed
+        )
+        assert sorted(result.order for result in results) == sorted(expected)
+
+    pass
+
+def test_iter_mixes_is_lazy():
+    """Ensure results arrive without enumerating the whole space first."""
+    compiled = catalog.get_compiled_catalog(ASSET_INGREDIENTS_JSON, ASSET_EFFECTS_JSON)
+    mixes = stream.iter_mixes(compiled, depth=mix.MAX_INGREDIENTS, min_multiplier=2.0)
+    first = next(mixes)
+    assert first.multiplier >= float32(2.0)
+    assert len(first.order) <= mix.MAX_INGREDIENTS
+
+    pass
+
+def test_write_mixes(tmp_path):
+    """Ensure mixes are written one JSON object per line."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    file_path = str(tmp_path / "mixes.jsonl")
+    count = stream.write_mixes(file_path, stream.iter_mixes(compiled, depth=2))
+
+    with open(file_path, 'r') as file:
+        lines = [loads(line) for line in file]
+    expected = list(stream.iter_mixes(compiled, depth=2))
+    assert count == len(lines) == len(expected)
+    for line, result in zip(lines, expected):
+        assert tuple(line['order']) == result.order
+        assert tuple(line['effects']) == result.effects
+        assert float32(line['multiplier']) == result.multiplier
+
+    pass
+
+def test_iter_mixes_invalid_arguments():
+    """Ensure invalid filters are rejected when the generator is created."""
+    compiled = catalog.get_compiled_catalog(TEST_INGREDIENTS_JSON, TEST_EFFECTS_JSON)
+    with raises(ValueError):
+        stream.iter_mixes(compiled, depth=0)
+    with raises(mix.InvalidEffectException):
+        stream.iter_mixes(compiled, required_effects=[999])
+    with raises(mix.InvalidEffectException):
+        stream.iter_mixes(compiled, forbidden_effects=[999])
+    with raises(mix.InvalidIngredientException):
+        stream.iter_mixes(compiled, allowed_ingredients=[99])
+
+    pass
@@ -59,6 +59,20 @@ TEST_EFFECTS_MISSING_KEY: str = path.join(
     path.dirname(__file__), "assets/test_sample_effects_missing_keys.json"
 )
 
+# Paths to the test prices data files
+TEST_PRICES_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_prices.json"
+)
+TEST_PRICES_INVALID_VALUE_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_prices_invalid_value.json"
+)
+TEST_PRICES_MISSING_KEY: str = path.join(
+    path.dirname(__file__), "assets/test_sample_prices_missing_keys.json"
+)
+TEST_PRICES_INVALID_EFFECTS_JSON: str = path.join(
+    path.dirname(__file__), "assets/test_sample_prices_invalid_effects.json"
+)
+
 """
 Testing the function get_ingredient_adjacency_lists
 """
@@ -385,4 +399,243 @@ def test_get_effect_details_file_incorrect_extension():
     # Check the message raised exception
     assert str(e.value) == "The file must have a .json extension."
 
-    pass
\ No newline at end of file
+    pass
+
+"""
+Testing the shared catalog cache
+"""
+
+def test_catalog_cache_hit():
+    """Ensure a second lookup of an unchanged file is served from the cache."""
+    util.clear_catalog_cache()
+    first = util.get_cached_ingredient_adjacency_lists(TEST_INGREDIENTS_JSON)
+    misses = util.CATALOG_CACHE.misses
+    second = util.get_cached_ingredient_adjacency_lists(TEST_INGREDIENTS_JSON)
+
+    # The same object is handed out without parsing the file again
+    assert first is second
+    assert util.CATALOG_CACHE.misses == misses
+    assert first == util.get_ingredient_adjacency_lists(TEST_INGREDIENTS_JSON)
+
+    pass
+
+def test_catalog_cache_reload_on_change(tmp_path):
+    """Ensure editing a file on disk replaces its cached entry."""
+    util.clear_catalog_cache()
+    file_path = str(tmp_path / "effects.json")
+    with open(file_path, 'w') as file:
+        file.write('{"0": {"name": "effect_0", "value": 0.12}}')
+    assert util.get_cached_effect_details(file_path)['0']['value'] == float32(0.12)
+
+    # Rewrite the file with a different size so the signature changes
+    with open(file_path, 'w') as file:
+        file.write('{"0": {"name": "effect_0", "value": 0.5}, "1": {"name": "effect_1", "value": 0.25}}')
+    effect_details = util.get_cached_effect_details(file_path)
+    assert effect_details['0']['value'] == float32(0.5)
+    assert len(util.CATALOG_CACHE) == 1
+
+    pass
+
+def test_catalog_cache_invalidate():
+    """Ensure entries can be invalidated for a single file or all files."""
+    util.clear_catalog_cache()
+    util.get_cached_ingredient_adjacency_lists(TEST_INGREDIENTS_JSON)
+    util.get_cached_effect_details(TEST_EFFECTS_JSON)
+    assert len(util.CATALOG_CACHE) == 2
+
+    assert util.clear_catalog_cache(TEST_EFFECTS_JSON) == 1
+    assert len(util.CATALOG_CACHE) == 1
+    assert util.clear_catalog_cache() == 1
+    assert len(util.CATALOG_CACHE) == 0
+
+    pass
+
+def test_catalog_cache_lru_bound():
+    """Ensure the cache never holds more entries than its capacity."""
+    cache = util.CatalogCache(capacity=1)
+    cache.get('effect_details', (TEST_EFFECTS_JSON,), util.get_effect_details)
+    cache.get('ingredient_adjacency_lists', (TEST_INGREDIENTS_JSON,), util.get_ingredient_adjacency_lists)
+    assert len(cache) == 1
+
+    # The effects entry was evicted so it has to be loaded again
+    cache.get('effect_details', (TEST_EFFECTS_JSON,), util.get_effect_details)
+    assert cache.misses == 3
+    assert cache.hits == 0
+
+    with raises(ValueError):
+        cache.resize(0)
+
+    pass
+
+def test_catalog_cache_errors():
+    """Ensure the cached functions raise the same errors as the uncached ones."""
+    with raises(FileNotFoundError) as e:
+        util.get_cached_effect_details(TEST_FILE_NOT_FOUND_POINTER)
+    assert str(e.value) == f"File not found: {TEST_FILE_NOT_FOUND_POINTER}"
+
+    with raises(util.InvalidFileExtentionError):
+        util.get_cached_ingredient_adjacency_lists(TEST_INVALID_FILE_EXTENSION)
+
+    with raises(util.MissingKeyError):
+        util.get_cached_ingredient_adjacency_lists(TEST_INGREDIENTS_MISSING_KEY)
+
+    pass
+
+def test_binary_cache_round_trip(tmp_path):
+    """Test that the binary cache is written on the first load and returns the same data."""
+    ingredients = tmp_path / "ingredients.json"
+    effects = tmp_path / "effects.json"
+    with open(TEST_INGREDIENTS_JSON, 'r') as file:
+        ingredients.write_text(file.read())
+    with open(TEST_EFFECTS_JSON, 'r') as file:
+        effects.write_text(file.read())
+
+    expected_ingredients = util.get_ingredient_adjacency_lists(str(ingredients))
+    expected_effects = util.get_effect_details(str(effects))
+    assert util.get_ingredient_adjacency_lists(str(ingredients), binary_cache=True) == expected_ingredients
+    assert util.get_effect_details(str(effects), binary_cache=True) == expected_effects
+    assert path.exists(str(ingredients) + util.BINARY_CACHE_SUFFIX)
+    assert path.exists(str(effects) + util.BINARY_CACHE_SUFFIX)
+
+    # Loads from the cache keep the types of the JSON loaders
+    cached_ingredients = util.get_ingredient_adjacency_lists(str(ingredients), binary_cache=True)
+    cached_effects = util.get_effect_details(str(effects), binary_cache=True)
+    assert cached_ingredients == expected_ingredients
+    assert cached_effects == expected_effects
+    for adj_list in cached_ingredients.values():
+        assert isinstance(adj_list[0][0], str)
+        assert all(isinstance(value, uint16) for rule in adj_list[1:] for value in rule)
+    for details in cached_effects.values():
+        assert isinstance(details['name'], str)
+        assert isinstance(details['value'], float32)
+
+    pass
+
+def test_binary_cache_names_with_separators(tmp_path, monkeypatch):
+    """Test that names holding NUL characters or nothing at all are served from the binary cache."""
+    effects = tmp_path / "effects.json"
+    effects.write_text('{"0": {"name": "calm\\u0000ing", "value": 0.1}, "1": {"name": "", "value": 0.2}}')
+    expected = util.get_effect_details(str(effects), binary_cache=True)
+    assert expected['0']['name'] == 'calm\0ing'
+
+    def fail(*_):
+        raise AssertionError("JSON was parsed")
+
+    monkeypatch.setattr(util, 'loads', fail)
+    assert util.get_effect_details(str(effects), binary_cache=True) == expected
+
+    pass
+
+def test_binary_cache_skips_parsing(tmp_path, monkeypatch):
+    """Test that a fresh binary cache is read without parsing the JSON."""
+    ingredients = tmp_path / "ingredients.json"
+    with open(TEST_INGREDIENTS_JSON, 'r') as file:
+        ingredients.write_text(file.read())
+    expected = util.get_ingredient_adjacency_lists(str(ingredients), binary_cache=True)
+
+    def fail(*_):
+        raise AssertionError("JSON was parsed")
+
+    monkeypatch.setattr(util, 'loads', fail)
+    assert util.get_ingredient_adjacency_lists(str(ingredients), binary_cache=True) == expected
+
+    pass
+
+def test_binary_cache_rebuilt_on_change(tmp_path):
+    """Test that a cache written for other content or a corrupt cache is rebuilt."""
+    effects = tmp_path / "effects.json"
+    effects.write_text('{"0": {"name": "calming", "value": 0.1}}')
+    util.get_effect_details(str(effects), binary_cache=True)
+
+    # Changed content has another digest
+    effects.write_text('{"0": {"name": "calming", "value": 0.2}}')
+    assert util.get_effect_details(str(effects), binary_cache=True)['0']['value'] == float32(0.2)
+
+    # A corrupt cache falls back to the JSON file and is replaced
+    cache = tmp_path / ("effects.json" + util.BINARY_CACHE_SUFFIX)
+    cache.write_bytes(cache.read_bytes()[:50])
+    assert util.get_effect_details(str(effects), binary_cache=True)['0']['value'] == float32(0.2)
+    assert util.get_effect_details(str(effects), binary_cache=True)['0']['value'] == float32(0.2)
+
+    # Invalid content is still rejected and never cached
+    effects.write_text('{"0": {"name": "calming", "value": 1}}')
+    with raises(ValueError):
+        util.get_effect_details(str(effects), binary_cache=True)
+
+    pass
+
+"""
+Testing the function get_price_details
+"""
+
+def test_get_price_details_basic():
+    """
+    Test the basic functionality of get_price_details.
+    """
+    price_details = util.get_price_details(TEST_PRICES_JSON)
+
+    assert set(price_details.keys()) == {'ingredients', 'products'}
+    assert len(price_details['ingredients']) == 9
+    assert price_details['ingredients']['5'] == {'name': 'test_ingredient_5', 'cost': float32(1.5)}
+    assert price_details['products']['0'] == {'name': 'test_product_0', 'price': float32(10.0), 'effects': []}
+    assert price_details['products']['1'] == {'name': 'test_product_1', 'price': float32(25.0), 'effects': [1, 4]}
+    assert isinstance(price_details['ingredients']['0']['cost'], float32)
+
+    # The cached version returns the same shared dictionary
+    assert util.get_cached_price_details(TEST_PRICES_JSON) is util.get_cached_price_details(TEST_PRICES_JSON)
+    assert util.get_cached_price_details(TEST_PRICES_JSON) == price_details
+
+    pass
+
+def test_get_price_details_value_error():
+    """
+    Ensure that a ValueError is raised when a cost is negative.
+    """
+    with raises(ValueError) as e:
+        util.get_price_details(TEST_PRICES_INVALID_VALUE_JSON)
+
+    # Check the message raised exception
+    assert str(e.value) == "Negative cost: -1.0 in ingredients '3'"
+
+    pass
+
+def test_get_price_details_duplicate_effects():
+    """
+    Ensure that a ValueError is raised when a product starts with the same
+    effect twice.
+    """
+    with raises(ValueError) as e:
+        util.get_price_details(TEST_PRICES_INVALID_EFFECTS_JSON)
+
+    # Check the message raised exception
+    assert str(e.value) == "Duplicate effects: [1, 1] in products '1'"
+
+    pass
+
+def test_get_price_details_missing_key_error():
+    """
+    Ensure that a MissingKeyError is raised when a required key is missing in
+    the JSON file.
+    """
+    with raises(util.MissingKeyError) as e:
+        util.get_price_details(TEST_PRICES_MISSING_KEY)
+
+    # Check the message raised exception
+    assert str(e.value) == "Missing required keys in products 1: {'price'}"
+
+    pass
+
+def test_get_price_details_file_incorrect_extension():
+    """
+    Ensure that an InvalidFileExtentionError is raised when the file does not
+    have a .json extension.
+    """
+    with raises(util.InvalidFileExtentionError) as e:
+        util.get_price_details(TEST_INVALID_FILE_EXTENSION)
+    with raises(util.InvalidFileExtentionError):
+        util.get_cached_price_details(TEST_INVALID_FILE_EXTENSION)
+
+    # Check the message raised exception
+    assert str(e.value) == "The file must have a .json extension."
+
+    pass
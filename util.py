@@ -1,7 +1,27 @@
-from json import load
-from typing import Dict, List, Tuple, Union
-
-from numpy import float32, uint16
+from collections import OrderedDict
+from hashlib import sha256
+from json import loads
+from os import getpid, path, replace, stat
+from struct import calcsize, error as StructError, pack, unpack_from
+from threading import Lock
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from numpy import array, dtype, float32, frombuffer, uint16
+from numpy.typing import NDArray
+
+DEFAULT_CATALOG_CACHE_CAPACITY : int = 16
+
+# Binary caches are written next to their JSON file with this suffix
+BINARY_CACHE_SUFFIX : str = '.cache.bin'
+BINARY_CACHE_MAGIC : bytes = b'S1BC'
+BINARY_CACHE_VERSION : int = 2
+
+# File header (magic, version, SHA-256 of the JSON, number of columns), the
+# header of every column (dtype, or 'str' for strings, count and byte size)
+# and the UTF-8 byte length in front of every string of a 'str' column
+_BINARY_CACHE_HEADER : str = '<4sI32sI'
+_BINARY_CACHE_COLUMN : str = '<4sQQ'
+_BINARY_CACHE_STRING : str = '<I'
 
 class InvalidFileExtentionError(Exception):
     """
@@ -30,7 +50,8 @@ class MissingKeyError(Exception):
         super().__init__(self.message)
 
 def get_ingredient_adjacency_lists(
-    file_path: str
+    file_path: str,
+    binary_cache: bool = False
 ) -> Dict[str, List[Tuple[Union[uint16, str], uint16]]]:
     """
     Reads a JSON file containing ingredient data and creates an adjacency list
@@ -45,10 +66,19 @@ def get_ingredient_adjacency_lists(
 
     For more information, see the class docstring for the class Mix in mix.py.
 
+    With binary_cache set, the validated adjacency lists are also written to a
+    compact binary file next to the JSON file (see BINARY_CACHE_SUFFIX) along
+    with the SHA-256 digest of the JSON content. Later loads of the same
+    content read that file instead, skipping JSON parsing and validation. A
+    missing, stale or unreadable binary cache is rebuilt, and one that cannot
+    be written is skipped.
+
     Parameters
     ----------
     file_path : str
         Path to the JSON file.
+    binary_cache : bool
+        Read and write the binary cache next to the JSON file.
 
     Raises
     ------
@@ -73,14 +103,18 @@ def get_ingredient_adjacency_lists(
             "The file must have a .json extension."
         )
 
-    # Read the JSON with the ingredients
-    ingredients_json: Dict = {}
-    try:
-        with open(file_path, 'r') as file:
-            ingredients_json = load(file)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"File not found: {file_path}") from e
+    if binary_cache:
+        return _load_with_binary_cache(
+            file_path, _build_ingredient_adjacency_lists,
+            _ingredient_adjacency_lists_to_columns, _ingredient_adjacency_lists_from_columns
+        )
+
+    return _build_ingredient_adjacency_lists(_read_json(file_path))
 
+def _build_ingredient_adjacency_lists(
+    ingredients_json: Dict
+) -> Dict[str, List[Tuple[Union[uint16, str], uint16]]]:
+    """Validates parsed ingredient JSON and builds the adjacency lists, see get_ingredient_adjacency_lists."""
     # Create the adjacency list as a dictionary
     adj_lists: Dict[str, List[Tuple[Union[uint16, str], uint16]]] = {}
 
@@ -150,17 +184,23 @@ def get_ingredient_adjacency_lists(
     return adj_lists
 
 def get_effect_details(
-    file_path: str
+    file_path: str,
+    binary_cache: bool = False
 ) -> Dict[str, Dict[str, Union[str, float32]]]:
     """
     Reads a JSON file containing effect data and creates a dictionary of effect
     details. Each effect is represented by a dictionary containing its name and
     value. The values are exact copies of the values in the JSON file.
 
+    With binary_cache set, the validated details are cached in a binary file
+    next to the JSON file, see get_ingredient_adjacency_lists.
+
     Parameters
     ----------
     file_path : str
         Path to the JSON file.
+    binary_cache : bool
+        Read and write the binary cache next to the JSON file.
 
     Raises
     ------
@@ -183,14 +223,18 @@ def get_effect_details(
             "The file must have a .json extension."
         )
 
-    # Read the JSON with the effects
-    effects_json: Dict = {}
-    try:
-        with open(file_path, 'r') as file:
-            effects_json = load(file)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"File not found: {file_path}") from e
+    if binary_cache:
+        return _load_with_binary_cache(
+            file_path, _build_effect_details,
+            _effect_details_to_columns, _effect_details_from_columns
+        )
+
+    return _build_effect_details(_read_json(file_path))
 
+def _build_effect_details(
+    effects_json: Dict
+) -> Dict[str, Dict[str, Union[str, float32]]]:
+    """Validates parsed effect JSON and builds the effect details, see get_effect_details."""
     # Create the effects list as a dictionary
     effects_details: Dict[str, Dict[str, Union[str, float32]]] = {}
 
@@ -231,4 +275,552 @@ def get_effect_details(
             'value': float32(effects_json[effect_id]['value'])
         }
 
-    return effects_details
\ No newline at end of file
+    return effects_details
+
+def get_price_details(
+    file_path: str
+) -> Dict[str, Dict[str, Dict[str, Union[str, float32, List[uint16]]]]]:
+    """
+    Reads a JSON file containing the cost of each ingredient and the price of
+    each base product. The file has an 'ingredients' object keyed by
+    ingredient ID, each holding a name and a cost, and a 'products' object
+    keyed by product ID, each holding a name and a price. Prices are the sale
+    price of the product before any effect multiplier. A product may also
+    hold 'effects', the IDs of the effects it starts with before any
+    ingredient is added, which default to none.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the JSON file.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the JSON file does not exist at the specified path.
+    InvalidFileExtentionError
+        If the file does not have a .json extension.
+    MissingKeyError
+        If the JSON file does not contain the required sections or keys.
+    ValueError
+        If the JSON file contains invalid data types for a section, name,
+        cost, price or effects, a negative cost or price, or a product
+        starting with the same effect twice.
+
+    Returns
+    -------
+    Dict[str, Dict[str, Dict[str, str | float32 | List[uint16]]]]
+        'ingredients' mapping every ingredient ID to its name and cost, and
+        'products' mapping every product ID to its name, price and effects.
+    """
+    # Ensure the file has a .json extension
+    if not file_path.endswith('.json'):
+        raise InvalidFileExtentionError(
+            "The file must have a .json extension."
+        )
+
+    return _build_price_details(_read_json(file_path))
+
+def _build_price_details(
+    prices_json: Dict
+) -> Dict[str, Dict[str, Dict[str, Union[str, float32, List[uint16]]]]]:
+    """Validates parsed price JSON and builds the price details, see get_price_details."""
+    price_details: Dict[str, Dict[str, Dict[str, Union[str, float32, List[uint16]]]]] = {}
+
+    # Each section holds entries with a name and one amount
+    for section, amount_key in (('ingredients', 'cost'), ('products', 'price')):
+        if section not in prices_json:
+            raise MissingKeyError(f"Missing required section in price file: {section}")
+        if not isinstance(prices_json[section], dict):
+            raise ValueError(
+                f"Invalid type for {section}: {type(prices_json[section])}"
+            )
+
+        price_details[section] = {}
+        for entry_id, entry in prices_json[section].items():
+            # Ensure the entry is a dictionary
+            if not isinstance(entry, dict):
+                raise ValueError(
+                    f"Invalid type for {section}[{entry_id}]: {type(entry)}"
+                )
+
+            # Ensure required keys are present
+            required_keys = {'name', amount_key}
+            if not required_keys.issubset(entry.keys()):
+                missing = required_keys - set(entry.keys())
+                raise MissingKeyError(
+                    f"Missing required keys in {section} {entry_id}: {missing}"
+                )
+
+            # Ensure 'name' is a string
+            if not isinstance(entry['name'], str):
+                raise ValueError(
+                    f"Invalid type for name: {type(entry['name'])} in {section} '{entry_id}'"
+                )
+
+            # Ensure the amount is a non-negative number
+            amount = entry[amount_key]
+            if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+                raise ValueError(
+                    f"Invalid type for {amount_key}: {type(amount)} in {section} '{entry_id}'"
+                )
+            if amount < 0:
+                raise ValueError(
+                    f"Negative {amount_key}: {amount} in {section} '{entry_id}'"
+                )
+
+            price_details[section][entry_id] = {
+                'name': entry['name'],
+                amount_key: float32(amount)
+            }
+
+            # Products may start with effects, each a distinct effect ID
+            if section == 'products':
+                effects = entry.get('effects', [])
+                if not isinstance(effects, list) or not all(
+                    isinstance(effect, int) and not isinstance(effect, bool) and effect >= 0
+                    for effect in effects
+                ):
+                    raise ValueError(
+                        f"Invalid effects: {effects} in {section} '{entry_id}'"
+                    )
+                if len(set(effects)) != len(effects):
+                    raise ValueError(
+                        f"Duplicate effects: {effects} in {section} '{entry_id}'"
+                    )
+                price_details[section][entry_id]['effects'] = [uint16(effect) for effect in effects]
+
+    return price_details
+
+def _read_bytes(file_path: str) -> bytes:
+    """Returns the content of a file, raising FileNotFoundError with the path."""
+    try:
+        with open(file_path, 'rb') as file:
+            return file.read()
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"File not found: {file_path}") from e
+
+def _read_json(file_path: str) -> Dict:
+    """Parses a JSON file."""
+    return loads(_read_bytes(file_path))
+
+def _load_with_binary_cache(
+    file_path: str,
+    build: Callable[[Dict], Any],
+    to_columns: Callable[[Any], List[Union[NDArray, List[str]]]],
+    from_columns: Callable[[List[Union[NDArray, List[str]]]], Any]
+) -> Any:
+    """
+    Loads a catalog through its binary cache, rebuilding the cache from the
+    JSON file when it is missing, unreadable or was written for other content.
+    """
+    content = _read_bytes(file_path)
+    digest = sha256(content).digest()
+    cache_path = file_path + BINARY_CACHE_SUFFIX
+
+    # Serve the binary cache if it was written for this exact content
+    columns = _read_binary_cache(cache_path, digest)
+    if columns is not None:
+        return from_columns(columns)
+
+    value = build(loads(content))
+
+    # Write next to the cache and rename so readers never see a partial file
+    temporary_path = f"{cache_path}.{getpid()}.tmp"
+    try:
+        with open(temporary_path, 'wb') as file:
+            file.write(_encode_binary_cache(digest, to_columns(value)))
+        replace(temporary_path, cache_path)
+    except OSError:
+        pass
+    return value
+
+def _encode_binary_cache(digest: bytes, columns: List[Union[NDArray, List[str]]]) -> bytes:
+    """Serializes columns of numbers or strings behind a header holding the JSON digest."""
+    parts = [pack(_BINARY_CACHE_HEADER, BINARY_CACHE_MAGIC, BINARY_CACHE_VERSION, digest, len(columns))]
+    for column in columns:
+        if isinstance(column, list):
+            data = b''.join(
+                pack(_BINARY_CACHE_STRING, len(encoded)) + encoded
+                for encoded in (string.encode('utf-8') for string in column)
+            )
+            parts.append(pack(_BINARY_CACHE_COLUMN, b'str', len(column), len(data)))
+        else:
+            data = column.tobytes()
+            parts.append(pack(_BINARY_CACHE_COLUMN, column.dtype.str.encode(), len(column), len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+def _read_binary_cache(cache_path: str, digest: bytes) -> Union[List[Union[NDArray, List[str]]], None]:
+    """Returns the columns of a binary cache, or None if it is missing, malformed or stale."""
+    try:
+        with open(cache_path, 'rb') as file:
+            data = file.read()
+        magic, version, stored_digest, n_columns = unpack_from(_BINARY_CACHE_HEADER, data, 0)
+        if magic != BINARY_CACHE_MAGIC or version != BINARY_CACHE_VERSION or stored_digest != digest:
+            return None
+
+        columns: List[Union[NDArray, List[str]]] = []
+        offset = calcsize(_BINARY_CACHE_HEADER)
+        for _ in range(n_columns):
+            kind, count, size = unpack_from(_BINARY_CACHE_COLUMN, data, offset)
+            offset += calcsize(_BINARY_CACHE_COLUMN)
+            if offset + size > len(data):
+                return None
+            kind = kind.rstrip(b'\0').decode()
+            if kind == 'str':
+                strings = _decode_binary_cache_strings(data[offset:offset + size], count)
+                if strings is None:
+                    return None
+                columns.append(strings)
+            else:
+                columns.append(frombuffer(data, dtype=dtype(kind), count=count, offset=offset))
+            offset += size
+        return columns
+    except (OSError, StructError, UnicodeDecodeError, TypeError, ValueError):
+        return None
+
+def _decode_binary_cache_strings(data: bytes, count: int) -> Union[List[str], None]:
+    """Splits count length-prefixed strings, or returns None if they do not fill data exactly."""
+    strings: List[str] = []
+    offset = 0
+    for _ in range(count):
+        (length,) = unpack_from(_BINARY_CACHE_STRING, data, offset)
+        offset += calcsize(_BINARY_CACHE_STRING)
+        if offset + length > len(data):
+            return None
+        strings.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+    return strings if offset == len(data) else None
+
+def _ingredient_adjacency_lists_to_columns(
+    adj_lists: Dict[str, List[Tuple[Union[uint16, str], uint16]]]
+) -> List[Union[NDArray, List[str]]]:
+    """Flattens adjacency lists into columns for the binary cache."""
+    return [
+        list(adj_lists.keys()),
+        [adj_list[0][0] for adj_list in adj_lists.values()],
+        array([adj_list[0][1] for adj_list in adj_lists.values()], dtype=uint16),
+        array([len(adj_list) - 1 for adj_list in adj_lists.values()], dtype=uint16),
+        array([rule[0] for adj_list in adj_lists.values() for rule in adj_list[1:]], dtype=uint16),
+        array([rule[1] for adj_list in adj_lists.values() for rule in adj_list[1:]], dtype=uint16)
+    ]
+
+def _ingredient_adjacency_lists_from_columns(
+    columns: List[Union[NDArray, List[str]]]
+) -> Dict[str, List[Tuple[Union[uint16, str], uint16]]]:
+    """Rebuilds adjacency lists from the columns of a binary cache."""
+    ids, names, effect_given, counts, sources, targets = columns
+    effect_given, sources, targets = list(effect_given), list(sources), list(targets)
+    adj_lists: Dict[str, List[Tuple[Union[uint16, str], uint16]]] = {}
+    start = 0
+    for index, count in enumerate(counts.tolist()):
+        adj_lists[ids[index]] = [(names[index], effect_given[index])]
+        adj_lists[ids[index]].extend(zip(sources[start:start + count], targets[start:start + count]))
+        start += count
+    return adj_lists
+
+def _effect_details_to_columns(
+    effects_details: Dict[str, Dict[str, Union[str, float32]]]
+) -> List[Union[NDArray, List[str]]]:
+    """Flattens effect details into columns for the binary cache."""
+    return [
+        list(effects_details.keys()),
+        [details['name'] for details in effects_details.values()],
+        array([details['value'] for details in effects_details.values()], dtype=float32)
+    ]
+
+def _effect_details_from_columns(
+    columns: List[Union[NDArray, List[str]]]
+) -> Dict[str, Dict[str, Union[str, float32]]]:
+    """Rebuilds effect details from the columns of a binary cache."""
+    ids, names, values = columns
+    return {
+        effect_id: {'name': name, 'value': value}
+        for effect_id, name, value in zip(ids, names, list(values))
+    }
+
+class CatalogCache:
+    """
+    Process-wide least recently used cache of parsed catalog files.
+
+    Every entry is keyed by a kind string (which parser produced it), the
+    resolved path of each file it was built from and the modification time and
+    size of those files. Editing a catalog on disk therefore produces a new key,
+    and the stale entry for the same file is dropped as soon as the new one is
+    stored. Values handed out by the cache are shared between every caller and
+    must be treated as read-only.
+
+    Attributes
+    ----------
+    capacity : int
+        Maximum number of entries held before the least recently used one is
+        evicted.
+    hits : int
+        Number of lookups answered from the cache.
+    misses : int
+        Number of lookups that had to call the loader.
+    """
+    def __init__(self, capacity: int = DEFAULT_CATALOG_CACHE_CAPACITY) -> None:
+        if capacity < 1:
+            raise ValueError("Catalog cache capacity must be at least 1.")
+        self.capacity : int = capacity
+        self.hits : int = 0
+        self.misses : int = 0
+        self._entries : OrderedDict = OrderedDict()
+        self._lock : Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        kind: str,
+        file_paths: Tuple[str, ...],
+        loader: Callable[..., Any]
+    ) -> Any:
+        """
+        Returns the cached value built from the given files, calling the loader
+        with the file paths on a miss.
+
+        Parameters
+        ----------
+        kind : str
+            Name separating values built by different loaders from the same
+            files.
+        file_paths : Tuple[str, ...]
+            Paths of the files the value is built from.
+        loader : Callable[..., Any]
+            Function called as loader(*file_paths) when the value is missing.
+
+        Raises
+        ------
+        FileNotFoundError
+            If one of the files does not exist. Anything raised by the loader
+            is propagated unchanged and nothing is stored.
+
+        Returns
+        -------
+        Any
+            The cached or freshly loaded value.
+        """
+        key = (kind,) + tuple(_file_signature(file_path) for file_path in file_paths)
+
+        # Serve the entry if the files have not changed since it was stored
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        value = loader(*file_paths)
+
+        with self._lock:
+            self.misses += 1
+
+            # Drop entries built from older versions of the same files
+            resolved = _resolved_paths(key)
+            for stale in [k for k in self._entries if k[0] == kind and _resolved_paths(k) == resolved]:
+                del self._entries[stale]
+
+            self._entries[key] = value
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def invalidate(self, file_path: Union[str, None] = None) -> int:
+        """
+        Removes entries from the cache.
+
+        Parameters
+        ----------
+        file_path : str | None
+            When given, only the entries built from this file are removed.
+            Otherwise the cache is emptied.
+
+        Returns
+        -------
+        int
+            Number of entries removed.
+        """
+        with self._lock:
+            if file_path is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+
+            resolved = path.realpath(file_path)
+            stale = [k for k in self._entries if resolved in _resolved_paths(k)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def resize(self, capacity: int) -> None:
+        """
+        Changes the capacity of the cache, evicting the least recently used
+        entries if it now holds too many.
+
+        Parameters
+        ----------
+        capacity : int
+            New maximum number of entries.
+
+        Raises
+        ------
+        ValueError
+            If capacity is less than 1.
+        """
+        if capacity < 1:
+            raise ValueError("Catalog cache capacity must be at least 1.")
+        with self._lock:
+            self.capacity = capacity
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+def _file_signature(file_path: str) -> Tuple[str, int, int]:
+    """Returns the resolved path, modification time and size of a file."""
+    try:
+        file_stat = stat(file_path)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"File not found: {file_path}") from e
+    return (path.realpath(file_path), file_stat.st_mtime_ns, file_stat.st_size)
+
+def _resolved_paths(key: Tuple) -> Tuple[str, ...]:
+    """Returns the resolved file paths stored in a cache key."""
+    return tuple(signature[0] for signature in key[1:])
+
+# Cache shared by every Mix instance in the process
+CATALOG_CACHE : CatalogCache = CatalogCache()
+
+def get_cached_ingredient_adjacency_lists(
+    file_path: str,
+    binary_cache: bool = False
+) -> Dict[str, List[Tuple[Union[uint16, str], uint16]]]:
+    """
+    Cached version of get_ingredient_adjacency_lists. The file is only parsed
+    again once its modification time or size changes. The returned dictionary
+    is shared and must not be modified.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the JSON file.
+    binary_cache : bool
+        Parse through the binary cache next to the JSON file on a miss.
+
+    Raises
+    ------
+    See get_ingredient_adjacency_lists.
+
+    Returns
+    -------
+    Dict[str, List[Tuple[uint16 | str, uint16]]]
+        Adjacency list.
+    """
+    # Check the extension first so the error matches the uncached function
+    if not file_path.endswith('.json'):
+        raise InvalidFileExtentionError(
+            "The file must have a .json extension."
+        )
+    return CATALOG_CACHE.get(
+        'ingredient_adjacency_lists', (file_path,),
+        lambda file_path: get_ingredient_adjacency_lists(file_path, binary_cache)
+    )
+
+def get_cached_effect_details(
+    file_path: str,
+    binary_cache: bool = False
+) -> Dict[str, Dict[str, Union[str, float32]]]:
+    """
+    Cached version of get_effect_details. The file is only parsed again once
+    its modification time or size changes. The returned dictionary is shared
+    and must not be modified.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the JSON file.
+    binary_cache : bool
+        Parse through the binary cache next to the JSON file on a miss.
+
+    Raises
+    ------
+    See get_effect_details.
+
+    Returns
+    -------
+    Dict[str, Dict[str, str | float32]]
+        Dictionary of effect details.
+    """
+    # Check the extension first so the error matches the uncached function
+    if not file_path.endswith('.json'):
+        raise InvalidFileExtentionError(
+            "The file must have a .json extension."
+        )
+    return CATALOG_CACHE.get(
+        'effect_details', (file_path,),
+        lambda file_path: get_effect_details(file_path, binary_cache)
+    )
+
+def get_cached_price_details(
+    file_path: str
+) -> Dict[str, Dict[str, Dict[str, Union[str, float32, List[uint16]]]]]:
+    """
+    Cached version of get_price_details. The file is only parsed again once
+    its modification time or size changes. The returned dictionary is shared
+    and must not be modified.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the JSON file.
+
+    Raises
+    ------
+    See get_price_details.
+
+    Returns
+    -------
+    Dict[str, Dict[str, Dict[str, str | float32]]]
+        Ingredient costs and product prices.
+    """
+    # Check the extension first so the error matches the uncached function
+    if not file_path.endswith('.json'):
+        raise InvalidFileExtentionError(
+            "The file must have a .json extension."
+        )
+    return CATALOG_CACHE.get('price_details', (file_path,), get_price_details)
+
+def clear_catalog_cache(file_path: Union[str, None] = None) -> int:
+    """
+    Invalidates the shared catalog cache, either completely or only for the
+    entries built from one file.
+
+    Parameters
+    ----------
+    file_path : str | None
+        File whose entries are removed. Every entry is removed when omitted.
+
+    Returns
+    -------
+    int
+        Number of entries removed.
+    """
+    return CATALOG_CACHE.invalidate(file_path)
+
+def set_catalog_cache_capacity(capacity: int) -> None:
+    """
+    Sets how many parsed catalogs the shared cache holds at once.
+
+    Parameters
+    ----------
+    capacity : int
+        New maximum number of entries.
+
+    Raises
+    ------
+    ValueError
+        If capacity is less than 1.
+    """
+    CATALOG_CACHE.resize(capacity)